@@ -16,7 +16,6 @@ a = Analysis(
         'selenium.webdriver.support.ui',
         'selenium.webdriver.support',
         'selenium.webdriver.support.expected_conditions',
-        'selenium.webdriver.common.action_chains',
         'openpyxl',
         'openpyxl.workbook',
         'openpyxl.worksheet',
@@ -47,7 +46,8 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # Sem UPX: descompactar as DLLs a cada abertura deixa o início mais lento
+    upx=False,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -63,7 +63,7 @@ coll = COLLECT(
     a.zipfiles,
     a.datas,
     strip=False,
-    upx=True,
+    upx=False,
     upx_exclude=[],
     name='AutoAtestado',
 )
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""
+Benchmark do processar_atestados contra o servidor_teste.py (nenhum dado real do SENAC).
+
+Sobe o PeopleSoft falso, monta uma planilha sintética de N alunos e mede tempo total,
+comandos WebDriver (motor Selenium), requisições HTTP recebidas pelo servidor e aulas por minuto.
+Confere também se o número de lançamentos bate com o esperado, para pegar regressões.
+
+Uso: python benchmark.py --alunos 30 --aulas 8 --latencia 0.05 --motor http --sessoes 2
+"""
+import argparse
+import contextlib
+import datetime
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from statistics import median
+from time import perf_counter
+
+import main as autoatestado
+import servidor_teste
+
+
+def planilha_sintetica(alunos: dict, periodos: int, ano: str) -> list:
+    """
+    Registros (id, início, fim) como os de carregar_registros: `periodos` atestados por aluno, sem sobreposição
+    """
+    registros = []
+    for emplid in alunos:
+        for p in range(periodos):
+            inicio = datetime.datetime(int(ano), 3, 2) + datetime.timedelta(days=7 * p)
+            registros.append((emplid, inicio, inicio + datetime.timedelta(days=2)))
+    return registros
+
+
+def lancamentos_esperados(alunos: dict, registros: list) -> int:
+    # Só aulas "Matric" sem FIC recebem lançamento (com --fic as FIC são abertas, mas puladas), e só se cruzam o período
+    total = 0
+    for emplid, inicio, fim in registros:
+        for aula in alunos[emplid]["aulas"]:
+            aula_inicio = datetime.datetime.strptime(aula["inicio"], "%d/%m/%Y")
+            aula_fim = datetime.datetime.strptime(aula["fim"], "%d/%m/%Y")
+            if aula["tipo"] == "Matric" and inicio <= aula_fim and fim >= aula_inicio:
+                total += 1
+    return total
+
+
+@contextlib.contextmanager
+def contar_comandos_webdriver():
+    """
+    Conta toda chamada a WebDriver.execute (cada uma é um comando enviado ao chromedriver)
+    """
+    contador = {"comandos": 0}
+    try:
+        from selenium.webdriver.remote.webdriver import WebDriver
+    except ImportError:
+        yield contador
+        return
+    original = WebDriver.execute
+
+    def execute(self, *args, **kwargs):
+        contador["comandos"] += 1
+        return original(self, *args, **kwargs)
+
+    WebDriver.execute = execute
+    try:
+        yield contador
+    finally:
+        WebDriver.execute = original
+
+
+def rodar(args, rodada: int) -> dict:
+    alunos = servidor_teste.gerar_alunos(args.alunos, args.aulas, args.ano, variacao=args.variacao, semestral=args.semestral)
+    registros = planilha_sintetica(alunos, args.periodos, args.ano)
+    latencias = servidor_teste.latencias_por_acao(args.latencia_pesquisa, args.latencia_salvar)
+
+    # Pasta própria por rodada: log, diário e settings.json não se misturam com os do usuário
+    pasta = tempfile.mkdtemp(prefix=f"autoatestado_bench_{rodada}_")
+    os.environ["APPDATA"] = pasta
+    cwd = os.getcwd()
+    os.chdir(pasta)
+
+    with servidor_teste.ServidorPeopleSoftTeste(alunos, latencia=args.latencia, latencia_acoes=latencias,
+                                                expirar_apos=args.expirar_apos, capacidade=args.capacidade) as servidor:
+        config = {
+            "search_year": args.ano,
+            "attend_reason": "Amparo Legal",
+            "amparo_code": "0000000001",
+            "workers": args.sessoes,
+            "engine": args.motor,
+            "headless": args.motor == "selenium",
+            "lean_profile": args.motor == "selenium",
+            "url_base": servidor.url_base,
+            "adaptive_concurrency": args.adaptativo,
+        }
+        mensagens = []
+        saida = io.StringIO()
+        try:
+            with contar_comandos_webdriver() as contador:
+                inicio = perf_counter()
+                with contextlib.redirect_stdout(sys.stdout if args.verboso else saida):
+                    resultado = autoatestado.processar_atestados(
+                        "benchmark", "benchmark", status_cb=mensagens.append, config=config,
+                        process_fic=args.fic, registros=registros,
+                    )
+                tempo = perf_counter() - inicio
+        finally:
+            os.chdir(cwd)
+        requisicoes = servidor.requisicoes
+        expiradas = servidor.expiradas
+        lancados = len(servidor.lancamentos)
+
+    relatorio = ""
+    for caminho in glob.glob(os.path.join(pasta, "log", "relatorio_*.txt")):
+        with open(caminho, encoding="utf-8") as f:
+            relatorio = f.read()
+    return {
+        "rodada": rodada,
+        "tempo_s": round(tempo, 3),
+        "alunos": args.alunos,
+        "lancamentos": lancados,
+        "esperados": lancamentos_esperados(alunos, registros),
+        "aulas_por_min": round(lancados / tempo * 60, 1) if tempo else 0.0,
+        "comandos_webdriver": contador["comandos"],
+        "requisicoes_http": requisicoes,
+        "sessoes_expiradas": expiradas,
+        "resultado": resultado,
+        "pasta": pasta,
+        "relatorio": relatorio,
+    }
+
+
+def duplicados(lancamentos: list) -> int:
+    chaves = [(l["emplid"], l["aula"], l["inicio"], l["fim"]) for l in lancamentos]
+    return len(chaves) - len(set(chaves))
+
+
+def rodar_processos(args, rodada: int) -> dict:
+    """
+    Vários processos do modo linha de comando esvaziando a mesma planilha por uma fila compartilhada (SQLite),
+    cada um com sua pasta (settings, log, diário), como máquinas diferentes numa pasta de rede
+    """
+    alunos = servidor_teste.gerar_alunos(args.alunos, args.aulas, args.ano, variacao=args.variacao, semestral=args.semestral)
+    registros = planilha_sintetica(alunos, args.periodos, args.ano)
+    latencias = servidor_teste.latencias_por_acao(args.latencia_pesquisa, args.latencia_salvar)
+    pasta = tempfile.mkdtemp(prefix=f"autoatestado_bench_{rodada}_")
+    planilha = os.path.join(pasta, "atestados.csv")
+    with open(planilha, "w", encoding="utf-8", newline="") as f:
+        f.write("nome;id;inicio;fim\n")
+        for emplid, inicio, fim in registros:
+            f.write(f"{alunos[emplid]['nome']};{emplid};{inicio:%d/%m/%Y};{fim:%d/%m/%Y}\n")
+    fila = os.path.join(pasta, "fila.sqlite3")
+    programa = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+    with servidor_teste.ServidorPeopleSoftTeste(alunos, latencia=args.latencia, latencia_acoes=latencias,
+                                                expirar_apos=args.expirar_apos, capacidade=args.capacidade) as servidor:
+        processos = []
+        inicio = perf_counter()
+        for n in range(1, args.processos + 1):
+            pasta_processo = os.path.join(pasta, f"processo_{n}")
+            os.makedirs(os.path.join(pasta_processo, "AutoAtestado"))
+            with open(os.path.join(pasta_processo, "AutoAtestado", "settings.json"), "w", encoding="utf-8") as f:
+                json.dump({"url_base": servidor.url_base}, f)
+            ambiente = dict(os.environ, APPDATA=pasta_processo, AUTOATESTADO_USUARIO="benchmark", AUTOATESTADO_SENHA="benchmark")
+            comando = [
+                sys.executable, programa, planilha, "--ano", args.ano, "--razao", "Amparo Legal", "--codigo-amparo", "0000000001",
+                "--motor", args.motor, "--sessoes", str(args.sessoes), "--fila-compartilhada", fila,
+            ] + (["--fic"] if args.fic else []) + (["--adaptativo"] if args.adaptativo else []) + (["--perfil-leve"] if args.motor == "selenium" else [])
+            processos.append(subprocess.Popen(
+                comando, cwd=pasta_processo, env=ambiente, stdout=subprocess.PIPE,
+                stderr=None if args.verboso else subprocess.DEVNULL, text=True, encoding="utf-8",
+            ))
+        resumos = []
+        for processo in processos:
+            saida, _ = processo.communicate()
+            linhas = [l for l in saida.splitlines() if l.strip()]
+            try:
+                resumos.append(json.loads(linhas[-1]))
+            except (IndexError, ValueError):
+                resumos.append({"exit_code": processo.returncode, "error": "sem resumo"})
+        tempo = perf_counter() - inicio
+        requisicoes = servidor.requisicoes
+        expiradas = servidor.expiradas
+        lancamentos = list(servidor.lancamentos)
+
+    return {
+        "rodada": rodada,
+        "tempo_s": round(tempo, 3),
+        "alunos": args.alunos,
+        "lancamentos": len(lancamentos),
+        "esperados": lancamentos_esperados(alunos, registros),
+        "duplicados": duplicados(lancamentos),
+        "aulas_por_min": round(len(lancamentos) / tempo * 60, 1) if tempo else 0.0,
+        "comandos_webdriver": 0,
+        "requisicoes_http": requisicoes,
+        "sessoes_expiradas": expiradas,
+        "resultado": resumos,
+        "pasta": pasta,
+        "relatorio": "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do AutoAtestado")
+    parser.add_argument("--alunos", type=int, default=20)
+    parser.add_argument("--aulas", type=int, default=8, help="aulas por aluno")
+    parser.add_argument("--variacao", type=int, default=0, help="varia o número de aulas por aluno em ± N")
+    parser.add_argument("--semestral", action="store_true", help="metade das aulas só no segundo semestre")
+    parser.add_argument("--periodos", type=int, default=1, help="atestados por aluno na planilha")
+    parser.add_argument("--ano", default="2025")
+    parser.add_argument("--latencia", type=float, default=0.0, help="atraso em segundos por requisição")
+    parser.add_argument("--latencia-pesquisa", type=float, default=0.0, help="atraso extra no #ICSearch")
+    parser.add_argument("--latencia-salvar", type=float, default=0.0, help="atraso extra no #ICSave")
+    parser.add_argument("--capacidade", type=int, default=0, help="requisições que o servidor atende ao mesmo tempo")
+    parser.add_argument("--expirar-apos", type=int, default=0, help="derruba cada sessão depois de N requisições")
+    parser.add_argument("--motor", choices=("http", "selenium"), default="http")
+    parser.add_argument("--sessoes", type=int, default=1)
+    parser.add_argument("--adaptativo", action="store_true", help="controle AIMD: --sessoes vira o teto")
+    parser.add_argument("--fic", action="store_true", help="abre também as aulas FIC")
+    parser.add_argument("--processos", type=int, default=1,
+                        help="N processos do modo linha de comando dividindo a planilha por uma fila compartilhada")
+    parser.add_argument("--repeticoes", type=int, default=1)
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--relatorio", action="store_true", help="mostra o relatório de tempos por etapa")
+    parser.add_argument("--verboso", action="store_true", help="mostra a saída do processamento")
+    args = parser.parse_args()
+
+    resultados = []
+    for rodada in range(1, args.repeticoes + 1):
+        r = rodar_processos(args, rodada) if args.processos > 1 else rodar(args, rodada)
+        resultados.append(r)
+        ok = "ok" if r["lancamentos"] == r["esperados"] else f"ESPERADO {r['esperados']}"
+        if r.get("duplicados"):
+            ok += f", {r['duplicados']} DUPLICADOS"
+        print(
+            f"Rodada {rodada}: {r['tempo_s']:.2f}s | {r['lancamentos']} lançamentos ({ok}) | "
+            f"{r['aulas_por_min']:.1f} aulas/min | {r['comandos_webdriver']} comandos WebDriver | "
+            f"{r['requisicoes_http']} requisições HTTP"
+            + (f" | {r['sessoes_expiradas']} sessões expiradas" if r["sessoes_expiradas"] else "")
+        )
+        if args.relatorio and r["relatorio"]:
+            print(r["relatorio"])
+
+    if len(resultados) > 1:
+        print(
+            f"Mediana: {median(r['tempo_s'] for r in resultados):.2f}s | "
+            f"{median(r['aulas_por_min'] for r in resultados):.1f} aulas/min"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([{k: v for k, v in r.items() if k != "relatorio"} for r in resultados], f, ensure_ascii=False, indent=2, default=str)
+
+    # Código de saída 1 se algum lançamento faltou, sobrou ou foi feito duas vezes
+    return 0 if all(r["lancamentos"] == r["esperados"] and not r.get("duplicados") for r in resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
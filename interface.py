@@ -0,0 +1,614 @@
+"""
+Janela (tkinter) do AutoAtestado. Importada só quando a interface é aberta: o modo linha de comando
+(main.py com argumentos) roda em Pythons sem _tkinter.
+"""
+import os
+import threading
+import tkinter as tk
+from queue import Queue, Empty
+from tkinter import ttk, messagebox
+
+from main import (
+    RAZOES_AUSENCIA, URL_BASE, CanalProgresso, DiarioExecucao, EventoProgresso, NavegadorReserva,
+    _settings_path, clear_credentials, ler_planilha, load_saved_credentials, load_settings, localizar_planilha,
+    pasta_perfil_sessao, processar_atestados, save_credentials, save_settings, settings_exists,
+)
+
+
+class App(tk.Tk):
+    # Eventos do worker que mudam o status de um aluno na tabela
+    STATUS_DO_EVENTO = {
+        EventoProgresso.ALUNO_INICIADO: "carregando",
+        EventoProgresso.ALUNO_CONCLUIDO: "concluído",
+        EventoProgresso.ALUNO_FALHOU: "erro",
+    }
+
+    def __init__(self, preaquecer: bool = True):
+        super().__init__()
+        self.title("AutoAtestado - SENAC")
+        self.geometry("720x580")
+        self.resizable(False, False)
+
+        # Adicionar ícone se existir
+        try:
+            self.iconbitmap("icon.ico")
+        except Exception:
+            pass  # Se não encontrar o ícone, continua sem ele
+
+        # Estado
+        self.worker_thread = None
+        self.resume_event = threading.Event(); self.resume_event.set()
+        self.stop_event = threading.Event()
+        self.is_running = False
+        self.is_paused = False
+        self.pending_restart = False
+        self.status_queue = Queue()
+        self.settings_open = False
+        self.planilha_preview = []
+        # Modelo da tabela de status: status por aluno e itens do Treeview de cada aluno
+        self.status_by_id = {}
+        self.itens_por_id = {}
+        self.concluidos = set()
+        self.itens_concluidos = 0
+        self.itens_erro = 0
+
+        # Estado
+        self.worker_thread = None
+        self.resume_event = threading.Event(); self.resume_event.set()
+        self.stop_event = threading.Event()
+        self.is_running = False
+        self.is_paused = False
+        self.processo_concluido = False
+        self.processo_erro = None
+
+        # UI
+        padding = {"padx": 8, "pady": 6}
+        frm = ttk.Frame(self)
+        frm.pack(fill=tk.BOTH, expand=True, padx=10, pady=10) 
+        try:
+            for i in range(4):
+                frm.grid_columnconfigure(i, weight=1)
+            frm.grid_columnconfigure(0, weight=0)
+            frm.grid_columnconfigure(1, weight=1)
+            frm.grid_columnconfigure(2, weight=1)
+            frm.grid_columnconfigure(3, weight=1)
+        except Exception:
+            pass
+
+        hdr = ttk.Frame(frm)
+        hdr.grid(row=0, column=0, columnspan=4, sticky="ew")
+        try:
+            hdr.grid_columnconfigure(0, weight=1)
+            hdr.grid_columnconfigure(1, weight=0)
+        except Exception:
+            pass
+        self.settings_btn = ttk.Button(hdr, text="Config", width=8, command=self.open_settings)
+        self.settings_btn.grid(row=0, column=1, sticky="e", padx=4, pady=2)
+
+        ttk.Label(frm, text="Usuário:").grid(row=1, column=0, sticky="w", **padding)
+        self.user_var = tk.StringVar()
+        self.user_entry = ttk.Entry(frm, textvariable=self.user_var, width=28)
+        self.user_entry.grid(row=1, column=1, columnspan=2, sticky="w", **padding)
+
+        ttk.Label(frm, text="Senha:").grid(row=2, column=0, sticky="w", **padding)
+        self.pass_var = tk.StringVar()
+        self.pass_entry = ttk.Entry(frm, textvariable=self.pass_var, width=28, show="*")
+        self.pass_entry.grid(row=2, column=1, columnspan=2, sticky="w", **padding)
+
+        self.remember_var = tk.BooleanVar(value=False)
+        self.remember_cb = ttk.Checkbutton(frm, text="Lembrar credenciais", variable=self.remember_var)
+        self.remember_cb.grid(row=3, column=0, columnspan=4, sticky="w", **padding)
+        self.process_fic_var = tk.BooleanVar(value=False)
+        self.process_fic_cb = ttk.Checkbutton(frm, text="Lançar amparo em aulas FIC", variable=self.process_fic_var)
+        self.process_fic_cb.grid(row=4, column=0, columnspan=4, sticky="w", **padding)
+
+        btns = ttk.Frame(frm)
+        btns.grid(row=5, column=0, columnspan=4, sticky="ew")
+        try:
+            btns.grid_columnconfigure(0, weight=1)
+            btns.grid_columnconfigure(1, weight=1)
+        except Exception:
+            pass
+        self.start_btn = ttk.Button(btns, text="Iniciar", command=self.on_start)
+        self.start_btn.grid(row=0, column=0, sticky="ew", **padding)
+        self.pause_btn = ttk.Button(btns, text="Pausar", command=self.on_pause_resume, state=tk.DISABLED)
+        self.pause_btn.grid(row=0, column=1, sticky="ew", **padding)
+        self.stop_btn = ttk.Button(btns, text="Parar", command=self.on_stop, state=tk.DISABLED)
+        self.stop_btn.grid(row=1, column=0, sticky="ew", **padding)
+        self.restart_btn = ttk.Button(btns, text="Reiniciar", command=self.on_restart)
+        self.restart_btn.grid(row=1, column=1, sticky="ew", **padding)
+
+        ttk.Separator(frm).grid(row=6, column=0, columnspan=4, sticky="ew", pady=(10, 0))
+
+        ttk.Label(frm, text="Status:").grid(row=7, column=0, columnspan=4, sticky="w", **padding)
+        self.status_var = tk.StringVar(value="Pronto.")
+        self.status_lbl = ttk.Label(frm, textvariable=self.status_var, wraplength=400, anchor="w", justify="left")
+        self.status_lbl.grid(row=7, column=0, columnspan=4, sticky="w", **padding)
+        self.progress_text = tk.StringVar(value="Progresso: 0/0")
+        ttk.Label(frm, textvariable=self.progress_text).grid(row=8, column=0, columnspan=4, sticky="w", padx=10)
+        self.progress = ttk.Progressbar(frm, mode="determinate")
+        self.progress.grid(row=9, column=0, columnspan=4, sticky="ew", padx=10)
+        self.status_tree = ttk.Treeview(frm, columns=("id", "periodo", "status"), show="headings", height=10)
+        self.status_tree.heading("id", text="ID")
+        self.status_tree.heading("periodo", text="Período")
+        self.status_tree.heading("status", text="Status")
+        self.status_tree.column("id", width=140, anchor="w")
+        self.status_tree.column("periodo", width=200, anchor="w")
+        self.status_tree.column("status", width=100, anchor="w")
+        self.status_tree.grid(row=10, column=0, columnspan=3, sticky="nsew", padx=10)
+        self.status_scroll = ttk.Scrollbar(frm, orient="vertical", command=self.status_tree.yview)
+        self.status_scroll.grid(row=10, column=3, sticky="ns")
+        self.status_tree.configure(yscrollcommand=self.status_scroll.set)
+        try:
+            self.status_tree.tag_configure("concluído", foreground="#2e7d32")
+            self.status_tree.tag_configure("carregando", foreground="#f9a825")
+            self.status_tree.tag_configure("erro", foreground="#c62828")
+            self.status_tree.tag_configure("aguardando", foreground="#616161")
+            frm.grid_rowconfigure(10, weight=1)
+        except Exception:
+            pass
+
+        # Info da planilha (externa)
+        ttk.Label(frm, text="Planilha: 'atestados.xlsx' ou 'atestados.csv' (mesma pasta do programa)").grid(row=11, column=0, columnspan=4, sticky="w", padx=8)
+
+        self.bind('<Return>', lambda e: self.on_start() if (not self.is_running and not self.settings_open) else None)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Poll da fila de status
+        self.after(200, self._poll_status)
+
+        # Carregar credenciais salvas, se existirem
+        try:
+            u, p = load_saved_credentials()
+            if u and p:
+                self.user_var.set(u)
+                self.pass_var.set(p)
+                self.remember_var.set(True)
+        except Exception:
+            pass
+        s = load_settings()
+        self.attend_reason = s.get("attend_reason", "Amparo Legal")
+        self.amparo_code = s.get("amparo_code", "0000000001")
+        self.search_year = s.get("search_year", "2025")
+        self.workers = s.get("workers", 1)
+        self.engine = s.get("engine", "selenium")
+        self.headless = s.get("headless", False)
+        self.lean_profile = s.get("lean_profile", False)
+        self.chrome_profile_dir = s.get("chrome_profile_dir")
+        self.adaptive_concurrency = s.get("adaptive_concurrency", False)
+        # Chrome aberto em segundo plano enquanto o usuário digita as credenciais
+        self.navegador_reserva = NavegadorReserva()
+        if preaquecer:
+            self.after(500, self._preaquecer_navegador)
+        self.excel_path = localizar_planilha()
+        self.planilha_mtime = None
+        self._geracao_planilha = 0
+        self._leitor_planilha = None
+        self._planilha_lida = None
+        self._carregar_planilha()
+
+    def _carregar_planilha(self):
+        """
+        Lê a planilha numa thread, para a janela abrir sem esperar por ela; a mesma lista alimenta a prévia e o worker
+        """
+        self._geracao_planilha += 1
+        geracao = self._geracao_planilha
+        caminho = self.excel_path
+        self.status_var.set("Carregando planilha...")
+
+        def ler():
+            try:
+                mtime = os.path.getmtime(caminho)
+                linhas = list(ler_planilha(caminho))
+            except Exception:
+                mtime, linhas = None, []
+            # Uma leitura mais nova já foi pedida: descarta esta
+            if geracao != self._geracao_planilha:
+                return
+            self._planilha_lida = (geracao, mtime, linhas)
+            try:
+                self.after(0, self._aplicar_planilha)
+            except Exception:
+                pass
+
+        self._leitor_planilha = threading.Thread(target=ler, daemon=True)
+        self._leitor_planilha.start()
+
+    def _aguardar_planilha(self):
+        """
+        Espera a leitura em andamento (Iniciar logo depois de abrir o programa) e aplica o resultado
+        """
+        if self._leitor_planilha is not None:
+            self._leitor_planilha.join()
+        self._aplicar_planilha()
+
+    def _aplicar_planilha(self):
+        lida, self._planilha_lida = self._planilha_lida, None
+        if lida is None or lida[0] != self._geracao_planilha:
+            return
+        _, mtime, linhas = lida
+        self.planilha_preview = linhas
+        self.status_by_id = {}
+        self.itens_por_id = {}
+        self.concluidos = set()
+        self.itens_concluidos = 0
+        self.itens_erro = 0
+        try:
+            self.status_tree.delete(*self.status_tree.get_children())
+            for id_s, ini, fim in linhas:
+                self.status_by_id[id_s] = "aguardando"
+                d1 = ini.strftime('%d/%m/%Y') if hasattr(ini, 'strftime') else (ini if ini else '')
+                d2 = fim.strftime('%d/%m/%Y') if hasattr(fim, 'strftime') else (fim if fim else '')
+                item = self.status_tree.insert('', 'end', values=(id_s, f"{d1} a {d2}", "aguardando"), tags=("aguardando",))
+                self.itens_por_id.setdefault(id_s, []).append(item)
+        except Exception:
+            pass
+        self.planilha_mtime = mtime
+        if self.status_var.get() == "Carregando planilha...":
+            self.status_var.set("Pronto." if mtime is not None else f"Planilha não encontrada: {self.excel_path}")
+        self._atualizar_progresso()
+
+    def _preaquecer_navegador(self):
+        if self.engine != "selenium":
+            self.navegador_reserva.descartar()
+            return
+        if self.is_running:
+            return
+        url_base = load_settings().get("url_base") or URL_BASE
+        self.navegador_reserva.iniciar(url_base, self.headless, self.lean_profile, pasta_perfil_sessao(self.chrome_profile_dir, 1))
+
+    def _enqueue_status(self, msg: str):
+        self.status_queue.put(EventoProgresso(EventoProgresso.MENSAGEM, mensagem=msg))
+
+    def _poll_status(self):
+        # Junta todas as mensagens do intervalo: cada aluno é redesenhado no máximo uma vez por ciclo
+        mudancas = {}
+        ultima_msg = None
+        try:
+            while True:
+                evento = self.status_queue.get_nowait()
+                st = self.STATUS_DO_EVENTO.get(evento.tipo)
+                if st:
+                    mudancas[str(evento.id_aluno)] = st
+                elif evento.tipo == EventoProgresso.MENSAGEM:
+                    ultima_msg = evento.mensagem
+        except Empty:
+            pass
+        except Exception:
+            pass
+        if ultima_msg is not None:
+            self.status_var.set(ultima_msg)
+        if mudancas:
+            for idv, st in mudancas.items():
+                self._atualizar_aluno(idv, st)
+            self._atualizar_progresso()
+        # Se houver reinício pendente e não estiver rodando, reinicia
+        if self.pending_restart and not self.is_running:
+            self.pending_restart = False
+            self.on_start()
+        self.after(200, self._poll_status)
+
+    def _atualizar_aluno(self, idv: str, st: str):
+        """
+        Atualiza só as linhas desse aluno. Ordem da tabela: concluídos, erros, aguardando e, no fim, em andamento.
+        """
+        itens = self.itens_por_id.get(idv)
+        antigo = self.status_by_id.get(idv)
+        if not itens or antigo == st:
+            return
+        self.status_by_id[idv] = st
+        n = len(itens)
+        if antigo == "concluído":
+            self.itens_concluidos -= n
+            self.concluidos.discard(idv)
+        elif antigo == "erro":
+            self.itens_erro -= n
+        try:
+            for k, item in enumerate(itens):
+                self.status_tree.item(item, tags=(st,))
+                self.status_tree.set(item, "status", st)
+                if st == "concluído":
+                    self.status_tree.move(item, '', self.itens_concluidos + k)
+                elif st == "erro":
+                    self.status_tree.move(item, '', self.itens_concluidos + self.itens_erro + k)
+                elif st == "carregando":
+                    self.status_tree.move(item, '', 'end')
+        except Exception:
+            pass
+        if st == "concluído":
+            self.itens_concluidos += n
+            self.concluidos.add(idv)
+        elif st == "erro":
+            self.itens_erro += n
+
+    def _atualizar_progresso(self):
+        total = len(self.itens_por_id)
+        done = len(self.concluidos)
+        try:
+            self.progress.configure(mode="determinate", maximum=max(1, total))
+            self.progress['value'] = done
+            self.progress_text.set(f"Progresso: {done}/{total}")
+        except Exception:
+            pass
+
+    def _position_right(self):
+        try:
+            self.update_idletasks()
+            w = self.winfo_width() or 460
+            h = self.winfo_height() or 300
+            sw = self.winfo_screenwidth()
+            x = max(0, sw - w - 20)
+            y = 20
+            self.geometry(f"{w}x{h}+{x}+{y}")
+        except Exception:
+            pass
+
+
+    def on_start(self):
+        if self.is_running:
+            return
+        user = self.user_var.get().strip()
+        pwd = self.pass_var.get().strip()
+        if not user or not pwd:
+            messagebox.showwarning("Dados obrigatórios", "Informe usuário e senha.")
+            return
+        if not settings_exists() or not self.search_year or not self.attend_reason or self.attend_reason not in RAZOES_AUSENCIA or (self.attend_reason == "Amparo Legal" and not self.amparo_code):
+            messagebox.showwarning("Configurações necessárias", "Antes de iniciar, abra Config, escolha Ano e Razão e clique em Salvar.")
+            return
+        if self.remember_var.get():
+            save_credentials(user, pwd)
+        else:
+            clear_credentials()
+        # Relê a planilha só se ela foi alterada desde a última leitura
+        self._aguardar_planilha()
+        try:
+            if os.path.getmtime(self.excel_path) != self.planilha_mtime:
+                self._carregar_planilha()
+                self._aguardar_planilha()
+        except OSError:
+            pass
+        self.is_running = True
+        self.is_paused = False
+        self.resume_event.set()
+        self.stop_event.clear()
+
+        # Travar inputs enquanto roda
+        self.user_entry.configure(state=tk.DISABLED)
+        self.pass_entry.configure(state=tk.DISABLED)
+        self.start_btn.configure(state=tk.DISABLED)
+        self.pause_btn.configure(state=tk.NORMAL, text="Pausar")
+        self.stop_btn.configure(state=tk.NORMAL)
+
+        self.status_var.set("Iniciando automação...")
+        try:
+            self._position_right()
+        except Exception:
+            pass
+        self._atualizar_progresso()
+
+        def target():
+            try:
+                cfg = {"attend_reason": self.attend_reason, "amparo_code": self.amparo_code, "search_year": self.search_year, "workers": self.workers, "engine": self.engine, "headless": self.headless, "lean_profile": self.lean_profile, "chrome_profile_dir": self.chrome_profile_dir, "adaptive_concurrency": self.adaptive_concurrency}
+                registros = list(self.planilha_preview) if self.planilha_mtime is not None else None
+                canal = CanalProgresso()
+                canal.assinar(self.status_queue.put, {EventoProgresso.MENSAGEM, *self.STATUS_DO_EVENTO})
+                result = processar_atestados(user, pwd, resume_event=self.resume_event, stop_event=self.stop_event, excel_path=self.excel_path, config=cfg, process_fic=self.process_fic_var.get(), registros=registros, canal=canal, navegador_reserva=self.navegador_reserva)
+                if not self.stop_event.is_set():
+                    if result and result.get("unprocessed_count"):
+                        msg = f"{result['unprocessed_count']} alunos ficaram sem processar porque as sessões caíram. Verifique o log e clique em Reiniciar para continuar."
+                        self._enqueue_status(f"⚠️ {msg}")
+                        self.processo_erro = msg
+                    elif result and result.get("found_count", 0) == 0 and not result.get("resumed_count") and not result.get("shared_done_count"):
+                        yr = result.get("year") or ""
+                        msg = f"Nenhuma linha encontrada para EMÉDIO {yr}." if yr else "Nenhuma linha encontrada."
+                        self._enqueue_status(msg)
+                        self.processo_erro = msg
+                    else:
+                        self._enqueue_status("🎉 Processamento concluído! Verifique o arquivo de log na pasta 'log'.")
+                        self.processo_concluido = True
+            except Exception as e:
+                self._enqueue_status(f"❌ Erro: {e}")
+                self.processo_erro = str(e)
+            finally:
+                def restore():
+                    self.is_running = False
+                    self.is_paused = False
+                    self.user_entry.configure(state=tk.NORMAL)
+                    self.pass_entry.configure(state=tk.NORMAL)
+                    self.start_btn.configure(state=tk.NORMAL)
+                    self.pause_btn.configure(state=tk.DISABLED, text="Pausar")
+                    self.stop_btn.configure(state=tk.DISABLED)
+                    self.restart_btn.configure(state=tk.DISABLED)
+                    try:
+                        self.progress.stop()
+                        self.progress.configure(mode="determinate")
+                    except Exception:
+                        pass
+                    # Próximo Iniciar/Reiniciar já encontra um navegador aberto
+                    self._preaquecer_navegador()
+
+                    # Verificar se deve mostrar pop-up de conclusão
+                    if hasattr(self, 'processo_concluido') and self.processo_concluido:
+                        messagebox.showinfo("AutoAtestado - Concluído", "Processamento concluído com sucesso!\n\nVerifique o arquivo de log na pasta 'log' para detalhes.")
+                        self.processo_concluido = False
+                    elif hasattr(self, 'processo_erro') and self.processo_erro:
+                        messagebox.showerror("AutoAtestado - Erro", f"Falha na execução:\n\n{self.processo_erro}")
+                        self.processo_erro = None
+                self.after(0, restore)
+
+        self.worker_thread = threading.Thread(target=target, daemon=True)
+        self.worker_thread.start()
+
+    def open_settings(self):
+        dialog = tk.Toplevel(self)
+        dialog.title("Configurações")
+        dialog.resizable(False, False)
+        dialog.transient(self)
+        dialog.grab_set()
+        self.settings_open = True
+        try:
+            self.start_btn.configure(state=tk.DISABLED)
+        except Exception:
+            pass
+        pad = {"padx": 10, "pady": 8}
+        frm = ttk.Frame(dialog)
+        frm.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frm, text="Ano (4 dígitos):").grid(row=0, column=0, sticky="w", **pad)
+        year_var = tk.StringVar(value=str(self.search_year))
+        year_entry = ttk.Entry(frm, textvariable=year_var, width=10)
+        def validate_year(P):
+            return P.isdigit() and len(P) <= 4
+        vcmd = (self.register(validate_year), '%P')
+        year_entry.configure(validate='key', validatecommand=vcmd)
+        year_entry.grid(row=0, column=1, sticky="w", **pad)
+        ttk.Label(frm, text="Razão de ausência:").grid(row=1, column=0, sticky="w", **pad)
+        reason_var = tk.StringVar(value=self.attend_reason)
+        reason_cb = ttk.Combobox(frm, textvariable=reason_var, values=RAZOES_AUSENCIA, state="readonly", width=28)
+        reason_cb.grid(row=1, column=1, sticky="w", **pad)
+        ttk.Label(frm, text="Motivo (Amparo Legal):").grid(row=2, column=0, sticky="w", **pad)
+        amparo_options = [
+            ("0000000001", "Problemas de saúde"),
+            ("0000000002", "Licença Maternidade"),
+            ("0000000003", "Adoção"),
+            ("0000000004", "Licença paternidade"),
+            ("0000000005", "Serviço militar"),
+            ("0000000006", "Representação desportiva"),
+            ("0000000008", "Educação Física"),
+            ("0000000009", "Crença religiosa"),
+        ]
+        amparo_display = [f"{code} - {desc}" for code, desc in amparo_options]
+        amparo_var = tk.StringVar()
+        try:
+            current_display = next(f"{c} - {d}" for c, d in amparo_options if c == self.amparo_code)
+            amparo_var.set(current_display)
+        except Exception:
+            amparo_var.set(amparo_display[0])
+        amparo_cb = ttk.Combobox(frm, textvariable=amparo_var, values=amparo_display, state="readonly", width=28)
+        amparo_cb.grid(row=2, column=1, sticky="w", **pad)
+        def on_reason_change(*_):
+            if reason_var.get() == "Amparo Legal":
+                amparo_cb.configure(state="readonly")
+            else:
+                amparo_cb.configure(state="disabled")
+        reason_var.trace_add("write", on_reason_change)
+        on_reason_change()
+        ttk.Label(frm, text="Sessões paralelas:").grid(row=3, column=0, sticky="w", **pad)
+        workers_var = tk.StringVar(value=str(self.workers))
+        workers_sb = ttk.Spinbox(frm, from_=1, to=8, textvariable=workers_var, width=5, state="readonly")
+        workers_sb.grid(row=3, column=1, sticky="w", **pad)
+        ttk.Label(frm, text="Motor:").grid(row=4, column=0, sticky="w", **pad)
+        engines = [("selenium", "Navegador (Chrome)"), ("http", "HTTP (sem navegador)")]
+        engine_var = tk.StringVar(value=next((d for c, d in engines if c == self.engine), engines[0][1]))
+        engine_cb = ttk.Combobox(frm, textvariable=engine_var, values=[d for _, d in engines], state="readonly", width=28)
+        engine_cb.grid(row=4, column=1, sticky="w", **pad)
+        headless_var = tk.BooleanVar(value=bool(self.headless))
+        ttk.Checkbutton(frm, text="Navegador oculto (headless)", variable=headless_var).grid(row=5, column=0, columnspan=2, sticky="w", **pad)
+        lean_var = tk.BooleanVar(value=bool(self.lean_profile))
+        ttk.Checkbutton(frm, text="Perfil leve (sem imagens, fontes e mídia)", variable=lean_var).grid(row=6, column=0, columnspan=2, sticky="w", **pad)
+        keep_session_var = tk.BooleanVar(value=bool(self.chrome_profile_dir))
+        ttk.Checkbutton(frm, text="Manter sessão do Chrome entre execuções (pula o login)", variable=keep_session_var).grid(row=7, column=0, columnspan=2, sticky="w", **pad)
+        adaptive_var = tk.BooleanVar(value=bool(self.adaptive_concurrency))
+        ttk.Checkbutton(frm, text="Ajustar sessões ativas conforme o servidor responde", variable=adaptive_var).grid(row=8, column=0, columnspan=2, sticky="w", **pad)
+        btns = ttk.Frame(frm)
+        btns.grid(row=9, column=0, columnspan=2, sticky="e", **pad)
+        def on_save():
+            self.attend_reason = reason_var.get()
+            if self.attend_reason == "Amparo Legal":
+                sel = amparo_var.get()
+                code = sel.split(" - ")[0]
+                self.amparo_code = code
+            yr = year_var.get()
+            yr_digits = "".join(ch for ch in yr if ch.isdigit())[:4]
+            if yr_digits:
+                self.search_year = yr_digits
+            self.engine = next((c for c, d in engines if d == engine_var.get()), "selenium")
+            # Mantém chaves gravadas pela automação (ex.: url_componente)
+            s = load_settings()
+            s.update({"attend_reason": self.attend_reason, "amparo_code": self.amparo_code})
+            s["search_year"] = self.search_year
+            s["engine"] = self.engine
+            try:
+                self.workers = max(1, min(8, int(workers_var.get())))
+            except ValueError:
+                self.workers = 1
+            s["workers"] = self.workers
+            self.headless = headless_var.get()
+            self.lean_profile = lean_var.get()
+            s["headless"] = self.headless
+            s["lean_profile"] = self.lean_profile
+            self.adaptive_concurrency = adaptive_var.get()
+            s["adaptive_concurrency"] = self.adaptive_concurrency
+            if keep_session_var.get():
+                self.chrome_profile_dir = s.get("chrome_profile_dir") or os.path.join(os.path.dirname(_settings_path()), "perfil_chrome")
+                s["chrome_profile_dir"] = self.chrome_profile_dir
+            else:
+                self.chrome_profile_dir = None
+                s.pop("chrome_profile_dir", None)
+            save_settings(s)
+            self._preaquecer_navegador()
+            dialog.destroy()
+            self.settings_open = False
+            try:
+                self.start_btn.configure(state=tk.NORMAL)
+            except Exception:
+                pass
+        ttk.Button(btns, text="Salvar", command=on_save).pack(side=tk.RIGHT, padx=4)
+        def on_clear_journal():
+            if messagebox.askyesno("Limpar progresso", "Apagar o progresso salvo? A próxima execução vai reprocessar toda a planilha.", parent=dialog):
+                DiarioExecucao().limpar()
+        ttk.Button(btns, text="Limpar progresso", command=on_clear_journal).pack(side=tk.LEFT, padx=4)
+        def on_cancel():
+            dialog.destroy()
+            self.settings_open = False
+            try:
+                self.start_btn.configure(state=tk.NORMAL)
+            except Exception:
+                pass
+        ttk.Button(btns, text="Cancelar", command=on_cancel).pack(side=tk.RIGHT)
+
+    def on_pause_resume(self):
+        if not self.is_running:
+            return
+        if not self.is_paused:
+            # Pausar
+            self.resume_event.clear()
+            self.is_paused = True
+            self.pause_btn.configure(text="Retomar")
+            self.status_var.set("Pausado. Clique em Retomar para continuar.")
+        else:
+            # Retomar
+            self.resume_event.set()
+            self.is_paused = False
+            self.pause_btn.configure(text="Pausar")
+            self.status_var.set("Retomando...")
+
+    def on_stop(self):
+        if not self.is_running:
+            return
+        if messagebox.askyesno("Parar", "Deseja interromper o processamento atual?"):
+            self.stop_event.set()
+            self.resume_event.set()  # garante sair da pausa
+            self.status_var.set("Parando... aguarde a etapa atual finalizar.")
+            # Botões: desabilita parar para evitar múltiplos cliques
+            self.stop_btn.configure(state=tk.DISABLED)
+
+    def on_restart(self):
+        if self.is_running:
+            if not messagebox.askyesno("Reiniciar", "Isso vai interromper a execução atual e reiniciar, pulando o que já foi concluído. Continuar?"):
+                return
+            self.pending_restart = True
+            self.on_stop()
+        else:
+            self.on_start()
+
+    def on_close(self):
+        if self.is_running:
+            if not messagebox.askyesno("Sair", "A automação ainda está em execução. Deseja encerrar mesmo assim?"):
+                return
+            # Solicita parada
+            self.stop_event.set()
+            self.resume_event.set()
+        try:
+            self.navegador_reserva.descartar()
+        finally:
+            self.destroy()
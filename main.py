@@ -1,21 +1,28 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from time import sleep
-from openpyxl import load_workbook
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
+from time import sleep, perf_counter, time
+# Marca do início do processo, para medir o tempo até a janela aparecer (--tempo-inicio); recuada abaixo
+# para a criação do processo, que inclui a subida do interpretador
+INICIO_PROCESSO = perf_counter()
 import re
 import os
 import datetime
 import threading
-import tkinter as tk
-from tkinter import ttk, messagebox
-from queue import Queue
+from queue import Queue, Empty
+from collections import deque
 import json
+import sqlite3
+import csv
+import codecs
+import uuid
+import hashlib
+import socket
+from contextlib import contextmanager, redirect_stdout
+import argparse
+import sys
 import base64
 import ctypes
 from ctypes import wintypes
+import urllib.parse
+from html.parser import HTMLParser
 
 class _DATA_BLOB(ctypes.Structure):
     _fields_ = [("cbData", wintypes.DWORD), ("pbData", ctypes.POINTER(ctypes.c_byte))]
@@ -54,6 +61,34 @@ def _unprotect_data(protected: bytes) -> bytes:
     finally:
         kernel32.LocalFree(out_blob.pbData)
 
+def _idade_do_processo():
+    """
+    Segundos desde a criação do processo (Windows: GetProcessTimes; Linux: /proc); None se não der para saber
+    """
+    try:
+        if os.name == "nt":
+            kernel32 = ctypes.WinDLL("kernel32")
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            criacao, saida, nucleo, usuario, agora = (wintypes.FILETIME() for _ in range(5))
+            if not kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), ctypes.byref(criacao), ctypes.byref(saida),
+                                            ctypes.byref(nucleo), ctypes.byref(usuario)):
+                return None
+            kernel32.GetSystemTimeAsFileTime(ctypes.byref(agora))
+            # FILETIME: intervalos de 100 ns
+            return ((agora.dwHighDateTime << 32 | agora.dwLowDateTime) - (criacao.dwHighDateTime << 32 | criacao.dwLowDateTime)) / 1e7
+        with open("/proc/self/stat", "r") as f:
+            # Campo 22 (starttime, em ticks desde o boot); o nome do processo entre parênteses pode ter espaços
+            inicio_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            ligado_s = float(f.read().split()[0])
+        return max(0.0, ligado_s - inicio_ticks / os.sysconf("SC_CLK_TCK"))
+    except Exception:
+        return None
+
+_idade = _idade_do_processo()
+if _idade is not None:
+    INICIO_PROCESSO = perf_counter() - _idade
+
 def _cred_path() -> str:
     appdata = os.getenv("APPDATA") or os.path.expanduser("~")
     folder = os.path.join(appdata, "AutoAtestado")
@@ -105,7 +140,7 @@ def load_settings():
         with open(_settings_path(), "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
-        return {"attend_reason": "Amparo Legal", "amparo_code": "0000000001", "search_year": "2025"}
+        return {"attend_reason": "Amparo Legal", "amparo_code": "0000000001", "search_year": "2025", "workers": 1, "engine": "selenium", "headless": False, "lean_profile": False}
 
 def save_settings(settings: dict):
     try:
@@ -120,9 +155,14 @@ def settings_exists() -> bool:
         return False
 
 class LogManager:
-    def __init__(self, log_dir: str = "log"):
+    FIM = object()
+
+    def __init__(self, log_dir: str = "log", tamanho_fila: int = 1000, lote: int = 200):
         """
-        Inicializa o gerenciador de logs com arquivo nomeado por data/hora
+        Inicializa o gerenciador de logs. Cada execução tem um run_id único e gera dois arquivos:
+        log_<run_id>.txt (leitura humana) e log_<run_id>.jsonl (um registro JSON por aula e por aluno).
+        A gravação é feita por uma thread própria, em lotes, a partir de uma fila limitada; os
+        workers só enfileiram e nunca abrem o arquivo.
         """
         self.log_dir = log_dir
         
@@ -130,44 +170,158 @@ class LogManager:
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
         
-        # Gerar nome do arquivo com data e hora atual
+        # Gerar nome do arquivo com data e hora atual + sufixo aleatório (duas execuções no mesmo minuto não colidem)
         now = datetime.datetime.now()
-        timestamp = now.strftime("%d_%m_%y__%H_%Mh")
-        self.log_file = os.path.join(log_dir, f"log_{timestamp}.txt")
+        self.run_id = f"{now.strftime('%d_%m_%y__%H_%M_%S')}_{uuid.uuid4().hex[:6]}"
+        self.log_file = os.path.join(log_dir, f"log_{self.run_id}.txt")
+        self.jsonl_file = os.path.join(log_dir, f"log_{self.run_id}.jsonl")
         
         # Criar arquivo de log
         with open(self.log_file, 'w', encoding='utf-8') as f:
             f.write("=== LOG DE LANÇAMENTOS DE AULAS ===\n")
             f.write(f"Arquivo criado em: {now.strftime('%d/%m/%Y %H:%M:%S')}\n")
+            f.write(f"Execução: {self.run_id}\n")
             f.write("-" * 50 + "\n\n")
+
+        self.lote = lote
+        self._fila = Queue(maxsize=tamanho_fila)
+        self._escritor = threading.Thread(target=self._gravar_em_lotes, name="LogManager", daemon=True)
+        self._escritor.start()
         
         print(f"📝 Arquivo de log criado: {self.log_file}")
+
+    def _gravar_em_lotes(self):
+        try:
+            txt = open(self.log_file, 'a', encoding='utf-8')
+            jsonl = open(self.jsonl_file, 'a', encoding='utf-8')
+        except Exception as e:
+            print(f"❌ Erro ao abrir arquivos de log: {e}")
+            # Continua consumindo a fila para não travar os workers
+            while self._fila.get() is not self.FIM:
+                pass
+            return
+        try:
+            fim = False
+            while not fim:
+                item = self._fila.get()
+                lote = [item]
+                # Junta tudo o que já está na fila num único flush
+                while len(lote) < self.lote:
+                    try:
+                        lote.append(self._fila.get_nowait())
+                    except Empty:
+                        break
+                for item in lote:
+                    if item is self.FIM:
+                        fim = True
+                        continue
+                    texto, registro = item
+                    try:
+                        if texto:
+                            txt.write(texto)
+                        if registro is not None:
+                            jsonl.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+                    except Exception as e:
+                        print(f"❌ Erro ao registrar no log: {e}")
+                txt.flush()
+                jsonl.flush()
+        finally:
+            txt.close()
+            jsonl.close()
+
+    def _enfileirar(self, texto: str, registro: dict = None):
+        if registro is not None:
+            registro = {"ts": datetime.datetime.now().isoformat(timespec="milliseconds"), "run_id": self.run_id, **registro}
+        self._fila.put((texto, registro))
+
+    def fechar(self):
+        """
+        Grava o que restou na fila e encerra a thread de escrita
+        """
+        if self._escritor.is_alive():
+            self._fila.put(self.FIM)
+            self._escritor.join()
     
     def registrar_lancamento(self, id_aluno: str, aulas_lancadas: list, status: str = "SUCESSO", observacoes: str = ""):
         """
         Registra um lançamento de aulas no log
         """
         timestamp = datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        ja_lancadas = sum(1 for a in aulas_lancadas if a.endswith("Já lançado"))
         
         log_entry = f"LANÇAMENTO REGISTRADO\n"
         log_entry += f"Data/Hora: {timestamp}\n"
         log_entry += f"ID do Aluno: {id_aluno}\n"
         log_entry += f"Status: {status}\n"
         log_entry += f"Aulas Processadas: {len(aulas_lancadas)}\n"
+        if ja_lancadas:
+            log_entry += f"Já lançadas (sem regravar): {ja_lancadas}\n"
         log_entry += f"Detalhes das Aulas: {', '.join(aulas_lancadas) if aulas_lancadas else 'Nenhuma aula processada'}\n"
         
         if observacoes:
             log_entry += f"Observações: {observacoes}\n"
         
         log_entry += "-" * 30 + "\n\n"
-        
+
+        self._enfileirar(log_entry, {
+            "tipo": "aluno", "id": str(id_aluno), "status": status, "aulas": len(aulas_lancadas),
+            "ja_lancadas": ja_lancadas, "detalhes": aulas_lancadas, "observacoes": observacoes,
+        })
+        print(f"📝 Log registrado para aluno {id_aluno}")
+
+    def registrar_evento(self, evento):
+        """
+        Assinante do CanalProgresso: cada evento (aula, aluno, fim da execução) vira um registro do .jsonl;
+        o .txt mantém o resumo por aluno
+        """
+        self._enfileirar("", evento.como_dict())
+    
+    def registrar_etapa(self, nome: str, segundos: float, ok: bool, id_aluno=None, aula=None):
+        """
+        Registro estruturado de uma etapa medida (só no .jsonl)
+        """
+        self._enfileirar("", {
+            "tipo": "etapa", "etapa": nome, "id": (str(id_aluno) if id_aluno is not None else None),
+            "aula": aula, "segundos": round(segundos, 3), "ok": ok,
+        })
+
+    def registrar_controle(self, decisao: dict):
+        """
+        Decisão do controle de concorrência (sessões ativas, pausa, latência e erros que a motivaram)
+        """
+        timestamp = datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        log_entry = "CONTROLE DE SESSÕES\n"
+        log_entry += f"Data/Hora: {timestamp}\n"
+        log_entry += f"Decisão: {decisao['acao']} -> {decisao['sessoes']} sessões ativas, pausa {decisao['pausa_s']:.1f}s\n"
+        log_entry += f"Motivo: {decisao['motivo']}\n"
+        log_entry += "-" * 30 + "\n\n"
+        self._enfileirar(log_entry, {"tipo": "controle", **decisao})
+
+    def registrar_relatorio(self, linhas: list):
+        """
+        Grava o relatório de tempos da execução em relatorio_<run_id>.txt, ao lado do log
+        """
+        caminho = os.path.join(self.log_dir, f"relatorio_{self.run_id}.txt")
         try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-            print(f"📝 Log registrado para aluno {id_aluno}")
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(f"=== RELATÓRIO DE TEMPOS ({self.run_id}) ===\n\n")
+                f.write("\n".join(linhas) + "\n")
+            print(f"📝 Relatório de tempos: {caminho}")
         except Exception as e:
-            print(f"❌ Erro ao registrar no log: {e}")
-    
+            print(f"❌ Erro ao gravar relatório: {e}")
+
+    def registrar_esperas(self, linhas: list):
+        """
+        Registra o resumo dos tempos de espera da execução
+        """
+        if not linhas:
+            return
+        log_entry = "TEMPOS DE ESPERA\n"
+        for linha in linhas:
+            log_entry += f"{linha}\n"
+        log_entry += "-" * 30 + "\n\n"
+        self._enfileirar(log_entry, {"tipo": "esperas", "linhas": linhas})
+
     def registrar_erro(self, id_aluno: str, erro: str):
         """
         Registra um erro no processamento
@@ -179,863 +333,2730 @@ class LogManager:
         log_entry += f"ID do Aluno: {id_aluno}\n"
         log_entry += f"Erro: {erro}\n"
         log_entry += "-" * 30 + "\n\n"
-        
-        try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-            print(f"📝 Erro registrado para aluno {id_aluno}")
-        except Exception as e:
-            print(f"❌ Erro ao registrar erro no log: {e}")
 
+        self._enfileirar(log_entry, {"tipo": "erro", "id": str(id_aluno), "erro": erro})
+        print(f"📝 Erro registrado para aluno {id_aluno}")
 
-class StopRequested(Exception):
-    pass
+
+def _fmt_data(valor) -> str:
+    return valor.strftime('%d/%m/%Y') if hasattr(valor, 'strftime') else (str(valor) if valor else '')
 
 
-def processar_atestados(user, password, status_cb=None, resume_event=None, stop_event=None, excel_path='atestados.xlsx', config=None, process_fic=False):
+def periodo_ja_lancado(linhas: list, inicio: str, fim: str, razao: str) -> bool:
     """
-    Executa toda a automação. 
-    - status_cb: função para receber mensagens de status (str)
-    - resume_event: Event controlado pela UI. Quando limpo (clear), a automação pausa. Quando setado, continua.
-    - stop_event: Event para parada total e imediata assim que possível.
-    - excel_path: caminho do arquivo da planilha (mantido externo ao programa).
+    True se alguma linha (texto de uma linha de tabela) já traz a mesma razão com o mesmo período
     """
-    def notify(msg: str):
-        print(msg)
-        if status_cb:
-            try:
-                status_cb(msg)
-            except Exception:
-                pass
+    razao_min = razao.lower()
+    for linha in linhas:
+        if inicio in linha and fim in linha and razao_min in linha.lower():
+            return True
+    return False
 
-    if resume_event is None:
-        resume_event = threading.Event()
-        resume_event.set()
-    if stop_event is None:
-        stop_event = threading.Event()
 
-    def check_abort():
-        if stop_event.is_set():
-            raise StopRequested("Parado pelo usuário")
+DATA_NA_GRADE = re.compile(r'\b\d{2}/\d{2}/\d{4}\b')
 
-    def wait_if_paused():
-        # Bloqueia aqui quando em pausa, mas sai se stop for solicitado
-        while not resume_event.is_set():
-            if stop_event.is_set():
-                raise StopRequested("Parado pelo usuário")
-            sleep(0.2)
 
-    log_manager = LogManager()
-    year = (config.get("search_year") if config else "")
-    found_count = 0
-    processed_count = 0
-    not_found_count = 0
+def datas_da_aula(texto: str):
+    """
+    (primeira, última) data da linha da aula na grade de matrícula, ou None se a linha não traz pelo menos duas datas
+    """
+    datas = []
+    for achado in DATA_NA_GRADE.findall(texto):
+        try:
+            datas.append(datetime.datetime.strptime(achado, '%d/%m/%Y'))
+        except ValueError:
+            continue
+    if len(datas) < 2:
+        return None
+    return min(datas), max(datas)
 
-    # Carregar planilha (externa ao programa)
-    try:
-        excel = load_workbook(excel_path)
-    except FileNotFoundError:
-        notify(f"Planilha não encontrada: {excel_path}. Deixe 'atestados.xlsx' na mesma pasta do programa.")
-        raise
-    lista_atestados = excel['Plan1']
 
-    driver = webdriver.Chrome()
+def periodo_fora_da_aula(datas_aula, inicio: str, fim: str) -> bool:
+    """
+    True se o período (dd/mm/aaaa) termina antes da aula começar ou começa depois dela acabar
+    """
+    if not datas_aula:
+        return False
     try:
-        notify("Abrindo página de login...")
-        driver.get('https://senaconline-interno.sp.senac.br/psp/cs90pss/?cmd=login&languageCd=POR')
-
-        # Helpers locais com referência ao driver atual
-        def colocar_assim_aparecer(tipo, nome, conteudo, timeout=15):
-            try:
-                elemento = WebDriverWait(driver, timeout).until(
-                    EC.presence_of_element_located((tipo, nome))
-                )
-                driver.execute_script("document.activeElement.blur();")
-                elemento.clear()
-                elemento.send_keys(str(conteudo))
-                print("✅ Conteúdo inserido com sucesso.")
-            except Exception:
-                pass
+        inicio_dt = datetime.datetime.strptime(inicio, '%d/%m/%Y')
+        fim_dt = datetime.datetime.strptime(fim, '%d/%m/%Y')
+    except ValueError:
+        return False
+    return fim_dt < datas_aula[0] or inicio_dt > datas_aula[1]
 
-        def clicar_assim_aparecer(tipo, nome, timeout=15):
-            try:
-                elemento = WebDriverWait(driver, timeout).until(
-                    EC.element_to_be_clickable((tipo, nome))
-                )
-                elemento.click()
-                print("✅ Clicou com sucesso.")
-            except Exception:
-                pass
 
-        check_abort()
-        notify("Realizando login...")
-        colocar_assim_aparecer(By.ID, 'userid', user)
-        colocar_assim_aparecer(By.ID, 'pwd', password)
-        clicar_assim_aparecer(By.XPATH, '//*[@id="login"]/div/div[1]/div[8]/input')
-
-        wait_if_paused(); check_abort()
-        notify("Acessando lista de atividades por aluno...")
-        clicar_assim_aparecer(By.XPATH, """//*[@id="pthnavbca_PORTAL_ROOT_OBJECT"]""")
-        clicar_assim_aparecer(By.XPATH, """//*[@id="fldra_HCSR_CURRICULUM_MANAGEMENT"]""")
-        clicar_assim_aparecer(By.XPATH, """//*[@id="fldra_HCSR_ATTENDANCE_ROSTER"]""")
-        clicar_assim_aparecer(By.XPATH, """//*[@id="crefli_HC_STDNT_ATTENDANCE_GBL"]/a""")
-
-        total_alunos = lista_atestados.max_row - 1
-        notify(f"Iniciando processamento de {total_alunos} alunos...")
-
-        # Loop nos IDs da planilha
-        for row in lista_atestados.iter_rows(min_row=2, max_row=lista_atestados.max_row, min_col=1, max_col=lista_atestados.max_column):
-            wait_if_paused(); check_abort()
-            current_id = row[1].value
-            current_inicio = row[2].value
-            current_fim = row[3].value
-
-            # Se o ID for None ou vazio, significa que chegou ao fim das linhas preenchidas
-            if current_id is None or str(current_id).strip() == '':
-                notify("Fim das linhas preenchidas alcançado.")
-                break
+class DiarioExecucao:
+    RESULTADOS_FINAIS = {"Lançamento realizado", "Pulada", "Já lançado"}
 
-            notify(f"Processando aluno {current_id}...")
-            # Lista para armazenar as aulas processadas para este aluno
-            aulas_processadas = []
-            status_processamento = "SUCESSO"
-            observacoes = ""
+    def __init__(self, caminho: str = "diario_atestados.jsonl"):
+        """
+        Diário persistente (JSONL, ao lado da pasta log) com o resultado de cada aula e de cada aluno.
+        Uma nova execução pula o que já terminou e retoma na primeira unidade pendente.
+        """
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._alunos = {}
+        self._aulas = {}
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        self._aplicar(json.loads(linha))
+                    except ValueError:
+                        # Última linha truncada por uma queda no meio da gravação
+                        continue
+        except FileNotFoundError:
+            pass
 
+    @staticmethod
+    def chave(id_aluno, inicio, fim, ano="", razao="", codigo="") -> str:
+        # Razão (e código do Amparo Legal) fazem parte da chave: trocar em Config lança de novo, em vez de pular
+        if razao != "Amparo Legal":
+            codigo = ""
+        return f"{str(id_aluno).strip()}|{_fmt_data(inicio)}|{_fmt_data(fim)}|{ano or ''}|{razao or ''}|{codigo or ''}"
+
+    def _aplicar(self, registro: dict):
+        if registro.get("tipo") == "aula":
+            if registro.get("resultado") in self.RESULTADOS_FINAIS:
+                self._aulas.setdefault(registro["chave"], set()).add(registro["aula"])
+        elif registro.get("tipo") == "aluno":
+            self._alunos[registro["chave"]] = registro.get("resultado")
+
+    def _gravar(self, registro: dict):
+        registro["ts"] = datetime.datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._aplicar(registro)
             try:
-                driver.switch_to.default_content()
-                WebDriverWait(driver, 20).until(EC.frame_to_be_available_and_switch_to_it((By.ID, "ptifrmtgtframe")))
+                with open(self.caminho, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                print(f"❌ Erro ao gravar diário: {e}")
 
-                # colocando id
-                colocar_assim_aparecer(By.XPATH, """//*[@id="OR_ATND_SRCH_EMPLID"]""", current_id)
-                # clicando em pesquisar
-                clicar_assim_aparecer(By.XPATH, """//*[@id="#ICSearch"]""")
+    def aluno_concluido(self, chave: str) -> bool:
+        with self._lock:
+            return self._alunos.get(chave) == "concluido"
 
-                driver.switch_to.default_content()
-                WebDriverWait(driver, 20).until(EC.frame_to_be_available_and_switch_to_it((By.ID, "ptifrmtgtframe")))
+    def resultado_aluno(self, chave: str):
+        with self._lock:
+            return self._alunos.get(chave)
 
-                # Tabela de resultados
-                tabela = WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.ID, "PTSRCHRESULTS"))
-                )
+    def aulas_concluidas(self, chave: str) -> set:
+        with self._lock:
+            return set(self._aulas.get(chave, ()))
 
-                linhas = driver.find_elements(By.XPATH, '//*[@id="PTSRCHRESULTS"]/tbody/tr')
+    def registrar_aula(self, chave: str, aula: str, resultado: str, detalhe: str = ""):
+        """
+        resultado: "Lançamento realizado", "Já lançado", "Pulada", "Pulada (cache)" ou "Erro"
+        """
+        self._gravar({"tipo": "aula", "chave": chave, "aula": aula, "resultado": resultado, "detalhe": detalhe})
 
-                encontrou = False
-                for linha in linhas:
-                    texto = linha.text.upper()
-                    if year and year in texto and "EMÉDIO" in texto:
-                        link = linha.find_element(By.XPATH, ".//a")
-                        link.click()
-                        encontrou = True
-                        found_count += 1
-                        break
+    def registrar_aluno(self, chave: str, resultado: str):
+        """
+        resultado: "concluido", "parcial", "nao_encontrado" ou "erro"
+        """
+        self._gravar({"tipo": "aluno", "chave": chave, "resultado": resultado})
 
-                if not encontrou:
-                    status_processamento = "ERRO"
-                    msg = f"Aluno não encontrado ou sem EMÉDIO {year}" if year else "Aluno não encontrado ou sem EMÉDIO"
-                    observacoes = msg
-                    log_manager.registrar_lancamento(current_id, aulas_processadas, status_processamento, observacoes)
-                    notify(f"Aluno {current_id}: {msg}")
-                    not_found_count += 1
-                    continue
+    def limpar(self):
+        with self._lock:
+            self._alunos.clear()
+            self._aulas.clear()
+            try:
+                os.remove(self.caminho)
+            except FileNotFoundError:
+                pass
 
-                driver.switch_to.default_content()
-                WebDriverWait(driver, 20).until(EC.frame_to_be_available_and_switch_to_it((By.ID, "ptifrmtgtframe")))
 
-                # Pega a tabela de aulas
-                tabela = WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.XPATH, '//*[@id="STDNT_ENRL$scroll$0"]'))
-                )
+class CacheClassificacao:
+    # Só o FIC é da aula; Matric/sem Matric é a situação de cada aluno nela e não vale para os outros
+    MATRIC_FIC = "Matric + FIC"
+    SEM_FIC = "sem FIC"
+    # Classificações que dispensam abrir a aula
+    PULADAS = {MATRIC_FIC}
+    # Resultado no diário de uma aula pulada pelo cache: não é final, a próxima execução confere de novo
+    RESULTADO = "Pulada (cache)"
+
+    def __init__(self, caminho: str, validade_dias: float = 30):
+        """
+        Se cada aula é FIC (bloco ACE_DERIVED_AA2_), por número e ano, guardado entre execuções (JSON
+        ao lado do settings.json). Entradas mais velhas que validade_dias são descartadas; 0 desliga o cache.
+        """
+        self.caminho = caminho
+        self.validade = datetime.timedelta(days=validade_dias)
+        self.ativo = validade_dias > 0
+        self._lock = threading.Lock()
+        self._aulas = {}
+        if not self.ativo:
+            return
+        limite = (datetime.datetime.now() - self.validade).isoformat(timespec="seconds")
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                self._aulas = {k: v for k, v in json.load(f).items() if v.get("visto_em", "") >= limite}
+        except (OSError, ValueError, AttributeError):
+            self._aulas = {}
+
+    @staticmethod
+    def chave(numero: str, ano: str = "") -> str:
+        return f"{ano or ''}|{numero}"
+
+    @classmethod
+    def classificar(cls, texto_aula: str) -> str:
+        return cls.MATRIC_FIC if "FIC" in texto_aula else cls.SEM_FIC
+
+    def consultar(self, numero: str, ano: str = ""):
+        if not self.ativo:
+            return None
+        with self._lock:
+            entrada = self._aulas.get(self.chave(numero, ano))
+        return entrada["classificacao"] if entrada else None
+
+    def registrar(self, numero: str, ano: str, classificacao: str):
+        if not self.ativo:
+            return
+        with self._lock:
+            anterior = self._aulas.get(self.chave(numero, ano))
+            # A validade conta da primeira vez que a classificação foi vista: depois dela a aula é aberta de novo
+            if anterior and anterior["classificacao"] == classificacao:
+                return
+            self._aulas[self.chave(numero, ano)] = {
+                "classificacao": classificacao, "visto_em": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            temporario = self.caminho + ".tmp"
+            try:
+                with open(temporario, "w", encoding="utf-8") as f:
+                    json.dump(self._aulas, f, ensure_ascii=False)
+                os.replace(temporario, self.caminho)
+            except OSError as e:
+                print(f"❌ Erro ao gravar cache de aulas: {e}")
 
-                linhas = tabela.find_elements(By.TAG_NAME, "tr")
 
-                primeira_coluna_elementos = []
+class CacheAlunos:
+    def __init__(self, caminho: str, validade_nao_encontrado_dias: float = 7):
+        """
+        SQLite ao lado do settings.json: para cada aluno e ano, a linha da pesquisa (posição e texto) que levou
+        à matrícula EMÉDIO, ou a marca de "não encontrado". A marca negativa vale validade_nao_encontrado_dias
+        (0 desliga); a positiva não expira, porque é conferida contra a pesquisa antes de ser usada.
+        """
+        self.validade_negativa = datetime.timedelta(days=validade_nao_encontrado_dias)
+        self._lock = threading.Lock()
+        self._conexao = None
+        try:
+            self._conexao = sqlite3.connect(caminho, timeout=10, check_same_thread=False)
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS alunos (id_aluno TEXT NOT NULL, ano TEXT NOT NULL, encontrado INTEGER NOT NULL,"
+                " indice INTEGER, texto TEXT, visto_em TEXT NOT NULL, PRIMARY KEY (id_aluno, ano))"
+            )
+            self._conexao.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache de alunos indisponível: {e}")
+            self._conexao = None
+
+    def consultar(self, id_aluno: str, ano: str = ""):
+        """
+        {"encontrado": bool, "indice": int, "texto": str} ou None (desconhecido ou marca negativa vencida)
+        """
+        if self._conexao is None:
+            return None
+        with self._lock:
+            try:
+                linha = self._conexao.execute(
+                    "SELECT encontrado, indice, texto, visto_em FROM alunos WHERE id_aluno = ? AND ano = ?",
+                    (str(id_aluno), ano or ""),
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if linha is None:
+            return None
+        encontrado, indice, texto, visto_em = linha
+        if not encontrado:
+            limite = (datetime.datetime.now() - self.validade_negativa).isoformat(timespec="seconds")
+            if visto_em < limite:
+                return None
+        return {"encontrado": bool(encontrado), "indice": indice, "texto": texto or ""}
+
+    def _gravar(self, id_aluno: str, ano: str, encontrado: bool, indice=None, texto=None):
+        if self._conexao is None:
+            return
+        with self._lock:
+            try:
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO alunos (id_aluno, ano, encontrado, indice, texto, visto_em) VALUES (?, ?, ?, ?, ?, ?)",
+                    (str(id_aluno), ano or "", int(encontrado), indice, texto,
+                     datetime.datetime.now().isoformat(timespec="seconds")),
+                )
+                self._conexao.commit()
+            except sqlite3.Error as e:
+                print(f"❌ Erro ao gravar cache de alunos: {e}")
 
-                for linha in linhas:
-                    colunas = linha.find_elements(By.TAG_NAME, "td")
-                    if colunas:
-                        primeira_coluna_elementos.append(colunas[0])
+    def registrar_encontrado(self, id_aluno: str, ano: str, linha: dict):
+        self._gravar(id_aluno, ano, True, linha["indice"], linha["texto"].strip())
 
-                elementos_aulas = []
+    def registrar_nao_encontrado(self, id_aluno: str, ano: str):
+        self._gravar(id_aluno, ano, False)
 
-                for elemento in primeira_coluna_elementos:
-                    texto = elemento.text.strip()
-                    if re.fullmatch(r'\d+', texto):
-                        if len(texto) > 4 and not process_fic:
-                            print(f"⚠️ Pulando aula {texto} - mais de 4 dígitos")
-                            aulas_processadas.append(f"Aula {texto} - Pulada (mais de 4 dígitos)")
-                        else:
-                            elementos_aulas.append(elemento)
+    def fechar(self):
+        with self._lock:
+            if self._conexao is not None:
+                self._conexao.close()
+                self._conexao = None
 
-                notify(f"Encontradas {len(elementos_aulas)} aulas válidas para o aluno {current_id}.")
 
-                # Agora vamos clicar um a um nos elementos de aula
-                for i in range(len(elementos_aulas)):
-                    wait_if_paused(); check_abort()
-                    # Retorna para o contexto padrão
-                    driver.switch_to.default_content()
-                    WebDriverWait(driver, 20).until(
-                        EC.frame_to_be_available_and_switch_to_it((By.ID, "ptifrmtgtframe"))
+class FilaCompartilhada:
+    """
+    Fila de alunos num SQLite compartilhado (pasta de rede), para várias máquinas ou processos esvaziarem
+    a mesma planilha sem repetir alunos. Cada aluno reivindicado ganha um lease de `lease_s` segundos,
+    renovado por um heartbeat enquanto o processo vive; lease vencido (processo morto) volta a ser
+    reivindicável por outro. Tem get_nowait/qsize/empty como a Queue local.
+    Cada aluno termina com o resultado do diário (concluido, parcial, nao_encontrado ou erro); só "concluido"
+    é definitivo: os demais voltam para a fila quando uma nova execução entra no lote.
+    """
+    FINAIS = ("concluido", "parcial", "nao_encontrado", "erro")
+
+    def __init__(self, caminho: str, lote: str, lease_s: float = 120, ao_retomar=None):
+        self.lote = lote
+        self.lease_s = lease_s
+        self.dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.ao_retomar = ao_retomar
+        # Quem fica sem aluno livre confere a fila de novo nesse intervalo (leases vencidos, fim do lote)
+        self.intervalo_espera = min(2.0, lease_s / 4)
+        self._periodos = {}
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._heartbeat = None
+        # isolation_level=None: as transações são abertas à mão com BEGIN IMMEDIATE
+        self._conexao = sqlite3.connect(caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conexao.execute(
+            "CREATE TABLE IF NOT EXISTS fila (lote TEXT NOT NULL, id_aluno TEXT NOT NULL, ordem INTEGER NOT NULL,"
+            " estado TEXT NOT NULL DEFAULT 'pendente', dono TEXT, lease_ate REAL, tentativas INTEGER NOT NULL DEFAULT 0,"
+            " atualizado_em TEXT, PRIMARY KEY (lote, id_aluno))"
+        )
+
+    @staticmethod
+    def lote_da_planilha(visitas, ano: str = "", razao: str = "", codigo: str = "") -> str:
+        # Mesma planilha (alunos, períodos, ano, razão e código do Amparo Legal) em qualquer máquina = mesmo lote
+        if razao != "Amparo Legal":
+            codigo = ""
+        conteudo = json.dumps([[i, [[_fmt_data(a), _fmt_data(b)] for a, b in p]] for i, p in visitas] + [ano or "", razao or "", codigo or ""])
+        return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()[:12]
+
+    def _executar(self, sql: str, parametros=()):
+        with self._lock:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    def popular(self, visitas):
+        """
+        Inclui os alunos da planilha no lote (quem chegou primeiro cria; os demais só se juntam).
+        Alunos que terminaram sem "concluido" em execuções anteriores voltam a ficar pendentes.
+        """
+        self._periodos = {current_id: periodos for current_id, periodos in visitas}
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                self._conexao.executemany(
+                    "INSERT OR IGNORE INTO fila (lote, id_aluno, ordem) VALUES (?, ?, ?)",
+                    [(self.lote, current_id, ordem) for ordem, (current_id, _) in enumerate(visitas)],
+                )
+                self._conexao.execute(
+                    "UPDATE fila SET estado = 'pendente', dono = NULL, lease_ate = NULL"
+                    " WHERE lote = ? AND estado IN ('parcial', 'nao_encontrado', 'erro')",
+                    (self.lote,),
+                )
+                self._conexao.execute("COMMIT")
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+
+    def get_nowait(self):
+        agora = time()
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                linha = self._conexao.execute(
+                    "SELECT id_aluno, estado, dono FROM fila WHERE lote = ? AND"
+                    " (estado = 'pendente' OR (estado = 'em_andamento' AND lease_ate < ?)) ORDER BY ordem LIMIT 1",
+                    (self.lote, agora),
+                ).fetchone()
+                if linha is not None:
+                    self._conexao.execute(
+                        "UPDATE fila SET estado = 'em_andamento', dono = ?, lease_ate = ?, tentativas = tentativas + 1,"
+                        " atualizado_em = ? WHERE lote = ? AND id_aluno = ?",
+                        (self.dono, agora + self.lease_s, datetime.datetime.now().isoformat(timespec="seconds"), self.lote, linha[0]),
                     )
+                self._conexao.execute("COMMIT")
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+        if linha is None:
+            raise Empty
+        id_aluno, estado, dono_anterior = linha
+        if estado == "em_andamento" and self.ao_retomar:
+            self.ao_retomar(id_aluno, dono_anterior)
+        return id_aluno, self._periodos[id_aluno]
+
+    def qsize(self) -> int:
+        return self._executar(
+            "SELECT COUNT(*) FROM fila WHERE lote = ? AND (estado = 'pendente' OR (estado = 'em_andamento' AND lease_ate < ?))",
+            (self.lote, time()),
+        )[0][0]
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def com_outros(self) -> int:
+        """
+        Alunos ainda em andamento em outras máquinas (podem voltar para a fila se o lease delas vencer)
+        """
+        return self._executar(
+            "SELECT COUNT(*) FROM fila WHERE lote = ? AND estado = 'em_andamento' AND dono != ?", (self.lote, self.dono),
+        )[0][0]
+
+    def concluir(self, id_aluno: str, resultado: str = "concluido", forcar: bool = False):
+        # Sem forcar, só quem ainda tem o lease grava o resultado
+        if resultado not in self.FINAIS:
+            raise ValueError(f"Resultado inválido na fila compartilhada: {resultado}")
+        self._executar(
+            "UPDATE fila SET estado = ?, dono = ?, lease_ate = NULL, atualizado_em = ?"
+            " WHERE lote = ? AND id_aluno = ? AND (dono = ? OR ?)",
+            (resultado, self.dono, datetime.datetime.now().isoformat(timespec="seconds"), self.lote, id_aluno, self.dono, int(forcar)),
+        )
+
+    def liberar(self, id_aluno: str):
+        # Parada ou falha da sessão: devolve o aluno na hora, sem esperar o lease vencer
+        self._executar(
+            "UPDATE fila SET estado = 'pendente', dono = NULL, lease_ate = NULL WHERE lote = ? AND id_aluno = ? AND dono = ?",
+            (self.lote, id_aluno, self.dono),
+        )
+
+    def pendentes(self) -> list:
+        """
+        Alunos do lote que ainda podem ser reivindicados (pendentes ou com lease vencido)
+        """
+        return [l[0] for l in self._executar(
+            "SELECT id_aluno FROM fila WHERE lote = ? AND (estado = 'pendente' OR (estado = 'em_andamento' AND lease_ate < ?))"
+            " ORDER BY ordem",
+            (self.lote, time()),
+        )]
 
-                    # Localiza novamente a tabela e os elementos
-                    tabela = WebDriverWait(driver, 20).until(
-                        EC.presence_of_element_located((By.XPATH, '//*[@id="STDNT_ENRL$scroll$0"]'))
+    def finalizados_por_outros(self) -> list:
+        """
+        [(id_aluno, resultado)] dos alunos que outras máquinas terminaram neste lote
+        """
+        return self._executar(
+            "SELECT id_aluno, estado FROM fila WHERE lote = ? AND estado IN (?, ?, ?, ?) AND dono != ? ORDER BY ordem",
+            (self.lote, *self.FINAIS, self.dono),
+        )
+
+    def iniciar_heartbeat(self):
+        def renovar():
+            while not self._parar.wait(self.lease_s / 3):
+                try:
+                    self._executar(
+                        "UPDATE fila SET lease_ate = ? WHERE lote = ? AND dono = ? AND estado = 'em_andamento'",
+                        (time() + self.lease_s, self.lote, self.dono),
                     )
-                    linhas = tabela.find_elements(By.TAG_NAME, "tr")
+                except sqlite3.Error as e:
+                    print(f"⚠️ Heartbeat da fila compartilhada falhou: {e}")
+        self._heartbeat = threading.Thread(target=renovar, daemon=True)
+        self._heartbeat.start()
 
-                    primeira_coluna_elementos = []
-                    for linha in linhas:
-                        colunas = linha.find_elements(By.TAG_NAME, "td")
-                        if colunas:
-                            primeira_coluna_elementos.append(colunas[0])
+    def fechar(self):
+        self._parar.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join(timeout=5)
+        with self._lock:
+            self._conexao.close()
 
-                    # Filtra os elementos válidos (apenas números de até 4 dígitos)
-                    elementos_aulas_validos = []
-                    for elem in primeira_coluna_elementos:
-                        texto = elem.text.strip()
-                        if re.fullmatch(r'\d+', texto) and (len(texto) <= 4 or process_fic):
-                            elementos_aulas_validos.append(elem)
 
-                    # Agora pega o elemento atual baseado no índice do loop
-                    elemento = elementos_aulas_validos[i]
-                    numero_aula = elemento.text.strip()
+class StopRequested(Exception):
+    pass
 
-                    try:
-                        link = elemento.find_element(By.TAG_NAME, "a")
-                        driver.execute_script("arguments[0].scrollIntoView();", link)
-                        link.click()
 
-                        print(f"✅ Clicou no link do número da aula {i+1}: {numero_aula}")
-                        sleep(2)  # Aguarda um pouco após o clique
+class FalhaInteracao(Exception):
+    """
+    Uma ação na página (preencher, clicar) não teve efeito mesmo depois das novas tentativas
+    """
+    pass
 
-                    except Exception as e:
-                        print(f"❌ Erro ao clicar no link do elemento {i+1}: {e}")
-                        continue
-                        print(f"❌ Erro ao clicar no link do elemento {i+1}: {e}")
-                        continue
 
-                    # Aqui dentro da página aberta, verifica se o texto "Matric" está presente
-                    try:
-                        tabela_verificacao = WebDriverWait(driver, 20).until(
-                            EC.presence_of_element_located((By.XPATH, '//*[@id="ACE_DERIVED_AA2_"]'))
-                        )
-                        # printar a informação que apararece em tabela_verificacao
-                        print(tabela_verificacao.text)
+class SessaoExpirada(Exception):
+    """
+    O PeopleSoft devolveu a página de login no meio da execução (timeout da sessão).
+    aluno_finalizado=True quando o aluno já tinha terminado e só a volta para a pesquisa falhou.
+    """
+    def __init__(self, mensagem: str = "Sessão do PeopleSoft expirada", aluno_finalizado: bool = False):
+        super().__init__(mensagem)
+        self.aluno_finalizado = aluno_finalizado
 
-                        if "Matric" in tabela_verificacao.text:
-                            # Verificar se também contém "FIC" - se sim, pular
-                            if "FIC" in tabela_verificacao.text:
-                                print("⚠️ O texto 'Matric' foi encontrado, mas também contém 'FIC'. Pulando esta aula.")
-                                clicar_assim_aparecer(By.XPATH, '//*[@id="DERIVED_AA2_DERIVED_LINK10$0"]')
-                                # Adicionar aula que foi pulada à lista
-                                aulas_processadas.append(f"Aula {numero_aula} - Pulada (Matric + FIC)")
-                                sleep(2)
-                                continue
 
-                            print("✅ O texto 'Matric' foi encontrado na tabela (sem FIC).")
-                            clicar_assim_aparecer(By.XPATH, '//*[@id="ICTAB_1"]')
-
-                            # Inserir as datas e informações
-                            colocar_assim_aparecer(By.XPATH, '//*[@id="DIG_APR_EST_WRK_START_DT"]', current_inicio.strftime('%d/%m/%Y'))
-                            colocar_assim_aparecer(By.XPATH, '//*[@id="DIG_APR_EST_WRK_END_DT"]', current_fim.strftime('%d/%m/%Y'))
-
-                            select_element = WebDriverWait(driver, 15).until(
-                                EC.presence_of_element_located((By.XPATH, '//*[@id="DIG_APR_EST_WRK_ATTEND_REASON"]'))
-                            )
-                            selected_reason = (config.get("attend_reason") if config else "Amparo Legal")
-                            for option in select_element.find_elements(By.TAG_NAME, 'option'):
-                                if option.text.strip() == selected_reason:
-                                    option.click()
-                                    print(f"✅ Opção '{selected_reason}' selecionada.")
-                                    break
-                            if selected_reason == "Amparo Legal":
-                                selected_code = (config.get("amparo_code") if config else "0000000001")
-                                colocar_assim_aparecer(By.XPATH, '//*[@id="DIG_APR_EST_WRK_REASON_DESCR"]', selected_code)
-
-                            print("✅ Dados inseridos com sucesso.")
-
-                            # clicar no botao de aplicar
-                            clicar_assim_aparecer(By.XPATH, '//*[@id="DIG_APR_EST_WRK_PROCESS_BTN"]')
-                            # clicar em botao de salvar
-                            clicar_assim_aparecer(By.XPATH, '//*[@id="#ICSave"]')
-                            # clicar no link de voltar para a lista
-                            clicar_assim_aparecer(By.XPATH, '//*[@id="DERIVED_AA2_DERIVED_LINK10$0"]')
+# Selenium é importado só quando a primeira sessão de navegador abre (o import custa segundos na abertura)
+webdriver = By = WebDriverWait = EC = None
+# Cliques que o navegador recusou (elemento coberto ou não interativo): não chegaram à página
+CLIQUES_RECUSADOS = ()
 
-                            # Adicionar aula processada com sucesso à lista
-                            aulas_processadas.append(f"Aula {numero_aula} - Lançamento realizado")
-                            processed_count += 1
-                            sleep(2)
-                            
-                        else:
-                            print("❌ O texto 'Matric' NÃO foi encontrado na tabela.")
-                            clicar_assim_aparecer(By.XPATH, '//*[@id="DERIVED_AA2_DERIVED_LINK10$0"]')
-                            # Adicionar aula que não foi processada à lista
-                            aulas_processadas.append(f"Aula {numero_aula} - Não processada (sem Matric)")
-                            sleep(2)
 
-                    except Exception as e:
-                        print(f"❌ Erro ao buscar a tabela: {e}")
-                        aulas_processadas.append(f"Aula {numero_aula} - Erro: {str(e)}")
+def carregar_selenium():
+    global webdriver, By, WebDriverWait, EC, CLIQUES_RECUSADOS
+    if webdriver is None:
+        from selenium import webdriver as _webdriver
+        from selenium.webdriver.common.by import By as _By
+        from selenium.webdriver.support.ui import WebDriverWait as _WebDriverWait
+        from selenium.webdriver.support import expected_conditions as _EC
+        from selenium.common.exceptions import ElementClickInterceptedException, ElementNotInteractableException
+        webdriver, By, WebDriverWait, EC = _webdriver, _By, _WebDriverWait, _EC
+        CLIQUES_RECUSADOS = (ElementClickInterceptedException, ElementNotInteractableException)
 
-                    # Se necessário, clique para retornar após cada verificação, para não quebrar o próximo loop
-                    try:
-                        voltar = driver.find_element(By.XPATH, '//*[@id="DERIVED_AA2_DERIVED_LINK10$0"]')
-                        voltar.click()
-                        sleep(2)
-                    except Exception as e:
-                        print(f"❌ Erro ao retornar: {e}")
 
-            except StopRequested:
-                notify("Parada solicitada. Encerrando processamento atual...")
-                break
-            except Exception as e:
-                status_processamento = "ERRO"
-                observacoes = f"Erro geral no processamento: {str(e)}"
-                log_manager.registrar_erro(current_id, str(e))
+URL_BASE = 'https://senaconline-interno.sp.senac.br'
+CAMINHO_LOGIN = '/psp/cs90pss/?cmd=login&languageCd=POR'
+URL_LOGIN = URL_BASE + CAMINHO_LOGIN
+# Conteúdo do componente sem o portal em volta (usado pelo motor HTTP); pode ser trocado em settings["url_componente"]
+CAMINHO_COMPONENTE = '/psc/cs90pss/EMPLOYEE/HRMS/c/CURRICULUM_MANAGEMENT.HC_STDNT_ATTENDANCE.GBL'
+RAZOES_AUSENCIA = ["Amparo Legal", "Aproveitamento de Estudos", "Matrícula Fora do Prazo"]
 
-            # Registrar o lançamento no log para este aluno
-            if aulas_processadas:
-                observacoes_final = f"Período: {current_inicio.strftime('%d/%m/%Y')} a {current_fim.strftime('%d/%m/%Y')}"
-                if observacoes:
-                    observacoes_final += f" | {observacoes}"
-                log_manager.registrar_lancamento(current_id, aulas_processadas, status_processamento, observacoes_final)
-            else:
-                log_manager.registrar_lancamento(current_id, [], "SEM_AULAS", "Nenhuma aula foi encontrada para processar")
 
-            check_abort()
-            driver.switch_to.default_content()
-            # Acessando lista de atividades por aluno
-            clicar_assim_aparecer(By.XPATH, """//*[@id=\"pthnavbca_PORTAL_ROOT_OBJECT\"]""")
-            clicar_assim_aparecer(By.XPATH, """//*[@id=\"fldra_HCSR_CURRICULUM_MANAGEMENT\"]""")
-            clicar_assim_aparecer(By.XPATH, """//*[@id=\"fldra_HCSR_ATTENDANCE_ROSTER\"]""")
-            clicar_assim_aparecer(By.XPATH, """//*[@id=\"crefli_HC_STDNT_ATTENDANCE_GBL\"]/a""")
+class RegistroEsperas:
+    def __init__(self):
+        """
+        Acumula quanto tempo cada tipo de espera levou, para ajustar os timeouts com dados reais
+        """
+        self._lock = threading.Lock()
+        self.amostras = {}
+        self.timeouts = {}
+
+    def adicionar(self, nome: str, segundos: float, ok: bool = True):
+        with self._lock:
+            self.amostras.setdefault(nome, []).append(segundos)
+            if not ok:
+                self.timeouts[nome] = self.timeouts.get(nome, 0) + 1
+
+    def resumo(self) -> list:
+        linhas = []
+        with self._lock:
+            for nome in sorted(self.amostras):
+                valores = sorted(self.amostras[nome])
+                n = len(valores)
+                media = sum(valores) / n
+                p95 = valores[min(n - 1, int(n * 0.95))]
+                linhas.append(f"{nome}: {n} esperas | média {media:.2f}s | p95 {p95:.2f}s | máx {valores[-1]:.2f}s | timeouts {self.timeouts.get(nome, 0)}")
+        return linhas
+
+
+class MedicaoEtapas:
+    # Etapas na ordem em que aparecem no relatório
+    ORDEM = ("navegador", "login", "lista_atividades", "pesquisa", "grade", "abrir_aula", "lancar", "salvar", "voltar", "aluno")
+
+    def __init__(self, ao_registrar=None):
+        """
+        Mede cada etapa do processamento (login, #ICSearch, grade, aula, #ICSave...) marcada com aluno e aula.
+        ao_registrar(nome, segundos, ok, aluno, aula) recebe cada medição (ex.: para o .jsonl do log).
+        """
+        self._lock = threading.Lock()
+        self.amostras = []
+        self.ao_registrar = ao_registrar
+        self.inicio = perf_counter()
+
+    def adicionar(self, nome: str, segundos: float, ok: bool = True, aluno=None, aula=None):
+        with self._lock:
+            self.amostras.append((nome, segundos, ok, aluno, aula))
+        if self.ao_registrar is not None:
+            self.ao_registrar(nome, segundos, ok, aluno, aula)
+
+    @contextmanager
+    def etapa(self, nome: str, aluno=None, aula=None):
+        inicio = perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.adicionar(nome, perf_counter() - inicio, ok, aluno, aula)
 
-            notify(f"Aluno {current_id} finalizado.")
+    @staticmethod
+    def _percentil(valores: list, p: float) -> float:
+        return valores[min(len(valores) - 1, int(len(valores) * p))]
 
-        if found_count == 0:
-            if year:
-                notify(f"Nenhuma linha encontrada para EMÉDIO {year}.")
+    def relatorio(self, mais_lentos: int = 10) -> list:
+        """
+        p50/p95/máx por etapa, vazão (alunos/h e aulas/h) e os alunos mais lentos
+        """
+        with self._lock:
+            amostras = list(self.amostras)
+        decorrido = perf_counter() - self.inicio
+        por_etapa = {}
+        for nome, segundos, _, _, _ in amostras:
+            por_etapa.setdefault(nome, []).append(segundos)
+
+        linhas = [f"Duração total: {decorrido:.1f}s", "", "Etapa | n | p50 | p95 | máx | total"]
+        for nome in sorted(por_etapa, key=lambda n: (self.ORDEM.index(n) if n in self.ORDEM else len(self.ORDEM), n)):
+            valores = sorted(por_etapa[nome])
+            linhas.append(
+                f"{nome} | {len(valores)} | {self._percentil(valores, 0.5):.2f}s | {self._percentil(valores, 0.95):.2f}s"
+                f" | {valores[-1]:.2f}s | {sum(valores):.1f}s"
+            )
+
+        alunos = [a for a in amostras if a[0] == "aluno"]
+        aulas = len(por_etapa.get("abrir_aula", []))
+        horas = decorrido / 3600 if decorrido > 0 else 0
+        linhas.append("")
+        if horas:
+            linhas.append(f"Vazão: {len(alunos) / horas:.1f} alunos/h | {aulas / horas:.1f} aulas/h")
+
+        aulas_por_aluno = {}
+        for nome, _, _, aluno, _ in amostras:
+            if nome == "abrir_aula":
+                aulas_por_aluno[aluno] = aulas_por_aluno.get(aluno, 0) + 1
+        if alunos:
+            linhas.append("")
+            linhas.append("Alunos mais lentos:")
+            for _, segundos, ok, aluno, _ in sorted(alunos, key=lambda a: a[1], reverse=True)[:mais_lentos]:
+                falha = "" if ok else " (interrompido)"
+                linhas.append(f"{aluno}: {segundos:.1f}s, {aulas_por_aluno.get(aluno, 0)} aulas abertas{falha}")
+        return linhas
+
+
+class DisjuntorErros:
+    def __init__(self, janela: int = 20, taxa_limite: float = 0.5, minimo: int = 8, pausa: float = 60.0, pausa_max: float = 600.0):
+        """
+        Circuit breaker: se a taxa de erro das últimas `janela` operações (aulas e alunos) chega a `taxa_limite`,
+        segura todos os workers por `pausa` segundos, dobrando a cada nova abertura sem recuperação
+        """
+        self._lock = threading.Lock()
+        self.resultados = deque(maxlen=janela)
+        self.taxa_limite = taxa_limite
+        self.minimo = minimo
+        self.pausa = pausa
+        self.pausa_max = pausa_max
+        self.aberturas = 0
+        self.aberto_ate = 0.0
+
+    def registrar(self, ok: bool) -> float:
+        """
+        Devolve a pausa (s) quando este resultado abriu o disjuntor; 0 caso contrário
+        """
+        with self._lock:
+            self.resultados.append(ok)
+            total = len(self.resultados)
+            erros = total - sum(self.resultados)
+            # Janela cheia e saudável: a próxima abertura volta à pausa inicial
+            if total == self.resultados.maxlen and erros / total < self.taxa_limite / 2:
+                self.aberturas = 0
+            # Só um erro abre o disjuntor
+            if ok or total < self.minimo or erros / total < self.taxa_limite:
+                return 0.0
+            pausa = min(self.pausa * (2 ** self.aberturas), self.pausa_max)
+            self.aberturas += 1
+            self.aberto_ate = perf_counter() + pausa
+            self.resultados.clear()
+            return pausa
+
+    def restante(self) -> float:
+        return max(0.0, self.aberto_ate - perf_counter())
+
+
+class ControleConcorrencia:
+    # Etapas que medem o tempo de resposta do PeopleSoft (#ICSearch, abertura da grade e da aula, #ICSave, volta)
+    ETAPAS = ("pesquisa", "grade", "abrir_aula", "salvar", "voltar")
+
+    def __init__(self, maximo: int, ao_decidir=None, inicial: int = 1, janela: int = 8, intervalo_min: float = 5.0,
+                 taxa_erros: float = 0.1, fator_latencia: float = 2.0, passo_pausa: float = 0.5, pausa_max: float = 5.0):
+        """
+        Controle AIMD das sessões ativas. A cada `janela` aulas (e no mínimo `intervalo_min` segundos) compara a
+        mediana de cada etapa com a melhor já vista e olha a taxa de erros. Janela saudável: +1 sessão (ou
+        menos pausa). Erros acima de `taxa_erros` ou latência acima de `fator_latencia` vezes a referência:
+        metade das sessões; com uma sessão só, erros dobram a pausa entre alunos.
+        ao_decidir(decisao) recebe cada decisão (para o log).
+        """
+        self.maximo = max(1, maximo)
+        self.limite = min(max(1, inicial), self.maximo)
+        self.pausa = 0.0
+        self.ao_decidir = ao_decidir
+        self.janela = janela
+        self.intervalo_min = intervalo_min
+        self.taxa_erros = taxa_erros
+        self.fator_latencia = fator_latencia
+        self.passo_pausa = passo_pausa
+        self.pausa_max = pausa_max
+        self._cond = threading.Condition()
+        self._amostras = {}
+        self._referencia = {}
+        self._ok = 0
+        self._erros = 0
+        self._inicio_janela = perf_counter()
+
+    def observar_etapa(self, nome: str, segundos: float, ok: bool = True, *_):
+        if nome in self.ETAPAS and ok:
+            with self._cond:
+                self._amostras.setdefault(nome, []).append(segundos)
+
+    def registrar(self, ok: bool):
+        decisao = None
+        with self._cond:
+            if ok:
+                self._ok += 1
             else:
-                notify("Nenhuma linha encontrada.")
+                self._erros += 1
+            if self._ok + self._erros >= self.janela and perf_counter() - self._inicio_janela >= self.intervalo_min:
+                decisao = self._decidir()
+                self._cond.notify_all()
+        if decisao is not None and self.ao_decidir is not None:
+            self.ao_decidir(decisao)
+
+    def _latencia_relativa(self) -> float:
+        razoes = []
+        for nome, valores in self._amostras.items():
+            if len(valores) < 2:
+                continue
+            mediana = sorted(valores)[len(valores) // 2]
+            # A referência é a melhor mediana já vista, mas sobe 10% por janela se o servidor ficar mais lento de vez
+            referencia = min(mediana, self._referencia.get(nome, mediana) * 1.1)
+            self._referencia[nome] = referencia
+            if referencia > 0:
+                razoes.append(mediana / referencia)
+        return sorted(razoes)[len(razoes) // 2] if razoes else 1.0
+
+    def _decidir(self) -> dict:
+        total = self._ok + self._erros
+        segundos = perf_counter() - self._inicio_janela
+        taxa = self._erros / total
+        latencia = self._latencia_relativa()
+        aulas_por_min = self._ok / segundos * 60 if segundos else 0.0
+        if taxa > self.taxa_erros and self.limite == 1:
+            self.pausa = min(self.pausa_max, max(self.passo_pausa, self.pausa * 2))
+            acao, motivo = "pausar", f"erros {taxa:.0%} com uma sessão"
+        elif (taxa > self.taxa_erros or latencia > self.fator_latencia) and self.limite > 1:
+            self.limite = max(1, self.limite // 2)
+            acao = "reduzir"
+            motivo = f"erros {taxa:.0%}" if taxa > self.taxa_erros else f"latência {latencia:.1f}x a referência"
+        elif taxa <= self.taxa_erros and latencia <= self.fator_latencia and self.pausa > 0:
+            self.pausa = max(0.0, self.pausa - self.passo_pausa)
+            acao, motivo = "acelerar", "janela saudável"
+        elif taxa <= self.taxa_erros and latencia <= self.fator_latencia and self.limite < self.maximo:
+            self.limite += 1
+            acao, motivo = "aumentar", "janela saudável"
         else:
-            notify("🎉 Processamento concluído! Verifique o arquivo de log na pasta 'log'.")
-        return {"found_count": found_count, "processed_count": processed_count, "not_found_count": not_found_count, "year": year}
+            acao, motivo = "manter", ("no máximo configurado" if self.limite == self.maximo else f"latência {latencia:.1f}x a referência")
+        decisao = {
+            "acao": acao, "motivo": motivo, "sessoes": self.limite, "pausa_s": self.pausa,
+            "taxa_erros": round(taxa, 3), "latencia_relativa": round(latencia, 2),
+            "aulas_por_min": round(aulas_por_min, 1), "janela_aulas": total, "janela_s": round(segundos, 1),
+        }
+        self._amostras = {}
+        self._ok = self._erros = 0
+        self._inicio_janela = perf_counter()
+        return decisao
+
+    def aguardar_vez(self, n: int, esperar, sem_trabalho=None):
+        """
+        Chamado pelo worker `n` antes de pegar o próximo aluno: fica parado enquanto n passa do limite de
+        sessões ativas e depois respeita a pausa. esperar() trata pausa/parada do usuário (pode levantar StopRequested);
+        sem_trabalho() True libera o worker parado para ele encontrar a fila vazia e terminar.
+        """
+        while True:
+            esperar()
+            with self._cond:
+                if n <= self.limite:
+                    pausa = self.pausa
+                    break
+                self._cond.wait(0.5)
+            if sem_trabalho is not None and sem_trabalho():
+                return
+        if pausa:
+            sleep(pausa)
+
+
+class EsperaPeopleSoft:
+    # Página pronta e indicador de processamento do PeopleSoft oculto
+    JS_OCIOSO = """
+        if (document.readyState !== 'complete') return false;
+        var ids = ['processing', 'WAIT_win0'];
+        for (var i = 0; i < ids.length; i++) {
+            var e = document.getElementById(ids[i]);
+            if (e && e.offsetParent !== null && window.getComputedStyle(e).visibility !== 'hidden') return false;
+        }
+        return true;
+    """
 
-    except StopRequested:
-        notify("Execução interrompida pelo usuário.")
-    finally:
+    def __init__(self, driver, registro: RegistroEsperas = None, timeout: float = 20, intervalo: float = 0.1):
+        """
+        Substitui os sleeps fixos: retorna assim que o PeopleSoft termina de processar
+        """
+        self.driver = driver
+        self.registro = registro
+        self.timeout = timeout
+        self.intervalo = intervalo
+
+    def aguardar(self, nome: str, aparecer=None, timeout: float = None) -> bool:
+        """
+        Espera o servidor ficar ocioso e, se informado, o elemento `aparecer` (locator) surgir.
+        Nunca levanta exceção: em caso de timeout apenas registra e devolve False.
+        """
+        def condicao(d):
+            if aparecer is not None and not d.find_elements(*aparecer):
+                return False
+            return d.execute_script(self.JS_OCIOSO)
+
+        inicio = perf_counter()
+        ok = True
         try:
-            driver.quit()
+            WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=self.intervalo).until(condicao)
         except Exception:
-            pass
+            ok = False
+        decorrido = perf_counter() - inicio
+        if self.registro is not None:
+            self.registro.adicionar(nome, decorrido, ok)
+        if not ok:
+            print(f"⏱️ Espera '{nome}' esgotou após {decorrido:.1f}s")
+        return ok
 
 
-class App(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("AutoAtestado - SENAC")
-        self.geometry("720x580")
-        self.resizable(False, False)
+# Imagens, fontes e mídia não são necessárias para a automação
+URLS_BLOQUEADAS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.bmp", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp3", "*.mp4", "*.webm", "*.ogg", "*.wav",
+]
 
-        # Adicionar ícone se existir
-        try:
-            self.iconbitmap("icon.ico")
-        except Exception:
-            pass  # Se não encontrar o ícone, continua sem ele
-
-        # Estado
-        self.worker_thread = None
-        self.resume_event = threading.Event(); self.resume_event.set()
-        self.stop_event = threading.Event()
-        self.is_running = False
-        self.is_paused = False
-        self.pending_restart = False
-        self.status_queue = Queue()
-        self.settings_open = False
-        self.status_order = []
-        self.status_by_id = {}
-        self.planilha_preview = []
-        self.completed_order = []
-        self.active_order = []
-        self.error_order = []
-
-        # Estado
-        self.worker_thread = None
-        self.resume_event = threading.Event(); self.resume_event.set()
-        self.stop_event = threading.Event()
-        self.is_running = False
-        self.is_paused = False
-        self.processo_concluido = False
-        self.processo_erro = None
-
-        # UI
-        padding = {"padx": 8, "pady": 6}
-        frm = ttk.Frame(self)
-        frm.pack(fill=tk.BOTH, expand=True, padx=10, pady=10) 
-        try:
-            for i in range(4):
-                frm.grid_columnconfigure(i, weight=1)
-            frm.grid_columnconfigure(0, weight=0)
-            frm.grid_columnconfigure(1, weight=1)
-            frm.grid_columnconfigure(2, weight=1)
-            frm.grid_columnconfigure(3, weight=1)
-        except Exception:
-            pass
 
-        hdr = ttk.Frame(frm)
-        hdr.grid(row=0, column=0, columnspan=4, sticky="ew")
-        try:
-            hdr.grid_columnconfigure(0, weight=1)
-            hdr.grid_columnconfigure(1, weight=0)
-        except Exception:
-            pass
-        self.settings_btn = ttk.Button(hdr, text="Config", width=8, command=self.open_settings)
-        self.settings_btn.grid(row=0, column=1, sticky="e", padx=4, pady=2)
-
-        ttk.Label(frm, text="Usuário:").grid(row=1, column=0, sticky="w", **padding)
-        self.user_var = tk.StringVar()
-        self.user_entry = ttk.Entry(frm, textvariable=self.user_var, width=28)
-        self.user_entry.grid(row=1, column=1, columnspan=2, sticky="w", **padding)
-
-        ttk.Label(frm, text="Senha:").grid(row=2, column=0, sticky="w", **padding)
-        self.pass_var = tk.StringVar()
-        self.pass_entry = ttk.Entry(frm, textvariable=self.pass_var, width=28, show="*")
-        self.pass_entry.grid(row=2, column=1, columnspan=2, sticky="w", **padding)
-
-        self.remember_var = tk.BooleanVar(value=False)
-        self.remember_cb = ttk.Checkbutton(frm, text="Lembrar credenciais", variable=self.remember_var)
-        self.remember_cb.grid(row=3, column=0, columnspan=4, sticky="w", **padding)
-        self.process_fic_var = tk.BooleanVar(value=False)
-        self.process_fic_cb = ttk.Checkbutton(frm, text="Lançar amparo em aulas FIC", variable=self.process_fic_var)
-        self.process_fic_cb.grid(row=4, column=0, columnspan=4, sticky="w", **padding)
-
-        btns = ttk.Frame(frm)
-        btns.grid(row=5, column=0, columnspan=4, sticky="ew")
+def opcoes_chrome(headless: bool = False, perfil_leve: bool = False, pasta_perfil: str = None):
+    """
+    Opções do Chrome para a automação. O perfil leve desliga imagens, extensões e tráfego
+    de fundo, reduz a janela e usa page_load_strategy "eager". Com pasta_perfil o Chrome guarda
+    cookies entre execuções (a sessão do PeopleSoft pode ser reaproveitada).
+    """
+    carregar_selenium()
+    opcoes = webdriver.ChromeOptions()
+    if pasta_perfil:
+        os.makedirs(pasta_perfil, exist_ok=True)
+        opcoes.add_argument(f"--user-data-dir={os.path.abspath(pasta_perfil)}")
+    if headless:
+        opcoes.add_argument("--headless=new")
+    if perfil_leve:
+        opcoes.add_argument("--window-size=1280,800")
+        opcoes.add_argument("--disable-extensions")
+        opcoes.add_argument("--disable-background-networking")
+        opcoes.add_argument("--disable-component-update")
+        opcoes.add_argument("--disable-default-apps")
+        opcoes.add_argument("--disable-sync")
+        opcoes.add_argument("--no-first-run")
+        opcoes.add_argument("--mute-audio")
+        opcoes.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints")
+        opcoes.add_argument("--blink-settings=imagesEnabled=false")
+        opcoes.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        opcoes.page_load_strategy = "eager"
+    elif headless:
+        opcoes.add_argument("--window-size=1280,800")
+    return opcoes
+
+
+class SessaoSelenium:
+    # Localizadores com os valores de By.ID ("id") e By.XPATH ("xpath"): a classe é definida antes do Selenium ser importado
+    GRADE = ("id", "STDNT_ENRL$scroll$0")
+    DETALHE = ("id", "ACE_DERIVED_AA2_")
+    VOLTAR = ("xpath", '//*[@id="DERIVED_AA2_DERIVED_LINK10$0"]')
+
+    def __init__(self, registro_esperas: RegistroEsperas = None, url_base: str = URL_BASE, headless: bool = False, perfil_leve: bool = False,
+                 pasta_perfil: str = None):
+        """
+        Abre um navegador próprio. Cada worker do pool tem a sua sessão (e a sua pasta de perfil, se houver).
+        """
+        carregar_selenium()
+        self.url_base = url_base.rstrip("/")
+        self.pasta_perfil = pasta_perfil
+        self.driver = webdriver.Chrome(options=opcoes_chrome(headless, perfil_leve, pasta_perfil))
+        if perfil_leve:
+            # Fontes e mídia não têm preferência própria: bloqueia por URL via CDP
+            try:
+                self.driver.execute_cdp_cmd("Network.enable", {})
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": URLS_BLOQUEADAS})
+            except Exception as e:
+                print(f"⚠️ Não foi possível bloquear recursos: {e}")
+        self.espera = EsperaPeopleSoft(self.driver, registro_esperas)
+        # URL do componente HC_STDNT_ATTENDANCE_GBL, descoberta na primeira navegação pelo menu
+        self.url_componente = None
+
+    # Novas tentativas de uma interação: espera 0,5s, 1s, 2s... entre elas, e as seguintes usam timeout menor
+    TENTATIVAS = 3
+    BACKOFF_INICIAL = 0.5
+    TIMEOUT_NOVA_TENTATIVA = 5
+
+    def _intervalo_tentativa(self, tentativa: int, nome: str, erro) -> None:
+        espera = self.BACKOFF_INICIAL * (2 ** tentativa)
+        print(f"🔁 {nome}: tentativa {tentativa + 1} falhou ({erro}). Nova tentativa em {espera:.1f}s")
+        sleep(espera)
+
+    def colocar_assim_aparecer(self, tipo, nome, conteudo, timeout=15, tentativas=None):
+        """
+        Preenche o campo e confere se o valor ficou nele; repete com backoff e levanta FalhaInteracao se não ficar
+        """
+        tentativas = tentativas or self.TENTATIVAS
+        esperado = str(conteudo)
+        erro = None
+        for tentativa in range(tentativas):
+            try:
+                elemento = WebDriverWait(self.driver, timeout if tentativa == 0 else min(timeout, self.TIMEOUT_NOVA_TENTATIVA)).until(
+                    EC.presence_of_element_located((tipo, nome))
+                )
+                self.driver.execute_script("document.activeElement.blur();")
+                elemento.clear()
+                elemento.send_keys(esperado)
+                valor = (elemento.get_attribute("value") or "").strip()
+                if valor == esperado.strip():
+                    print("✅ Conteúdo inserido com sucesso.")
+                    return
+                erro = f"campo ficou com '{valor}'"
+            except Exception as e:
+                erro = type(e).__name__
+            if tentativa + 1 < tentativas:
+                self._intervalo_tentativa(tentativa, nome, erro)
+        raise FalhaInteracao(f"Não foi possível preencher {nome} ({erro})")
+
+    def clicar_assim_aparecer(self, tipo, nome, timeout=15, aparecer=None, sumir=None, repetir=True, tentativas=None, nome_espera=None):
+        """
+        Clica e, se informado, confere o efeito: o locator `aparecer` surge ou o `sumir` some.
+        O clique só é repetido se com certeza não aconteceu (elemento ausente ou clique recusado pelo navegador)
+        ou, com repetir=True, se não teve efeito. Botões que gravam (Aplicar, Salvar) usam repetir=False: esperam
+        o PeopleSoft ficar ocioso antes do clique e, se ele pode ter saído, levantam FalhaInteracao sem repetir.
+        """
+        tentativas = tentativas or self.TENTATIVAS
+        erro = None
+        for tentativa in range(tentativas):
+            try:
+                if not repetir:
+                    self.espera.aguardar(f"antes_{nome_espera or nome}")
+                elemento = WebDriverWait(self.driver, timeout if tentativa == 0 else min(timeout, self.TIMEOUT_NOVA_TENTATIVA)).until(
+                    EC.element_to_be_clickable((tipo, nome))
+                )
+            except Exception as e:
+                erro = type(e).__name__
+                if tentativa + 1 < tentativas:
+                    self._intervalo_tentativa(tentativa, nome, erro)
+                continue
+            try:
+                elemento.click()
+            except CLIQUES_RECUSADOS as e:
+                # Coberto pelo indicador de processamento: espera ele sumir em vez de clicar através dele
+                erro = type(e).__name__
+                self.espera.aguardar(f"ocioso_{nome_espera or nome}")
+                if tentativa + 1 < tentativas:
+                    self._intervalo_tentativa(tentativa, nome, erro)
+                continue
+            except Exception as e:
+                if not repetir:
+                    # Elemento obsoleto depois do refresh, timeout...: o clique pode ter chegado à página
+                    raise FalhaInteracao(f"Clique em {nome} pode ter sido enviado ({type(e).__name__}); não repetido")
+                erro = type(e).__name__
+                if tentativa + 1 < tentativas:
+                    self._intervalo_tentativa(tentativa, nome, erro)
+                continue
+            if self._efeito_confirmado(nome_espera or f"efeito_{nome}", aparecer, sumir, timeout):
+                print("✅ Clicou com sucesso.")
+                return
+            erro = "clique sem efeito"
+            if not repetir:
+                break
+            if tentativa + 1 < tentativas:
+                self._intervalo_tentativa(tentativa, nome, erro)
+        raise FalhaInteracao(f"Não foi possível clicar em {nome} ({erro})")
+
+    def _efeito_confirmado(self, nome_espera, aparecer, sumir, timeout) -> bool:
+        if aparecer is not None:
+            return self.espera.aguardar(nome_espera, aparecer=aparecer, timeout=timeout)
+        if sumir is not None:
+            try:
+                WebDriverWait(self.driver, timeout).until(lambda d: not d.find_elements(*sumir))
+                return True
+            except Exception:
+                return False
+        return True
+
+    def entrar_frame(self, timeout=20):
+        self.driver.switch_to.default_content()
         try:
-            btns.grid_columnconfigure(0, weight=1)
-            btns.grid_columnconfigure(1, weight=1)
-        except Exception:
-            pass
-        self.start_btn = ttk.Button(btns, text="Iniciar", command=self.on_start)
-        self.start_btn.grid(row=0, column=0, sticky="ew", **padding)
-        self.pause_btn = ttk.Button(btns, text="Pausar", command=self.on_pause_resume, state=tk.DISABLED)
-        self.pause_btn.grid(row=0, column=1, sticky="ew", **padding)
-        self.stop_btn = ttk.Button(btns, text="Parar", command=self.on_stop, state=tk.DISABLED)
-        self.stop_btn.grid(row=1, column=0, sticky="ew", **padding)
-        self.restart_btn = ttk.Button(btns, text="Reiniciar", command=self.on_restart)
-        self.restart_btn.grid(row=1, column=1, sticky="ew", **padding)
-
-        ttk.Separator(frm).grid(row=6, column=0, columnspan=4, sticky="ew", pady=(10, 0))
-
-        ttk.Label(frm, text="Status:").grid(row=7, column=0, columnspan=4, sticky="w", **padding)
-        self.status_var = tk.StringVar(value="Pronto.")
-        self.status_lbl = ttk.Label(frm, textvariable=self.status_var, wraplength=400, anchor="w", justify="left")
-        self.status_lbl.grid(row=7, column=0, columnspan=4, sticky="w", **padding)
-        self.progress_text = tk.StringVar(value="Progresso: 0/0")
-        ttk.Label(frm, textvariable=self.progress_text).grid(row=8, column=0, columnspan=4, sticky="w", padx=10)
-        self.progress = ttk.Progressbar(frm, mode="determinate")
-        self.progress.grid(row=9, column=0, columnspan=4, sticky="ew", padx=10)
-        self.status_tree = ttk.Treeview(frm, columns=("id", "periodo", "status"), show="headings", height=10)
-        self.status_tree.heading("id", text="ID")
-        self.status_tree.heading("periodo", text="Período")
-        self.status_tree.heading("status", text="Status")
-        self.status_tree.column("id", width=140, anchor="w")
-        self.status_tree.column("periodo", width=200, anchor="w")
-        self.status_tree.column("status", width=100, anchor="w")
-        self.status_tree.grid(row=10, column=0, columnspan=3, sticky="nsew", padx=10)
-        self.status_scroll = ttk.Scrollbar(frm, orient="vertical", command=self.status_tree.yview)
-        self.status_scroll.grid(row=10, column=3, sticky="ns")
-        self.status_tree.configure(yscrollcommand=self.status_scroll.set)
+            WebDriverWait(self.driver, timeout).until(EC.frame_to_be_available_and_switch_to_it((By.ID, "ptifrmtgtframe")))
+        except Exception as e:
+            # Sem frame e com o campo de senha na tela: a sessão caiu, não adianta esperar de novo
+            if self.driver.find_elements(By.ID, "pwd"):
+                raise SessaoExpirada("Sessão do PeopleSoft expirada (página de login no lugar do portal)") from e
+            raise
+
+    def sessao_expirada(self) -> bool:
+        """
+        True se a página de login apareceu no lugar do portal ou dentro do frame de conteúdo
+        """
         try:
-            self.status_tree.tag_configure("concluído", foreground="#2e7d32")
-            self.status_tree.tag_configure("carregando", foreground="#f9a825")
-            self.status_tree.tag_configure("erro", foreground="#c62828")
-            self.status_tree.tag_configure("aguardando", foreground="#616161")
-            frm.grid_rowconfigure(10, weight=1)
+            self.driver.switch_to.default_content()
+            if self.driver.find_elements(By.ID, "pwd"):
+                return True
+            if "cmd=expire" in (self.driver.current_url or ""):
+                return True
+            frames = self.driver.find_elements(By.ID, "ptifrmtgtframe")
+            if frames:
+                self.driver.switch_to.frame(frames[0])
+                return bool(self.driver.find_elements(By.ID, "pwd"))
         except Exception:
             pass
+        return False
 
-        # Info da planilha (externa)
-        ttk.Label(frm, text="Planilha: 'atestados.xlsx' (mesma pasta do programa)").grid(row=11, column=0, columnspan=4, sticky="w", padx=8)
+    # Extração em uma única chamada execute_script (um round trip por tabela)
+    JS_RESULTADOS_PESQUISA = """
+        var trs = document.querySelectorAll('#PTSRCHRESULTS > tbody > tr');
+        var linhas = [];
+        for (var i = 0; i < trs.length; i++) {
+            var a = trs[i].querySelector('a');
+            linhas.push({indice: i, texto: trs[i].innerText || '', link_id: (a && a.id) ? a.id : '', tem_link: !!a});
+        }
+        return linhas;
+    """
 
-        self.bind('<Return>', lambda e: self.on_start() if (not self.is_running and not self.settings_open) else None)
-        self.protocol("WM_DELETE_WINDOW", self.on_close)
+    JS_GRADE_AULAS = """
+        var t = document.getElementById('STDNT_ENRL$scroll$0');
+        if (!t) return [];
+        var trs = t.getElementsByTagName('tr');
+        var linhas = [];
+        for (var i = 0; i < trs.length; i++) {
+            var tds = trs[i].getElementsByTagName('td');
+            if (!tds.length) continue;
+            var a = tds[0].getElementsByTagName('a')[0];
+            var texto = trs[i].innerText || '';
+            var numero = (tds[0].innerText || '').trim();
+            linhas.push({
+                numero: numero,
+                texto: texto,
+                link_id: (a && a.id) ? a.id : '',
+                fic: numero.length > 4
+            });
+        }
+        return linhas;
+    """
 
-        # Poll da fila de status
-        self.after(200, self._poll_status)
+    def extrair_resultados_pesquisa(self) -> list:
+        """
+        Linhas de PTSRCHRESULTS como dicts: indice, texto, link_id, tem_link
+        """
+        return self.driver.execute_script(self.JS_RESULTADOS_PESQUISA) or []
 
-        # Carregar credenciais salvas, se existirem
-        try:
-            u, p = load_saved_credentials()
-            if u and p:
-                self.user_var.set(u)
-                self.pass_var.set(p)
-                self.remember_var.set(True)
-        except Exception:
-            pass
-        s = load_settings()
-        self.attend_reason = s.get("attend_reason", "Amparo Legal")
-        self.amparo_code = s.get("amparo_code", "0000000001")
-        self.search_year = s.get("search_year", "2025")
+    def extrair_grade_aulas(self) -> list:
+        """
+        Linhas de STDNT_ENRL$scroll$0 como dicts: numero, texto, link_id, fic
+        """
+        return self.driver.execute_script(self.JS_GRADE_AULAS) or []
+
+    def pesquisar_aluno(self, id_aluno, extrair: bool = True) -> list:
+        self.entrar_frame()
+        # colocando id
+        self.colocar_assim_aparecer(By.XPATH, """//*[@id="OR_ATND_SRCH_EMPLID"]""", id_aluno)
+        # clicando em pesquisar
+        self.clicar_assim_aparecer(By.XPATH, """//*[@id="#ICSearch"]""")
+
+        self.entrar_frame()
+        # Tabela de resultados
+        WebDriverWait(self.driver, 15).until(
+            EC.presence_of_element_located((By.ID, "PTSRCHRESULTS"))
+        )
+        return self.extrair_resultados_pesquisa() if extrair else None
+
+    # Confere e clica a linha conhecida numa única chamada
+    JS_ABRIR_RESULTADO_CONHECIDO = """
+        var tr = document.querySelectorAll('#PTSRCHRESULTS > tbody > tr')[arguments[0]];
+        if (!tr || (tr.innerText || '').trim() !== arguments[1]) return false;
+        var a = tr.querySelector('a');
+        if (!a) return false;
+        a.click();
+        return true;
+    """
+
+    def abrir_resultado_conhecido(self, indice: int, texto: str) -> bool:
+        """
+        Abre a linha `indice` da pesquisa sem ler a tabela, se ela ainda tem o texto de antes; senão False
+        """
+        if not self.driver.execute_script(self.JS_ABRIR_RESULTADO_CONHECIDO, indice, texto):
+            return False
+        self.entrar_frame()
+        WebDriverWait(self.driver, 20).until(EC.presence_of_element_located(self.GRADE))
+        return True
+
+    def abrir_resultado(self, linha: dict):
+        if linha.get("link_id"):
+            self.driver.find_element(By.ID, linha["link_id"]).click()
+        else:
+            self.driver.execute_script(
+                "document.querySelectorAll('#PTSRCHRESULTS > tbody > tr')[arguments[0]].querySelector('a').click();",
+                linha["indice"],
+            )
+        self.entrar_frame()
+        # Pega a tabela de aulas (lida uma única vez; os ids dos links não mudam ao voltar)
+        WebDriverWait(self.driver, 20).until(EC.presence_of_element_located(self.GRADE))
+
+    def abrir_aula(self, aula: dict):
+        self.entrar_frame()
+        # Garante que a grade está carregada antes de clicar
+        WebDriverWait(self.driver, 20).until(EC.presence_of_element_located(self.GRADE))
+        if not aula["link_id"]:
+            raise ValueError(f"aula {aula['numero']} sem link")
+        link = self.driver.find_element(By.ID, aula["link_id"])
+        self.driver.execute_script("arguments[0].scrollIntoView();", link)
+        link.click()
+        self.espera.aguardar("abrir_aula", aparecer=self.DETALHE)
+
+    def ler_classificacao(self) -> str:
+        """
+        Texto do bloco ACE_DERIVED_AA2_ da aula aberta (onde aparecem "Matric" e "FIC")
+        """
+        tabela_verificacao = WebDriverWait(self.driver, 20).until(
+            EC.presence_of_element_located(self.DETALHE)
+        )
+        return tabela_verificacao.text
+
+    # Texto de cada linha "folha" (sem tabelas aninhadas) da página da aula
+    JS_LINHAS_PAGINA = """
+        var trs = document.getElementsByTagName('tr');
+        var linhas = [];
+        for (var i = 0; i < trs.length; i++) {
+            if (trs[i].getElementsByTagName('tr').length) continue;
+            linhas.push(trs[i].innerText || '');
+        }
+        return linhas;
+    """
+
+    def ler_linhas_pagina(self) -> list:
+        return self.driver.execute_script(self.JS_LINHAS_PAGINA) or []
+
+    def voltar_grade(self, nome: str = "voltar"):
+        self.clicar_assim_aparecer(*self.VOLTAR, aparecer=self.GRADE, nome_espera=nome)
+
+    def retornar_se_preciso(self):
+        # Se necessário, clique para retornar após cada verificação, para não quebrar o próximo loop
         try:
-            wb = load_workbook('atestados.xlsx')
-            ws = wb['Plan1']
-            for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-                idv = row[1].value
-                ini = row[2].value
-                fim = row[3].value
-                if idv and str(idv).strip() != '':
-                    id_s = str(idv)
-                    self.planilha_preview.append((id_s, ini, fim))
-                    self.status_by_id[id_s] = "aguardando"
-                    self.status_order.append(id_s)
-            total = len(self.planilha_preview)
-            self.progress.configure(mode="determinate", maximum=max(1, total))
-            self.progress['value'] = 0
-            self.progress_text.set(f"Progresso: 0/{total}")
-            self._render_status()
-        except Exception:
-            pass
+            voltar = self.driver.find_element(*self.VOLTAR)
+            voltar.click()
+            self.espera.aguardar("voltar", aparecer=self.GRADE)
+        except Exception as e:
+            print(f"❌ Erro ao retornar: {e}")
+
+    def lancar_periodo(self, inicio: str, fim: str, razao: str, codigo_amparo: str = ""):
+        self.clicar_assim_aparecer(By.XPATH, '//*[@id="ICTAB_1"]', aparecer=(By.ID, "DIG_APR_EST_WRK_START_DT"), nome_espera="aba")
+
+        # Inserir as datas e informações
+        self.colocar_assim_aparecer(By.XPATH, '//*[@id="DIG_APR_EST_WRK_START_DT"]', inicio)
+        self.colocar_assim_aparecer(By.XPATH, '//*[@id="DIG_APR_EST_WRK_END_DT"]', fim)
+
+        select_element = WebDriverWait(self.driver, 15).until(
+            EC.presence_of_element_located((By.XPATH, '//*[@id="DIG_APR_EST_WRK_ATTEND_REASON"]'))
+        )
+        for option in select_element.find_elements(By.TAG_NAME, 'option'):
+            if option.text.strip() == razao:
+                option.click()
+                if not option.is_selected():
+                    raise FalhaInteracao(f"Opção '{razao}' não ficou selecionada")
+                print(f"✅ Opção '{razao}' selecionada.")
+                break
+        else:
+            raise FalhaInteracao(f"Razão '{razao}' não disponível")
+        if razao == "Amparo Legal":
+            self.colocar_assim_aparecer(By.XPATH, '//*[@id="DIG_APR_EST_WRK_REASON_DESCR"]', codigo_amparo)
 
-    def _enqueue_status(self, msg: str):
-        self.status_queue.put(msg)
+        print("✅ Dados inseridos com sucesso.")
 
-    def _poll_status(self):
+        # clicar no botao de aplicar (sem repetir o clique: um segundo Aplicar duplicaria o período)
+        self.clicar_assim_aparecer(By.XPATH, '//*[@id="DIG_APR_EST_WRK_PROCESS_BTN"]', repetir=False)
+        if not self.espera.aguardar("aplicar"):
+            raise FalhaInteracao("Aplicar não terminou de processar")
+
+    def salvar(self):
+        # clicar em botao de salvar
+        self.clicar_assim_aparecer(By.XPATH, '//*[@id="#ICSave"]', repetir=False)
+        if not self.espera.aguardar("salvar"):
+            raise FalhaInteracao("Salvar não terminou de processar")
+
+    def confirmar_lancamento(self, inicio: str, fim: str, razao: str) -> bool:
+        """
+        Depois do Salvar, espera a própria aula listar o período com a razão (periodo_ja_lancado)
+        """
+        comeco = perf_counter()
+        ok = True
         try:
-            while True:
-                msg = self.status_queue.get_nowait()
-                m = re.search(r'Processando aluno\s+(\d+)', msg)
-                if m:
-                    self.status_by_id[m.group(1)] = "carregando"
-                    if m.group(1) not in self.active_order:
-                        self.active_order.append(m.group(1))
-                    if m.group(1) in self.completed_order:
-                        self.completed_order.remove(m.group(1))
-                    if m.group(1) in self.error_order:
-                        self.error_order.remove(m.group(1))
-                    self._render_status()
-                    continue
-                m = re.search(r'Aluno\s+(\d+)\s+finalizado\.', msg)
-                if m:
-                    self.status_by_id[m.group(1)] = "concluído"
-                    if m.group(1) in self.active_order:
-                        self.active_order.remove(m.group(1))
-                    if m.group(1) not in self.completed_order:
-                        self.completed_order.append(m.group(1))
-                    self._render_status()
-                    continue
-                m = re.search(r'Aluno\s+(\d+):', msg)
-                if m:
-                    self.status_by_id[m.group(1)] = "erro"
-                    if m.group(1) in self.active_order:
-                        self.active_order.remove(m.group(1))
-                    if m.group(1) not in self.error_order:
-                        self.error_order.append(m.group(1))
-                    self._render_status()
-                    continue
-                self.status_var.set(msg)
+            WebDriverWait(self.driver, self.espera.timeout, poll_frequency=self.espera.intervalo).until(
+                lambda d: d.execute_script(EsperaPeopleSoft.JS_OCIOSO) and periodo_ja_lancado(self.ler_linhas_pagina(), inicio, fim, razao)
+            )
         except Exception:
-            pass
-        # Se houver reinício pendente e não estiver rodando, reinicia
-        if self.pending_restart and not self.is_running:
-            self.pending_restart = False
-            self.on_start()
-        self.after(200, self._poll_status)
-
-    def _render_status(self):
-        lines = []
-        def fmt(idv, ini, fim):
-            st = self.status_by_id.get(idv, "aguardando")
-            d1 = ini.strftime('%d/%m/%Y') if hasattr(ini, 'strftime') else (ini if ini else '')
-            d2 = fim.strftime('%d/%m/%Y') if hasattr(fim, 'strftime') else (fim if fim else '')
-            return f"{idv} - {d1} a {d2} [{st}]"
-
-        preview_map = {idv: (ini, fim) for idv, ini, fim in self.planilha_preview}
-
-        for idv in self.completed_order:
-            if idv in preview_map:
-                ini, fim = preview_map[idv]
-                lines.append(fmt(idv, ini, fim))
-        for idv in self.error_order:
-            if idv in preview_map and idv not in self.completed_order:
-                ini, fim = preview_map[idv]
-                lines.append(fmt(idv, ini, fim))
-        for idv, ini, fim in self.planilha_preview:
-            if idv not in self.completed_order and idv not in self.error_order and idv not in self.active_order:
-                lines.append(fmt(idv, ini, fim))
-        for idv in self.active_order:
-            if idv in preview_map:
-                ini, fim = preview_map[idv]
-                lines.append(fmt(idv, ini, fim))
+            ok = False
+        if self.espera.registro is not None:
+            self.espera.registro.adicionar("confirmar_salvar", perf_counter() - comeco, ok)
+        return ok
+
+    def abrir_login(self):
+        self.driver.get(self.url_base + CAMINHO_LOGIN)
+
+    def login(self, user, password):
+        # O navegador pré-aberto já deixa a página de login carregada
+        if "cmd=login" not in (self.driver.current_url or "") or not self.driver.find_elements(By.ID, 'pwd'):
+            self.abrir_login()
+        self.colocar_assim_aparecer(By.ID, 'userid', user)
+        self.colocar_assim_aparecer(By.ID, 'pwd', password)
+        try:
+            # Login aceito: o campo de senha some
+            self.clicar_assim_aparecer(By.XPATH, '//*[@id="login"]/div/div[1]/div[8]/input', sumir=(By.ID, 'pwd'), repetir=False)
+        except FalhaInteracao as e:
+            raise FalhaInteracao(f"Falha no login (usuário ou senha inválidos?): {e}")
+
+    def retomar_sessao(self, url_componente: str) -> bool:
+        """
+        Abre o componente direto com os cookies do perfil persistente. True se a sessão do PeopleSoft
+        ainda vale (a pesquisa aparece); False se caiu na página de login.
+        """
+        try:
+            self.driver.switch_to.default_content()
+            self.driver.get(url_componente)
+            WebDriverWait(self.driver, 10).until(
+                lambda d: d.find_elements(By.ID, "pwd") or d.find_elements(By.ID, "ptifrmtgtframe")
+            )
+            if self.driver.find_elements(By.ID, "pwd"):
+                return False
+            self.entrar_frame(timeout=10)
+            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.ID, "OR_ATND_SRCH_EMPLID")))
+        except Exception as e:
+            print(f"⚠️ Sessão salva no perfil não pôde ser reaproveitada: {e}")
+            return False
+        self.url_componente = url_componente
+        return True
+
+    def abrir_lista_atividades(self):
+        """
+        Vai para a pesquisa de atividades por aluno. Usa a URL direta do componente quando
+        já conhecida e só recorre aos quatro cliques do menu se o salto direto falhar.
+        """
+        if self.url_componente and self._ir_direto():
+            return
+        self._abrir_pelo_menu()
+
+    def _ir_direto(self) -> bool:
         try:
-            for item in self.status_tree.get_children():
-                self.status_tree.delete(item)
-            def insert_line(idv, ini, fim):
-                st = self.status_by_id.get(idv, "aguardando")
-                d1 = ini.strftime('%d/%m/%Y') if hasattr(ini, 'strftime') else (ini if ini else '')
-                d2 = fim.strftime('%d/%m/%Y') if hasattr(fim, 'strftime') else (fim if fim else '')
-                self.status_tree.insert('', 'end', values=(idv, f"{d1} a {d2}", st), tags=(st,))
-            for idv in self.completed_order:
-                if idv in preview_map:
-                    ini, fim = preview_map[idv]
-                    insert_line(idv, ini, fim)
-            for idv in self.error_order:
-                if idv in preview_map and idv not in self.completed_order:
-                    ini, fim = preview_map[idv]
-                    insert_line(idv, ini, fim)
-            for idv, ini, fim in self.planilha_preview:
-                if idv not in self.completed_order and idv not in self.error_order and idv not in self.active_order:
-                    insert_line(idv, ini, fim)
-            for idv in self.active_order:
-                if idv in preview_map:
-                    ini, fim = preview_map[idv]
-                    insert_line(idv, ini, fim)
-            total = len(self.planilha_preview)
-            done = len(self.completed_order)
+            self.driver.switch_to.default_content()
+            self.driver.get(self.url_componente)
+            self.entrar_frame(timeout=10)
+            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.ID, "OR_ATND_SRCH_EMPLID")))
+            return True
+        except Exception as e:
+            print(f"⚠️ Acesso direto ao componente falhou, usando o menu: {e}")
+            self.url_componente = None
+            return False
+
+    def _abrir_pelo_menu(self):
+        self.driver.switch_to.default_content()
+        # Cada clique do menu é confirmado pelo item seguinte aparecer
+        self.clicar_assim_aparecer(By.XPATH, """//*[@id="pthnavbca_PORTAL_ROOT_OBJECT"]""",
+                                   aparecer=(By.ID, "fldra_HCSR_CURRICULUM_MANAGEMENT"), nome_espera="menu")
+        self.clicar_assim_aparecer(By.XPATH, """//*[@id="fldra_HCSR_CURRICULUM_MANAGEMENT"]""",
+                                   aparecer=(By.ID, "fldra_HCSR_ATTENDANCE_ROSTER"), nome_espera="menu")
+        self.clicar_assim_aparecer(By.XPATH, """//*[@id="fldra_HCSR_ATTENDANCE_ROSTER"]""",
+                                   aparecer=(By.XPATH, """//*[@id="crefli_HC_STDNT_ATTENDANCE_GBL"]/a"""), nome_espera="menu")
+        if self.url_componente is None:
             try:
-                self.progress.configure(mode="determinate", maximum=max(1, total))
-                self.progress['value'] = done
+                link = self.driver.find_element(By.XPATH, """//*[@id="crefli_HC_STDNT_ATTENDANCE_GBL"]/a""")
+                href = link.get_attribute("href") or ""
+                if href.startswith("http"):
+                    self.url_componente = href
             except Exception:
                 pass
+        self.clicar_assim_aparecer(By.XPATH, """//*[@id="crefli_HC_STDNT_ATTENDANCE_GBL"]/a""")
+        if self.url_componente is None:
+            # Sem href utilizável no menu: deriva a URL do portal a partir do iframe de conteúdo
             try:
-                self.progress_text.set(f"Progresso: {done}/{total}")
+                self.entrar_frame()
+                self.driver.switch_to.default_content()
+                src = self.driver.find_element(By.ID, "ptifrmtgtframe").get_attribute("src") or ""
+                if "HC_STDNT_ATTENDANCE" in src:
+                    self.url_componente = src.replace("/psc/", "/psp/", 1)
             except Exception:
                 pass
-        except Exception:
-            self.status_var.set("\n".join(lines) if lines else "Pronto.")
+        if self.url_componente:
+            print(f"🔗 URL do componente: {self.url_componente}")
 
-    def _position_right(self):
+    def fechar(self):
         try:
-            self.update_idletasks()
-            w = self.winfo_width() or 460
-            h = self.winfo_height() or 300
-            sw = self.winfo_screenwidth()
-            x = max(0, sw - w - 20)
-            y = 20
-            self.geometry(f"{w}x{h}+{x}+{y}")
+            self.driver.quit()
         except Exception:
             pass
 
 
-    def on_start(self):
-        if self.is_running:
-            return
-        user = self.user_var.get().strip()
-        pwd = self.pass_var.get().strip()
-        if not user or not pwd:
-            messagebox.showwarning("Dados obrigatórios", "Informe usuário e senha.")
-            return
-        allowed_reasons = ["Amparo Legal", "Aproveitamento de Estudos", "Matrícula Fora do Prazo"]
-        if not settings_exists() or not self.search_year or not self.attend_reason or self.attend_reason not in allowed_reasons or (self.attend_reason == "Amparo Legal" and not self.amparo_code):
-            messagebox.showwarning("Configurações necessárias", "Antes de iniciar, abra Config, escolha Ano e Razão e clique em Salvar.")
-            return
-        if self.remember_var.get():
-            save_credentials(user, pwd)
-        else:
-            clear_credentials()
-        self.is_running = True
-        self.is_paused = False
-        self.resume_event.set()
-        self.stop_event.clear()
-
-        # Travar inputs enquanto roda
-        self.user_entry.configure(state=tk.DISABLED)
-        self.pass_entry.configure(state=tk.DISABLED)
-        self.start_btn.configure(state=tk.DISABLED)
-        self.pause_btn.configure(state=tk.NORMAL, text="Pausar")
-        self.stop_btn.configure(state=tk.NORMAL)
-
-        self.status_var.set("Iniciando automação...")
-        try:
-            self._position_right()
-        except Exception:
-            pass
-        try:
-            total = len(self.planilha_preview)
-            self.progress.configure(mode="determinate", maximum=max(1, total))
-            self.progress['value'] = len(self.completed_order)
-            self.progress_text.set(f"Progresso: {len(self.completed_order)}/{total}")
-        except Exception:
-            pass
+def pasta_perfil_sessao(pasta: str, n: int = 1):
+    # Dois Chrome não abrem a mesma pasta de perfil ao mesmo tempo: uma subpasta por sessão
+    return os.path.join(pasta, f"sessao_{n}") if pasta else None
 
-        def target():
+
+class NavegadorReserva:
+    """
+    Um Chrome aberto em segundo plano (já na página de login) enquanto o usuário digita as credenciais.
+    A primeira sessão Selenium da execução o retira em vez de esperar o navegador subir.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pronto = threading.Event()
+        self._sessao = None
+        self._chave = None
+
+    def iniciar(self, url_base: str, headless: bool, perfil_leve: bool, pasta_perfil: str = None):
+        chave = (url_base.rstrip("/"), bool(headless), bool(perfil_leve), pasta_perfil)
+        with self._lock:
+            if self._chave == chave:
+                return
+            antiga, self._sessao = self._sessao, None
+            self._chave = chave
+            self._pronto = pronto = threading.Event()
+        if antiga is not None:
+            threading.Thread(target=antiga.fechar, daemon=True).start()
+        threading.Thread(target=self._abrir, args=(chave, pronto), daemon=True).start()
+
+    def _abrir(self, chave, pronto):
+        url_base, headless, perfil_leve, pasta_perfil = chave
+        try:
+            sessao = SessaoSelenium(None, url_base, headless, perfil_leve, pasta_perfil)
+            sessao.abrir_login()
+        except Exception as e:
+            print(f"⚠️ Não foi possível pré-abrir o navegador: {e}")
+            sessao = None
+        with self._lock:
+            atual = self._chave == chave and self._pronto is pronto
+            if atual:
+                self._sessao = sessao
+        if not atual and sessao is not None:
+            # Descartado (ou configuração trocada) enquanto abria
+            sessao.fechar()
+        pronto.set()
+
+    def retirar(self, registro_esperas: RegistroEsperas, url_base: str, headless: bool, perfil_leve: bool,
+                pasta_perfil: str = None, timeout: float = 60):
+        """
+        Entrega o navegador pré-aberto se ele foi criado com as mesmas opções; senão None
+        """
+        chave = (url_base.rstrip("/"), bool(headless), bool(perfil_leve), pasta_perfil)
+        with self._lock:
+            if self._chave is None:
+                return None
+            pronto = self._pronto
+        pronto.wait(timeout)
+        with self._lock:
+            sessao, chave_reserva = self._sessao, self._chave
+            self._sessao = self._chave = None
+        if sessao is None:
+            return None
+        if chave_reserva != chave:
+            sessao.fechar()
+            return None
+        sessao.espera = EsperaPeopleSoft(sessao.driver, registro_esperas)
+        return sessao
+
+    def descartar(self):
+        with self._lock:
+            sessao, self._sessao, self._chave = self._sessao, None, None
+        if sessao is not None:
+            sessao.fechar()
+
+
+class _NoHtml:
+    def __init__(self, tag: str, attrs: dict, pai=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.pai = pai
+        self.filhos = []
+
+    def texto(self) -> str:
+        partes = []
+        pilha = [self]
+        while pilha:
+            no = pilha.pop()
+            if isinstance(no, str):
+                partes.append(no)
+                continue
+            if no.tag in ("td", "th", "br", "tr", "div", "p"):
+                partes.append(" ")
+            pilha.extend(reversed(no.filhos))
+        return re.sub(r'\s+', ' ', "".join(partes)).strip()
+
+    def descendentes(self, tag: str = None):
+        pilha = list(reversed(self.filhos))
+        while pilha:
+            no = pilha.pop()
+            if isinstance(no, str):
+                continue
+            if tag is None or no.tag == tag:
+                yield no
+            pilha.extend(reversed(no.filhos))
+
+    def filhos_tag(self, tag: str) -> list:
+        return [f for f in self.filhos if not isinstance(f, str) and f.tag == tag]
+
+
+class PaginaPeopleSoft(HTMLParser):
+    """
+    Árvore mínima de uma página do PeopleSoft, suficiente para ler tabelas e o formulário win0
+    """
+    VAZIOS = {"input", "br", "img", "meta", "link", "hr", "col", "base", "area", "param", "source", "wbr"}
+    # Tags que o HTML do PeopleSoft costuma deixar sem fechar
+    FECHAMENTO_IMPLICITO = {
+        "td": {"td", "th"},
+        "th": {"td", "th"},
+        "tr": {"tr", "td", "th"},
+        "option": {"option"},
+        "li": {"li"},
+        "p": {"p"},
+    }
+
+    def __init__(self, html: str):
+        super().__init__(convert_charrefs=True)
+        self.raiz = _NoHtml("#documento", {})
+        self._atual = self.raiz
+        self.por_id = {}
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        fecha = self.FECHAMENTO_IMPLICITO.get(tag)
+        while fecha and self._atual.tag in fecha:
+            self._atual = self._atual.pai
+        no = _NoHtml(tag, {k: (v if v is not None else "") for k, v in attrs}, self._atual)
+        self._atual.filhos.append(no)
+        if "id" in no.attrs:
+            self.por_id.setdefault(no.attrs["id"], no)
+        if tag not in self.VAZIOS:
+            self._atual = no
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in self.VAZIOS:
+            self._atual = self._atual.pai
+
+    def handle_endtag(self, tag):
+        no = self._atual
+        while no is not None and no.tag != tag:
+            no = no.pai
+        if no is not None and no.pai is not None:
+            self._atual = no.pai
+
+    def handle_data(self, data):
+        self._atual.filhos.append(data)
+
+    def elemento(self, id_elemento: str):
+        return self.por_id.get(id_elemento)
+
+    def formulario(self):
+        for form in self.raiz.descendentes("form"):
+            if form.attrs.get("name") == "win0" or form.attrs.get("id") == "win0":
+                return form
+        return next(self.raiz.descendentes("form"), None)
+
+    def campos_formulario(self) -> dict:
+        """
+        Valores atuais de todos os campos do formulário (ICStateNum, ICSID, entradas e selects)
+        """
+        form = self.formulario()
+        campos = {}
+        if form is None:
+            return campos
+        for no in form.descendentes():
+            nome = no.attrs.get("name")
+            if not nome:
+                continue
+            if no.tag == "input":
+                tipo = no.attrs.get("type", "text").lower()
+                if tipo in ("button", "submit", "image", "reset", "file"):
+                    continue
+                if tipo in ("checkbox", "radio") and "checked" not in no.attrs:
+                    continue
+                campos[nome] = no.attrs.get("value", "")
+            elif no.tag == "textarea":
+                campos[nome] = no.texto()
+            elif no.tag == "select":
+                opcoes = list(no.descendentes("option"))
+                escolhida = next((o for o in opcoes if "selected" in o.attrs), opcoes[0] if opcoes else None)
+                campos[nome] = escolhida.attrs.get("value", escolhida.texto()) if escolhida is not None else ""
+        return campos
+
+    def acao_do_link(self, no) -> str:
+        """
+        ICAction disparada por um link: lida do href javascript:submitAction_win0(...) / hAction_win0(...)
+        """
+        href = no.attrs.get("href", "") + " " + no.attrs.get("onclick", "")
+        m = re.search(r"(?:submitAction|hAction|aAction)_win\d+\(\s*document\.win\d+\s*,\s*'([^']+)'", href)
+        if m:
+            return m.group(1)
+        return no.attrs.get("id") or no.attrs.get("name") or ""
+
+    def linhas_tabela(self, id_tabela: str, diretas: bool = True) -> list:
+        tabela = self.elemento(id_tabela)
+        if tabela is None:
+            return []
+        if not diretas:
+            return list(tabela.descendentes("tr"))
+        linhas = tabela.filhos_tag("tr")
+        for corpo in tabela.filhos_tag("tbody") + tabela.filhos_tag("thead"):
+            linhas.extend(corpo.filhos_tag("tr"))
+        return linhas
+
+
+class SessaoHttp:
+    """
+    Motor sem navegador: fala direto com o componente HC_STDNT_ATTENDANCE_GBL por HTTP,
+    enviando os campos ICAction/ICStateNum do formulário win0 como o navegador faria.
+    Tem a mesma interface de SessaoSelenium.
+    """
+    VOLTAR = "DERIVED_AA2_DERIVED_LINK10$0"
+
+    def __init__(self, registro_esperas: RegistroEsperas = None, url_base: str = URL_BASE, url_componente: str = None, timeout: float = 30):
+        self.url_base = url_base.rstrip("/")
+        self.url_componente = url_componente or (self.url_base + CAMINHO_COMPONENTE)
+        self.registro = registro_esperas
+        self.timeout = timeout
+        # urllib.request/http.cookiejar só quando o motor HTTP é usado: o import pesa na abertura da janela
+        import urllib.request
+        import urllib.error
+        import http.cookiejar
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.opener.addheaders = [("User-Agent", "Mozilla/5.0 (AutoAtestado)")]
+        self.pagina = None
+        self.url_pagina = None
+
+    TENTATIVAS_GET = 3
+
+    def _requisitar(self, url: str, dados: dict = None, nome: str = "http") -> PaginaPeopleSoft:
+        corpo = urllib.parse.urlencode(dados).encode("utf-8") if dados is not None else None
+        # GET pode ser repetido com segurança; POST (ICAction) não, para não aplicar/salvar duas vezes
+        tentativas = self.TENTATIVAS_GET if corpo is None else 1
+        for tentativa in range(tentativas):
+            inicio = perf_counter()
+            ok = False
             try:
-                cfg = {"attend_reason": self.attend_reason, "amparo_code": self.amparo_code, "search_year": self.search_year}
-                result = processar_atestados(user, pwd, status_cb=self._enqueue_status, resume_event=self.resume_event, stop_event=self.stop_event, config=cfg, process_fic=self.process_fic_var.get())
-                if not self.stop_event.is_set():
-                    if result and result.get("found_count", 0) == 0:
-                        yr = result.get("year") or ""
-                        msg = f"Nenhuma linha encontrada para EMÉDIO {yr}." if yr else "Nenhuma linha encontrada."
-                        self._enqueue_status(msg)
-                        self.processo_erro = msg
-                    else:
-                        self._enqueue_status("🎉 Processamento concluído! Verifique o arquivo de log na pasta 'log'.")
-                        self.processo_concluido = True
-            except Exception as e:
-                self._enqueue_status(f"❌ Erro: {e}")
-                self.processo_erro = str(e)
+                with self.opener.open(url, data=corpo, timeout=self.timeout) as resposta:
+                    charset = resposta.headers.get_content_charset() or "utf-8"
+                    html = resposta.read().decode(charset, errors="replace")
+                    self.url_pagina = resposta.geturl()
+                ok = True
+                break
+            except (urllib.error.URLError, OSError) as e:
+                if tentativa + 1 >= tentativas:
+                    raise
+                espera = 0.5 * (2 ** tentativa)
+                print(f"🔁 {nome}: tentativa {tentativa + 1} falhou ({e}). Nova tentativa em {espera:.1f}s")
+                sleep(espera)
             finally:
-                def restore():
-                    self.is_running = False
-                    self.is_paused = False
-                    self.user_entry.configure(state=tk.NORMAL)
-                    self.pass_entry.configure(state=tk.NORMAL)
-                    self.start_btn.configure(state=tk.NORMAL)
-                    self.pause_btn.configure(state=tk.DISABLED, text="Pausar")
-                    self.stop_btn.configure(state=tk.DISABLED)
-                    self.restart_btn.configure(state=tk.DISABLED)
-                    try:
-                        self.progress.stop()
-                        self.progress.configure(mode="determinate")
-                    except Exception:
-                        pass
-
-                    # Verificar se deve mostrar pop-up de conclusão
-                    if hasattr(self, 'processo_concluido') and self.processo_concluido:
-                        messagebox.showinfo("AutoAtestado - Concluído", "Processamento concluído com sucesso!\n\nVerifique o arquivo de log na pasta 'log' para detalhes.")
-                        self.processo_concluido = False
-                    elif hasattr(self, 'processo_erro') and self.processo_erro:
-                        messagebox.showerror("AutoAtestado - Erro", f"Falha na execução:\n\n{self.processo_erro}")
-                        self.processo_erro = None
-                self.after(0, restore)
-
-        self.worker_thread = threading.Thread(target=target, daemon=True)
-        self.worker_thread.start()
-
-    def open_settings(self):
-        dialog = tk.Toplevel(self)
-        dialog.title("Configurações")
-        dialog.resizable(False, False)
-        dialog.transient(self)
-        dialog.grab_set()
-        self.settings_open = True
+                if self.registro is not None:
+                    self.registro.adicionar(nome, perf_counter() - inicio, ok)
+        self.pagina = PaginaPeopleSoft(html)
+        return self.pagina
+
+    def _acao(self, acao: str, campos: dict = None, nome: str = None) -> PaginaPeopleSoft:
+        if self.pagina is None or self.pagina.formulario() is None:
+            raise RuntimeError(f"Nenhum formulário carregado para a ação {acao}")
+        dados = self.pagina.campos_formulario()
+        if campos:
+            dados.update(campos)
+        dados["ICAction"] = acao
+        destino = urllib.parse.urljoin(self.url_pagina, self.pagina.formulario().attrs.get("action") or self.url_pagina)
+        pagina = self._requisitar(destino, dados, nome or f"http_{acao}")
+        if self.sessao_expirada():
+            raise SessaoExpirada(f"Sessão do PeopleSoft expirada (ação {acao})")
+        return pagina
+
+    def sessao_expirada(self) -> bool:
+        # O componente respondeu com o formulário de login
+        return self.pagina is not None and self.pagina.elemento("pwd") is not None
+
+    def login(self, user, password):
+        self._requisitar(self.url_base + CAMINHO_LOGIN, nome="http_login")
+        dados = self.pagina.campos_formulario()
+        dados.update({"userid": user, "pwd": password})
+        form = self.pagina.formulario()
+        destino = urllib.parse.urljoin(self.url_pagina, (form.attrs.get("action") if form is not None else "") or self.url_pagina)
+        self._requisitar(destino, dados, "http_login")
+        if self.pagina.elemento("pwd") is not None:
+            raise RuntimeError("Falha no login (usuário ou senha inválidos?)")
+
+    def abrir_lista_atividades(self):
+        self._requisitar(self.url_componente, nome="http_componente")
+        if self.sessao_expirada():
+            raise SessaoExpirada("Sessão do PeopleSoft expirada (página de pesquisa)")
+        if self.pagina.elemento("OR_ATND_SRCH_EMPLID") is None:
+            raise RuntimeError(f"Página de pesquisa não encontrada em {self.url_componente}")
+
+    def extrair_resultados_pesquisa(self) -> list:
+        linhas = []
+        for indice, tr in enumerate(self.pagina.linhas_tabela("PTSRCHRESULTS")):
+            a = next(tr.descendentes("a"), None)
+            linhas.append({
+                "indice": indice,
+                "texto": tr.texto(),
+                "link_id": (a.attrs.get("id", "") if a is not None else ""),
+                "tem_link": a is not None,
+                "acao": (self.pagina.acao_do_link(a) if a is not None else ""),
+            })
+        return linhas
+
+    def extrair_grade_aulas(self) -> list:
+        linhas = []
+        for tr in self.pagina.linhas_tabela("STDNT_ENRL$scroll$0", diretas=False):
+            tds = tr.filhos_tag("td")
+            if not tds:
+                continue
+            a = next(tds[0].descendentes("a"), None)
+            texto = tr.texto()
+            numero = tds[0].texto()
+            linhas.append({
+                "numero": numero,
+                "texto": texto,
+                "link_id": (a.attrs.get("id", "") if a is not None else ""),
+                "fic": len(numero) > 4,
+                "acao": (self.pagina.acao_do_link(a) if a is not None else ""),
+            })
+        return linhas
+
+    def pesquisar_aluno(self, id_aluno, extrair: bool = True) -> list:
+        self._acao("#ICSearch", {"OR_ATND_SRCH_EMPLID": str(id_aluno)}, "http_#ICSearch")
+        return self.extrair_resultados_pesquisa() if extrair else None
+
+    def abrir_resultado_conhecido(self, indice: int, texto: str) -> bool:
+        linhas = self.extrair_resultados_pesquisa()
+        if indice >= len(linhas) or not linhas[indice]["tem_link"] or linhas[indice]["texto"].strip() != texto:
+            return False
+        self.abrir_resultado(linhas[indice])
+        return True
+
+    def abrir_resultado(self, linha: dict):
+        self._acao(linha["acao"], nome="http_abrir_resultado")
+        if self.pagina.elemento("STDNT_ENRL$scroll$0") is None:
+            raise RuntimeError("Tabela de aulas (STDNT_ENRL$scroll$0) não encontrada")
+
+    def abrir_aula(self, aula: dict):
+        if not aula.get("acao"):
+            raise ValueError(f"aula {aula['numero']} sem link")
+        self._acao(aula["acao"], nome="http_abrir_aula")
+
+    def ler_classificacao(self) -> str:
+        bloco = self.pagina.elemento("ACE_DERIVED_AA2_")
+        if bloco is None:
+            raise RuntimeError("Bloco ACE_DERIVED_AA2_ não encontrado")
+        return bloco.texto()
+
+    def ler_linhas_pagina(self) -> list:
+        return [tr.texto() for tr in self.pagina.raiz.descendentes("tr") if next(tr.descendentes("tr"), None) is None]
+
+    def voltar_grade(self, nome: str = "voltar"):
+        self._acao(self.VOLTAR, nome=f"http_{nome}")
+
+    def retornar_se_preciso(self):
+        if self.pagina is not None and self.pagina.elemento(self.VOLTAR) is not None:
+            try:
+                self.voltar_grade()
+            except Exception as e:
+                print(f"❌ Erro ao retornar: {e}")
+
+    def lancar_periodo(self, inicio: str, fim: str, razao: str, codigo_amparo: str = ""):
+        aba = self.pagina.elemento("ICTAB_1")
+        self._acao(self.pagina.acao_do_link(aba) if aba is not None else "ICTAB_1", nome="http_aba")
+
+        select = self.pagina.elemento("DIG_APR_EST_WRK_ATTEND_REASON")
+        if select is None:
+            raise RuntimeError("Campo DIG_APR_EST_WRK_ATTEND_REASON não encontrado")
+        opcao = next((o for o in select.descendentes("option") if o.texto() == razao), None)
+        if opcao is None:
+            raise RuntimeError(f"Razão '{razao}' não disponível")
+        campos = {
+            "DIG_APR_EST_WRK_START_DT": inicio,
+            "DIG_APR_EST_WRK_END_DT": fim,
+            select.attrs.get("name", "DIG_APR_EST_WRK_ATTEND_REASON"): opcao.attrs.get("value", razao),
+        }
+        if razao == "Amparo Legal":
+            campos["DIG_APR_EST_WRK_REASON_DESCR"] = codigo_amparo
+        self._acao("DIG_APR_EST_WRK_PROCESS_BTN", campos, "http_aplicar")
+
+    def salvar(self):
+        self._acao("#ICSave", nome="http_#ICSave")
+
+    def confirmar_lancamento(self, inicio: str, fim: str, razao: str) -> bool:
+        # A resposta do #ICSave já é a aula atualizada
+        return periodo_ja_lancado(self.ler_linhas_pagina(), inicio, fim, razao)
+
+    def fechar(self):
         try:
-            self.start_btn.configure(state=tk.DISABLED)
+            self._requisitar(self.url_base + "/psp/cs90pss/?cmd=logout", nome="http_logout")
         except Exception:
             pass
-        pad = {"padx": 10, "pady": 8}
-        frm = ttk.Frame(dialog)
-        frm.pack(fill=tk.BOTH, expand=True)
-        ttk.Label(frm, text="Ano (4 dígitos):").grid(row=0, column=0, sticky="w", **pad)
-        year_var = tk.StringVar(value=str(self.search_year))
-        year_entry = ttk.Entry(frm, textvariable=year_var, width=10)
-        def validate_year(P):
-            return P.isdigit() and len(P) <= 4
-        vcmd = (self.register(validate_year), '%P')
-        year_entry.configure(validate='key', validatecommand=vcmd)
-        year_entry.grid(row=0, column=1, sticky="w", **pad)
-        ttk.Label(frm, text="Razão de ausência:").grid(row=1, column=0, sticky="w", **pad)
-        reasons = ["Amparo Legal", "Aproveitamento de Estudos", "Matrícula Fora do Prazo"]
-        reason_var = tk.StringVar(value=self.attend_reason)
-        reason_cb = ttk.Combobox(frm, textvariable=reason_var, values=reasons, state="readonly", width=28)
-        reason_cb.grid(row=1, column=1, sticky="w", **pad)
-        ttk.Label(frm, text="Motivo (Amparo Legal):").grid(row=2, column=0, sticky="w", **pad)
-        amparo_options = [
-            ("0000000001", "Problemas de saúde"),
-            ("0000000002", "Licença Maternidade"),
-            ("0000000003", "Adoção"),
-            ("0000000004", "Licença paternidade"),
-            ("0000000005", "Serviço militar"),
-            ("0000000006", "Representação desportiva"),
-            ("0000000008", "Educação Física"),
-            ("0000000009", "Crença religiosa"),
-        ]
-        amparo_display = [f"{code} - {desc}" for code, desc in amparo_options]
-        amparo_var = tk.StringVar()
+
+
+FORMATOS_DATA = ('%d/%m/%Y', '%Y-%m-%d', '%d/%m/%y', '%d-%m-%Y', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S')
+
+
+def _converter_id(valor) -> str:
+    # O Excel costuma guardar IDs numéricos como float (1000001.0)
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip() if valor is not None else ''
+
+
+def _converter_data(valor):
+    """
+    Datas do Excel já chegam como datetime; texto (CSV) é convertido. Valores inválidos voltam como estão.
+    """
+    if valor is None or hasattr(valor, 'strftime'):
+        return valor
+    texto = str(valor).strip()
+    if not texto:
+        return None
+    for formato in FORMATOS_DATA:
         try:
-            current_display = next(f"{c} - {d}" for c, d in amparo_options if c == self.amparo_code)
-            amparo_var.set(current_display)
-        except Exception:
-            amparo_var.set(amparo_display[0])
-        amparo_cb = ttk.Combobox(frm, textvariable=amparo_var, values=amparo_display, state="readonly", width=28)
-        amparo_cb.grid(row=2, column=1, sticky="w", **pad)
-        def on_reason_change(*_):
-            if reason_var.get() == "Amparo Legal":
-                amparo_cb.configure(state="readonly")
-            else:
-                amparo_cb.configure(state="disabled")
-        reason_var.trace_add("write", on_reason_change)
-        on_reason_change()
-        btns = ttk.Frame(frm)
-        btns.grid(row=3, column=0, columnspan=2, sticky="e", **pad)
-        def on_save():
-            self.attend_reason = reason_var.get()
-            if self.attend_reason == "Amparo Legal":
-                sel = amparo_var.get()
-                code = sel.split(" - ")[0]
-                self.amparo_code = code
-            yr = year_var.get()
-            yr_digits = "".join(ch for ch in yr if ch.isdigit())[:4]
-            if yr_digits:
-                self.search_year = yr_digits
-            s = {"attend_reason": self.attend_reason, "amparo_code": self.amparo_code}
-            s["search_year"] = self.search_year
-            save_settings(s)
-            dialog.destroy()
-            self.settings_open = False
+            return datetime.datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    return texto
+
+
+def localizar_planilha(pasta: str = ".") -> str:
+    """
+    atestados.xlsx, ou a exportação atestados.csv quando não houver a planilha
+    """
+    xlsx = os.path.join(pasta, 'atestados.xlsx')
+    csv_path = os.path.join(pasta, 'atestados.csv')
+    if not os.path.exists(xlsx) and os.path.exists(csv_path):
+        return csv_path
+    return xlsx
+
+
+def _codificacao_csv(caminho: str) -> str:
+    """
+    UTF-8 (com ou sem BOM) se o arquivo inteiro decodifica assim; senão cp1252, o padrão do
+    "CSV (separado por ponto e vírgula)" do Excel em português
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+    with open(caminho, 'rb') as f:
+        try:
+            for bloco in iter(lambda: f.read(65536), b''):
+                decodificador.decode(bloco)
+            decodificador.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return 'cp1252'
+    return 'utf-8-sig'
+
+
+def ler_planilha(caminho: str):
+    """
+    Gera (id, inicio, fim) lendo a planilha em modo streaming (colunas B, C e D, a partir da linha 2).
+    Para na primeira linha sem ID, sem confiar em max_row. Aceita .xlsx (aba Plan1) e .csv.
+    """
+    if caminho.lower().endswith('.csv'):
+        with open(caminho, 'r', encoding=_codificacao_csv(caminho), newline='') as f:
+            amostra = f.read(4096)
+            f.seek(0)
             try:
-                self.start_btn.configure(state=tk.NORMAL)
-            except Exception:
-                pass
-        ttk.Button(btns, text="Salvar", command=on_save).pack(side=tk.RIGHT, padx=4)
-        def on_cancel():
-            dialog.destroy()
-            self.settings_open = False
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=';,\t')
+            except csv.Error:
+                dialeto = csv.excel
+            linhas = csv.reader(f, dialeto)
+            next(linhas, None)
+            for row in linhas:
+                row = list(row) + [None] * (4 - len(row))
+                current_id = _converter_id(row[1])
+                if not current_id:
+                    return
+                yield current_id, _converter_data(row[2]), _converter_data(row[3])
+        return
+
+    # openpyxl só é importado quando há uma planilha .xlsx para ler
+    from openpyxl import load_workbook
+    excel = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        for row in excel['Plan1'].iter_rows(min_row=2, max_col=4, values_only=True):
+            row = tuple(row) + (None,) * (4 - len(row))
+            current_id = _converter_id(row[1])
+            if not current_id:
+                return
+            yield current_id, _converter_data(row[2]), _converter_data(row[3])
+    finally:
+        excel.close()
+
+
+def carregar_registros(excel_path='atestados.xlsx', notify=print):
+    """
+    Lê a planilha inteira com ler_planilha e devolve a lista de (id, inicio, fim).
+    """
+    try:
+        registros = list(ler_planilha(excel_path))
+    except FileNotFoundError:
+        notify(f"Planilha não encontrada: {excel_path}. Deixe 'atestados.xlsx' na mesma pasta do programa.")
+        raise
+    except UnicodeDecodeError as e:
+        notify(f"Não foi possível ler {excel_path}: codificação não reconhecida ({e}). Salve o CSV como UTF-8.")
+        raise
+    # Se o ID for None ou vazio, significa que chegou ao fim das linhas preenchidas
+    notify("Fim das linhas preenchidas alcançado.")
+    return registros
+
+
+def _como_data(valor):
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    return valor if isinstance(valor, datetime.date) else None
+
+
+def normalizar_id(valor) -> str:
+    return re.sub(r'\s+', '', _converter_id(valor))
+
+
+def planejar_visitas(registros):
+    """
+    Etapa anterior ao navegador: normaliza IDs, rejeita linhas sem datas válidas e junta as
+    linhas do mesmo aluno numa única visita. Só períodos que se sobrepõem (ou repetidos) são unidos;
+    períodos vizinhos continuam separados, para as datas lançadas serem as mesmas da planilha.
+    Devolve (visitas, rejeitados): visitas = [(id, [(inicio, fim), ...])] na ordem da planilha,
+    rejeitados = [(linha, id, motivo)].
+    """
+    periodos_por_id = {}
+    rejeitados = []
+    for n, (current_id, current_inicio, current_fim) in enumerate(registros, start=2):
+        id_aluno = normalizar_id(current_id)
+        inicio = _como_data(current_inicio)
+        fim = _como_data(current_fim)
+        if not id_aluno:
+            motivo = "ID vazio"
+        elif inicio is None:
+            motivo = f"data de início inválida ({current_inicio!r})"
+        elif fim is None:
+            motivo = f"data de fim inválida ({current_fim!r})"
+        elif fim < inicio:
+            motivo = f"fim ({_fmt_data(fim)}) antes do início ({_fmt_data(inicio)})"
+        else:
+            periodos_por_id.setdefault(id_aluno, []).append((inicio, fim))
+            continue
+        rejeitados.append((n, id_aluno, motivo))
+
+    visitas = []
+    for id_aluno, periodos in periodos_por_id.items():
+        unidos = []
+        for inicio, fim in sorted(periodos):
+            if unidos and inicio <= unidos[-1][1]:
+                unidos[-1] = (unidos[-1][0], max(unidos[-1][1], fim))
+            else:
+                unidos.append((inicio, fim))
+        visitas.append((id_aluno, unidos))
+    return visitas, rejeitados
+
+
+class EventoProgresso:
+    """
+    Evento estruturado publicado por processar_atestados (UI, log e modo sem janela consomem sem ler texto)
+    """
+    MENSAGEM = "mensagem"
+    ALUNO_INICIADO = "aluno_iniciado"
+    AULA_CONCLUIDA = "aula_concluida"
+    AULA_PULADA = "aula_pulada"
+    AULA_FALHOU = "aula_falhou"
+    ALUNO_CONCLUIDO = "aluno_concluido"
+    ALUNO_FALHOU = "aluno_falhou"
+    EXECUCAO_FINALIZADA = "execucao_finalizada"
+
+    def __init__(self, tipo: str, id_aluno: str = None, aula: str = None, resultado: str = "", detalhe: str = "",
+                 contadores: dict = None, segundos: float = None, mensagem: str = "", inicio: str = "", fim: str = ""):
+        self.tipo = tipo
+        self.id_aluno = id_aluno
+        self.aula = aula
+        self.resultado = resultado
+        self.detalhe = detalhe
+        self.inicio = inicio
+        self.fim = fim
+        self.contadores = contadores or {}
+        self.segundos = segundos
+        self.mensagem = mensagem
+
+    def como_dict(self) -> dict:
+        d = {"tipo": self.tipo}
+        for campo in ("id_aluno", "aula", "resultado", "inicio", "fim", "detalhe", "segundos", "mensagem"):
+            valor = getattr(self, campo)
+            if valor not in (None, ""):
+                d[campo] = round(valor, 3) if campo == "segundos" else valor
+        if self.contadores:
+            d["contadores"] = self.contadores
+        return d
+
+
+class CanalProgresso:
+    def __init__(self):
+        """
+        Distribui os eventos para os assinantes, um evento por vez (workers publicam em paralelo)
+        """
+        self._lock = threading.Lock()
+        self._assinantes = []
+
+    def assinar(self, callback, tipos=None):
+        """
+        callback(evento); tipos limita a alguns EventoProgresso.* (None = todos)
+        """
+        self._assinantes.append((callback, set(tipos) if tipos else None))
+
+    def publicar(self, evento: EventoProgresso):
+        with self._lock:
+            for callback, tipos in self._assinantes:
+                if tipos is not None and evento.tipo not in tipos:
+                    continue
+                try:
+                    callback(evento)
+                except Exception:
+                    pass
+
+
+def processar_atestados(user, password, status_cb=None, resume_event=None, stop_event=None, excel_path='atestados.xlsx', config=None, process_fic=False, registros=None, canal=None,
+                        navegador_reserva=None):
+    """
+    Executa toda a automação.
+    - status_cb: função para receber mensagens de status (str)
+    - canal: CanalProgresso que recebe os eventos estruturados (aluno iniciado/concluído/falhou, aulas, fim da execução)
+    - resume_event: Event controlado pela UI. Quando limpo (clear), a automação pausa. Quando setado, continua.
+    - stop_event: Event para parada total e imediata assim que possível.
+    - excel_path: caminho do arquivo da planilha (mantido externo ao programa).
+    - registros: lista (id, inicio, fim) já lida pela UI; quando informada a planilha não é relida.
+    - config["workers"]: quantidade de sessões de navegador em paralelo (padrão 1).
+    - config["chrome_profile_dir"]: pasta de perfil persistente do Chrome; com ela o login é pulado se a sessão ainda vale.
+    - navegador_reserva: NavegadorReserva com um Chrome já aberto, aproveitado pela primeira sessão.
+    """
+    if canal is None:
+        canal = CanalProgresso()
+    if status_cb:
+        canal.assinar(lambda ev: status_cb(ev.mensagem), {EventoProgresso.MENSAGEM})
+    inicio_execucao = perf_counter()
+
+    def notify(msg: str):
+        print(msg)
+        canal.publicar(EventoProgresso(EventoProgresso.MENSAGEM, mensagem=msg))
+
+    def publicar(tipo: str, id_aluno=None, **campos):
+        with contadores_lock:
+            foto = dict(contadores)
+        canal.publicar(EventoProgresso(tipo, id_aluno, contadores=foto, **campos))
+
+    if resume_event is None:
+        resume_event = threading.Event()
+        resume_event.set()
+    if stop_event is None:
+        stop_event = threading.Event()
+
+    def check_abort():
+        if stop_event.is_set():
+            raise StopRequested("Parado pelo usuário")
+
+    def wait_if_paused():
+        # Bloqueia aqui quando em pausa (pelo usuário ou pelo disjuntor de erros), mas sai se stop for solicitado
+        while not resume_event.is_set() or disjuntor.restante() > 0:
+            if stop_event.is_set():
+                raise StopRequested("Parado pelo usuário")
+            sleep(0.2)
+
+    disjuntor = DisjuntorErros(pausa=float((config.get("breaker_pause") if config else None) or 60))
+
+    year = (config.get("search_year") if config else "")
+    try:
+        workers = max(1, int(config.get("workers", 1) if config else 1))
+    except (TypeError, ValueError):
+        workers = 1
+    contadores = {"found_count": 0, "processed_count": 0, "not_found_count": 0, "already_applied_count": 0}
+    contadores_lock = threading.Lock()
+
+    def somar(chave):
+        with contadores_lock:
+            contadores[chave] += 1
+
+    # Carregar planilha (externa ao programa)
+    if registros is None:
+        registros = carregar_registros(excel_path, notify)
+    visitas, rejeitados = planejar_visitas(registros)
+    log_manager = LogManager()
+    cache_alunos = fila_compartilhada = None
+    try:
+        canal.assinar(log_manager.registrar_evento, {
+            EventoProgresso.ALUNO_INICIADO, EventoProgresso.AULA_CONCLUIDA, EventoProgresso.AULA_PULADA, EventoProgresso.AULA_FALHOU,
+            EventoProgresso.ALUNO_CONCLUIDO, EventoProgresso.ALUNO_FALHOU, EventoProgresso.EXECUCAO_FINALIZADA,
+        })
+        for linha, id_aluno, motivo in rejeitados:
+            log_manager.registrar_erro(id_aluno or f"(linha {linha})", f"Linha {linha} ignorada: {motivo}")
+            notify(f"Aluno {id_aluno}: linha {linha} ignorada ({motivo})")
+            publicar(EventoProgresso.ALUNO_FALHOU, id_aluno, detalhe=f"Linha {linha} ignorada: {motivo}")
+        diario = DiarioExecucao((config.get("journal_path") if config else None) or "diario_atestados.jsonl")
+        registro_esperas = RegistroEsperas()
+        controle = None
+        if config and config.get("adaptive_concurrency"):
+            def ao_decidir(decisao):
+                log_manager.registrar_controle(decisao)
+                if decisao["acao"] != "manter":
+                    notify(f"⚙️ Controle: {decisao['sessoes']} sessões ativas, pausa {decisao['pausa_s']:.1f}s ({decisao['motivo']}; "
+                           f"{decisao['aulas_por_min']:.0f} aulas/min na última janela)")
+
+            # `workers` passa a ser o teto; começa com uma sessão ativa e sobe enquanto o servidor aguenta
+            controle = ControleConcorrencia(workers, ao_decidir)
+
+        def registrar_etapa(nome, segundos, ok, id_aluno=None, aula=None):
+            log_manager.registrar_etapa(nome, segundos, ok, id_aluno, aula)
+            if controle is not None:
+                controle.observar_etapa(nome, segundos, ok)
+
+        medicao = MedicaoEtapas(registrar_etapa)
+        selected_reason = (config.get("attend_reason") if config else "Amparo Legal")
+        selected_code = (config.get("amparo_code") if config else "0000000001")
+        motor = (config.get("engine") if config else None) or "selenium"
+        headless = bool(config.get("headless")) if config else False
+        perfil_leve = bool(config.get("lean_profile")) if config else False
+        salvas = load_settings()
+        url_base = (config.get("url_base") if config else None) or salvas.get("url_base") or URL_BASE
+        url_componente = (config.get("url_componente") if config else None) or salvas.get("url_componente")
+        pasta_perfil = (config.get("chrome_profile_dir") if config else None) or None
+        validade_cache = (config.get("class_cache_days") if config else None)
+        if validade_cache is None:
+            validade_cache = salvas.get("class_cache_days", 30)
+        validade_nao_encontrado = (config.get("not_found_cache_days") if config else None)
+        if validade_nao_encontrado is None:
+            validade_nao_encontrado = salvas.get("not_found_cache_days", 7)
+        cache_alunos = CacheAlunos(
+            (config.get("student_cache_path") if config else None) or os.path.join(os.path.dirname(_settings_path()), "cache_alunos.sqlite3"),
+            float(validade_nao_encontrado),
+        )
+        cache_aulas = CacheClassificacao(
+            (config.get("class_cache_path") if config else None) or os.path.join(os.path.dirname(_settings_path()), "cache_aulas.json"),
+            float(validade_cache),
+        )
+
+        def registrar_resultado(ok: bool, origem: str):
+            # Alimenta o disjuntor; quando ele abre, todos os workers ficam parados em wait_if_paused
+            pausa = disjuntor.registrar(ok)
+            if controle is not None:
+                controle.registrar(ok)
+            if pausa:
+                notify(f"⚠️ Muitos erros seguidos (último: {origem}). Pausando {pausa:.0f}s antes de continuar...")
+                log_manager.registrar_erro(origem, f"Taxa de erros alta: execução pausada por {pausa:.0f}s")
+
+        def processar_aluno(sessao, current_id, periodos):
+            """
+            Uma visita por aluno: todos os períodos dele são aplicados em cada aula aberta.
+            """
+            notify(f"Processando aluno {current_id}...")
+            inicio_aluno = perf_counter()
+            publicar(EventoProgresso.ALUNO_INICIADO, current_id)
+            # Lista para armazenar as aulas processadas para este aluno
+            aulas_processadas = []
+            status_processamento = "SUCESSO"
+            observacoes = ""
+            # (inicio_txt, fim_txt, chave do diário, aulas já concluídas nesse período)
+            pendentes_aluno = []
+            for current_inicio, current_fim in periodos:
+                chave = DiarioExecucao.chave(current_id, current_inicio, current_fim, year, selected_reason, selected_code)
+                pendentes_aluno.append((_fmt_data(current_inicio), _fmt_data(current_fim), chave, diario.aulas_concluidas(chave)))
+            varios = len(pendentes_aluno) > 1
+            aulas_com_erro = 0
+            # Aulas puladas só pelo cache de FIC: o aluno fica "parcial" para a próxima execução conferir de novo
+            aulas_do_cache = 0
+            periodo_da_chave = {p[2]: (p[0], p[1]) for p in pendentes_aluno}
+
+            TIPO_DO_RESULTADO = {"Lançamento realizado": EventoProgresso.AULA_CONCLUIDA, "Já lançado": EventoProgresso.AULA_CONCLUIDA,
+                                 "Pulada": EventoProgresso.AULA_PULADA, CacheClassificacao.RESULTADO: EventoProgresso.AULA_PULADA,
+                                 "Erro": EventoProgresso.AULA_FALHOU}
+
+            def registrar_aula(chave, numero_aula, resultado, detalhe=""):
+                # Diário (retomada) e evento da aula andam juntos
+                diario.registrar_aula(chave, numero_aula, resultado, detalhe)
+                registrar_resultado(resultado != "Erro", f"aluno {current_id}, aula {numero_aula}")
+                inicio_txt, fim_txt = periodo_da_chave.get(chave, ("", ""))
+                publicar(TIPO_DO_RESULTADO[resultado], current_id, aula=numero_aula, resultado=resultado,
+                         detalhe=detalhe, inicio=inicio_txt, fim=fim_txt)
+
+            def anotar(numero_aula, descricao, inicio_txt=None, fim_txt=None):
+                if varios and inicio_txt:
+                    descricao += f" ({inicio_txt} a {fim_txt})"
+                aulas_processadas.append(f"Aula {numero_aula} - {descricao}")
+
+            def anotar_todos(periodos_aula, numero_aula, descricao, resultado, detalhe=""):
+                aulas_processadas.append(f"Aula {numero_aula} - {descricao}")
+                for _, _, chave, _ in periodos_aula:
+                    registrar_aula(chave, numero_aula, resultado, detalhe)
+
+            def conferir_sessao(erro, aluno_finalizado=False):
+                # Erro causado por sessão expirada não é erro da aula: sobe para o worker entrar de novo e repetir o aluno
+                if isinstance(erro, SessaoExpirada):
+                    erro.aluno_finalizado = aluno_finalizado
+                    raise erro
+                if sessao.sessao_expirada():
+                    raise SessaoExpirada(f"Sessão do PeopleSoft expirada ({erro})", aluno_finalizado) from erro
+
             try:
-                self.start_btn.configure(state=tk.NORMAL)
-            except Exception:
-                pass
-        ttk.Button(btns, text="Cancelar", command=on_cancel).pack(side=tk.RIGHT)
+                encontrou = False
+                conhecido = cache_alunos.consultar(current_id, year)
+                # Não encontrado numa pesquisa recente: nem pesquisa de novo
+                pesquisar = conhecido is None or conhecido["encontrado"]
+                if pesquisar:
+                    with medicao.etapa("pesquisa", current_id):
+                        resultados = sessao.pesquisar_aluno(current_id, extrair=conhecido is None)
+                    if conhecido is not None:
+                        # Aluno repetido: abre direto a linha da matrícula da última vez, se ela ainda é a mesma
+                        with medicao.etapa("grade", current_id):
+                            encontrou = sessao.abrir_resultado_conhecido(conhecido["indice"], conhecido["texto"])
+                        if not encontrou:
+                            resultados = sessao.extrair_resultados_pesquisa()
+                    if not encontrou:
+                        for linha in resultados:
+                            texto = linha["texto"].upper()
+                            if year and year in texto and "EMÉDIO" in texto and linha["tem_link"]:
+                                with medicao.etapa("grade", current_id):
+                                    sessao.abrir_resultado(linha)
+                                encontrou = True
+                                cache_alunos.registrar_encontrado(current_id, year, linha)
+                                break
+                        else:
+                            cache_alunos.registrar_nao_encontrado(current_id, year)
+                if encontrou:
+                    # Repetição do aluno depois de um novo login não conta de novo
+                    if current_id not in encontrados:
+                        encontrados.add(current_id)
+                        somar("found_count")
 
-    def on_pause_resume(self):
-        if not self.is_running:
-            return
-        if not self.is_paused:
-            # Pausar
-            self.resume_event.clear()
-            self.is_paused = True
-            self.pause_btn.configure(text="Retomar")
-            self.status_var.set("Pausado. Clique em Retomar para continuar.")
+                if not encontrou:
+                    status_processamento = "ERRO"
+                    msg = f"Aluno não encontrado ou sem EMÉDIO {year}" if year else "Aluno não encontrado ou sem EMÉDIO"
+                    if not pesquisar:
+                        msg += " (pesquisa recente)"
+                    observacoes = msg
+                    log_manager.registrar_lancamento(current_id, aulas_processadas, status_processamento, observacoes)
+                    for _, _, chave, _ in pendentes_aluno:
+                        diario.registrar_aluno(chave, "nao_encontrado")
+                    notify(f"Aluno {current_id}: {msg}")
+                    somar("not_found_count")
+                    publicar(EventoProgresso.ALUNO_FALHOU, current_id, detalhe=msg, segundos=perf_counter() - inicio_aluno)
+                    return
+
+                elementos_aulas = []
+
+                for aula in sessao.extrair_grade_aulas():
+                    texto = aula["numero"]
+                    if re.fullmatch(r'\d+', texto):
+                        if aula["fic"] and not process_fic:
+                            print(f"⚠️ Pulando aula {texto} - mais de 4 dígitos")
+                            aulas_processadas.append(f"Aula {texto} - Pulada (mais de 4 dígitos)")
+                            publicar(EventoProgresso.AULA_PULADA, current_id, aula=texto, resultado="Pulada", detalhe="mais de 4 dígitos")
+                            continue
+                        # Períodos desta aula que ainda não terminaram em execuções anteriores
+                        periodos_aula = [p for p in pendentes_aluno if texto not in p[3]]
+                        if not periodos_aula:
+                            aulas_processadas.append(f"Aula {texto} - Já concluída em execução anterior")
+                            continue
+                        # Datas da aula na grade: atestado que não cruza o período da aula não precisa de lançamento
+                        datas_aula = datas_da_aula(aula["texto"])
+                        for p in list(periodos_aula):
+                            if periodo_fora_da_aula(datas_aula, p[0], p[1]):
+                                anotar(texto, "Fora do período da aula", p[0], p[1])
+                                registrar_aula(p[2], texto, "Pulada", f"aula de {_fmt_data(datas_aula[0])} a {_fmt_data(datas_aula[1])}")
+                                periodos_aula.remove(p)
+                        if not periodos_aula:
+                            continue
+                        # A própria grade já mostra o período com a mesma razão: nem abre a aula
+                        for p in list(periodos_aula):
+                            if periodo_ja_lancado([aula["texto"]], p[0], p[1], selected_reason):
+                                anotar(texto, "Já lançado", p[0], p[1])
+                                somar("already_applied_count")
+                                registrar_aula(p[2], texto, "Já lançado", "grade")
+                                periodos_aula.remove(p)
+                        if not periodos_aula:
+                            continue
+                        # Aula já vista como FIC (por outro aluno ou em outra execução): nem abre
+                        conhecida = cache_aulas.consultar(texto, year)
+                        if conhecida in CacheClassificacao.PULADAS:
+                            print(f"⏭️ Aula {texto} já conhecida como {conhecida}. Pulando sem abrir.")
+                            anotar_todos(periodos_aula, texto, "Pulada (Matric + FIC)", CacheClassificacao.RESULTADO, f"{conhecida} (cache)")
+                            aulas_do_cache += 1
+                            continue
+                        elementos_aulas.append((aula, periodos_aula))
+
+                notify(f"Encontradas {len(elementos_aulas)} aulas válidas para o aluno {current_id}.")
+
+                # Agora vamos clicar um a um nos elementos de aula
+                for i, (aula, periodos_aula) in enumerate(elementos_aulas):
+                    wait_if_paused(); check_abort()
+                    numero_aula = aula["numero"]
+
+                    try:
+                        with medicao.etapa("abrir_aula", current_id, numero_aula):
+                            sessao.abrir_aula(aula)
+                        print(f"✅ Clicou no link do número da aula {i+1}: {numero_aula}")
+                    except Exception as e:
+                        conferir_sessao(e)
+                        print(f"❌ Erro ao clicar no link do elemento {i+1}: {e}")
+                        for _, _, chave, _ in periodos_aula:
+                            registrar_aula(chave, numero_aula, "Erro", str(e))
+                        aulas_com_erro += 1
+                        continue
+
+                    # Aqui dentro da página aberta, verifica se o texto "Matric" está presente
+                    try:
+                        texto_aula = sessao.ler_classificacao()
+                        # printar a informação que apararece em tabela_verificacao
+                        print(texto_aula)
+                        if texto_aula.strip():
+                            cache_aulas.registrar(numero_aula, year, CacheClassificacao.classificar(texto_aula))
+
+                        if "Matric" in texto_aula:
+                            # Verificar se também contém "FIC" - se sim, pular
+                            if "FIC" in texto_aula:
+                                print("⚠️ O texto 'Matric' foi encontrado, mas também contém 'FIC'. Pulando esta aula.")
+                                with medicao.etapa("voltar", current_id, numero_aula):
+                                    sessao.voltar_grade("voltar_fic")
+                                # Adicionar aula que foi pulada à lista
+                                anotar_todos(periodos_aula, numero_aula, "Pulada (Matric + FIC)", "Pulada", "Matric + FIC")
+                                continue
+
+                            print("✅ O texto 'Matric' foi encontrado na tabela (sem FIC).")
+                            linhas_pagina = sessao.ler_linhas_pagina()
+                            for inicio_txt, fim_txt, chave, _ in periodos_aula:
+                                if periodo_ja_lancado(linhas_pagina, inicio_txt, fim_txt, selected_reason):
+                                    print(f"⏭️ Aula {numero_aula} já tem {selected_reason} de {inicio_txt} a {fim_txt}. Nada a gravar.")
+                                    anotar(numero_aula, "Já lançado", inicio_txt, fim_txt)
+                                    somar("already_applied_count")
+                                    registrar_aula(chave, numero_aula, "Já lançado", "aula")
+                                    continue
+
+                                with medicao.etapa("lancar", current_id, numero_aula):
+                                    sessao.lancar_periodo(inicio_txt, fim_txt, selected_reason, selected_code)
+                                with medicao.etapa("salvar", current_id, numero_aula):
+                                    sessao.salvar()
+                                    # Só conta como lançado se a aula passou a mostrar o período (vai para o diário como final)
+                                    if not sessao.confirmar_lancamento(inicio_txt, fim_txt, selected_reason):
+                                        raise FalhaInteracao(f"Salvar não confirmado: {selected_reason} de {inicio_txt} a {fim_txt} não aparece na aula")
+
+                                # Adicionar aula processada com sucesso à lista
+                                anotar(numero_aula, "Lançamento realizado", inicio_txt, fim_txt)
+                                somar("processed_count")
+                                registrar_aula(chave, numero_aula, "Lançamento realizado")
+
+                            # clicar no link de voltar para a lista
+                            with medicao.etapa("voltar", current_id, numero_aula):
+                                sessao.voltar_grade("voltar")
+
+                        else:
+                            print("❌ O texto 'Matric' NÃO foi encontrado na tabela.")
+                            with medicao.etapa("voltar", current_id, numero_aula):
+                                sessao.voltar_grade("voltar")
+                            # Adicionar aula que não foi processada à lista
+                            anotar_todos(periodos_aula, numero_aula, "Não processada (sem Matric)", "Pulada", "sem Matric")
+
+                    except Exception as e:
+                        conferir_sessao(e)
+                        print(f"❌ Erro ao buscar a tabela: {e}")
+                        aulas_processadas.append(f"Aula {numero_aula} - Erro: {str(e)}")
+                        for _, _, chave, _ in periodos_aula:
+                            registrar_aula(chave, numero_aula, "Erro", str(e))
+                        aulas_com_erro += 1
+
+                    sessao.retornar_se_preciso()
+
+            except (StopRequested, SessaoExpirada):
+                raise
+            except Exception as e:
+                conferir_sessao(e)
+                status_processamento = "ERRO"
+                observacoes = f"Erro geral no processamento: {str(e)}"
+                log_manager.registrar_erro(current_id, str(e))
+                for _, _, chave, _ in pendentes_aluno:
+                    diario.registrar_aluno(chave, "erro")
+                registrar_resultado(False, f"aluno {current_id}")
+
+            # Registrar o lançamento no log para este aluno
+            if aulas_processadas:
+                observacoes_final = "Período: " + "; ".join(f"{p[0]} a {p[1]}" for p in pendentes_aluno)
+                if observacoes:
+                    observacoes_final += f" | {observacoes}"
+                log_manager.registrar_lancamento(current_id, aulas_processadas, status_processamento, observacoes_final)
+            else:
+                log_manager.registrar_lancamento(current_id, [], "SEM_AULAS", "Nenhuma aula foi encontrada para processar")
+
+            if status_processamento != "ERRO":
+                for _, _, chave, _ in pendentes_aluno:
+                    diario.registrar_aluno(chave, "parcial" if aulas_com_erro or aulas_do_cache else "concluido")
+            notify(f"Aluno {current_id} finalizado.")
+            if status_processamento == "ERRO":
+                publicar(EventoProgresso.ALUNO_FALHOU, current_id, detalhe=observacoes, segundos=perf_counter() - inicio_aluno)
+            else:
+                publicar(EventoProgresso.ALUNO_CONCLUIDO, current_id, resultado=("parcial" if aulas_com_erro or aulas_do_cache else "concluido"),
+                         segundos=perf_counter() - inicio_aluno)
+            with contadores_lock:
+                finalizados.add(current_id)
+
+            check_abort()
+            # Acessando lista de atividades por aluno; menu lento: mais uma tentativa antes de o worker
+            # reabrir a sessão (o aluno já terminou e não é repetido)
+            for tentativa in range(2):
+                try:
+                    with medicao.etapa("lista_atividades", current_id):
+                        sessao.abrir_lista_atividades()
+                    break
+                except Exception as e:
+                    conferir_sessao(e, aluno_finalizado=True)
+                    if tentativa == 1:
+                        raise
+                    print(f"🔁 Lista de atividades não abriu ({e}). Tentando de novo...")
+
+        encontrados = set()
+        # Alunos que já têm resultado nesta execução: se a sessão cair depois disso, não voltam para a fila
+        finalizados = set()
+        RELOGINS_POR_ALUNO = 2
+
+        def processar_com_relogin(sessao, prefixo, current_id, periodos):
+            """
+            Sessão expirada no meio do aluno: entra de novo com as mesmas credenciais, volta à pesquisa
+            e repete o aluno (as aulas já concluídas ficam no diário e não são refeitas).
+            """
+            for tentativa in range(RELOGINS_POR_ALUNO + 1):
+                try:
+                    processar_aluno(sessao, current_id, periodos)
+                    return
+                except SessaoExpirada as e:
+                    if tentativa == RELOGINS_POR_ALUNO:
+                        raise
+                    notify(f"{prefixo}Sessão do PeopleSoft expirada. Entrando novamente...")
+                    log_manager.registrar_erro(current_id, f"{e}: novo login" + ("" if e.aluno_finalizado else " e aluno repetido"))
+                    with medicao.etapa("login"):
+                        sessao.login(user, password)
+                    wait_if_paused(); check_abort()
+                    with medicao.etapa("lista_atividades"):
+                        sessao.abrir_lista_atividades()
+                    if e.aluno_finalizado:
+                        return
+                    notify(f"{prefixo}Repetindo o aluno {current_id}...")
+
+        def resultado_da_visita(current_id, periodos) -> str:
+            # Resultado do aluno no diário, para a fila compartilhada: o pior entre os períodos da visita
+            resultados = {diario.resultado_aluno(DiarioExecucao.chave(current_id, ini, fim, year, selected_reason, selected_code))
+                          for ini, fim in periodos}
+            for resultado in ("erro", "nao_encontrado", "parcial"):
+                if resultado in resultados:
+                    return resultado
+            return "concluido" if resultados == {"concluido"} else "erro"
+
+        # Fila compartilhada: cada worker retira o próximo aluno livre
+        caminho_fila = (config.get("shared_queue_path") if config else None) or salvas.get("shared_queue_path")
+        if caminho_fila:
+            # Várias máquinas na mesma planilha: os alunos vêm de um SQLite comum, com lease por aluno
+            def ao_retomar(id_aluno, dono_anterior):
+                notify(f"Aluno {id_aluno}: lease de {dono_anterior} venceu; retomando aqui.")
+                log_manager.registrar_erro(id_aluno, f"Lease vencido na fila compartilhada (dono anterior: {dono_anterior})")
+
+            lote = (config.get("shared_queue_batch") if config else None) or FilaCompartilhada.lote_da_planilha(visitas, year, selected_reason, selected_code)
+            fila = fila_compartilhada = FilaCompartilhada(
+                caminho_fila, lote, float((config.get("shared_queue_lease") if config else None) or salvas.get("shared_queue_lease") or 120),
+                ao_retomar,
+            )
+            fila_compartilhada.popular(visitas)
+            notify(f"Fila compartilhada {caminho_fila} (lote {lote}, esta máquina: {fila_compartilhada.dono}).")
         else:
-            # Retomar
-            self.resume_event.set()
-            self.is_paused = False
-            self.pause_btn.configure(text="Pausar")
-            self.status_var.set("Retomando...")
-
-    def on_stop(self):
-        if not self.is_running:
-            return
-        if messagebox.askyesno("Parar", "Deseja interromper o processamento atual?"):
-            self.stop_event.set()
-            self.resume_event.set()  # garante sair da pausa
-            self.status_var.set("Parando... aguarde a etapa atual finalizar.")
-            # Botões: desabilita parar para evitar múltiplos cliques
-            self.stop_btn.configure(state=tk.DISABLED)
-
-    def on_restart(self):
-        if self.is_running:
-            if not messagebox.askyesno("Reiniciar", "Isso vai interromper a execução atual e iniciar do começo da planilha. Continuar?"):
+            fila = Queue()
+        retomados = 0
+        for current_id, periodos in visitas:
+            if all(diario.aluno_concluido(DiarioExecucao.chave(current_id, ini, fim, year, selected_reason, selected_code)) for ini, fim in periodos):
+                retomados += 1
+                notify(f"Aluno {current_id} finalizado. (concluído em execução anterior)")
+                publicar(EventoProgresso.ALUNO_CONCLUIDO, current_id, resultado="concluido", detalhe="execução anterior")
+                if fila_compartilhada is not None:
+                    fila_compartilhada.concluir(current_id, forcar=True)
+                continue
+            if fila_compartilhada is None:
+                fila.put((current_id, periodos))
+        contadores["resumed_count"] = retomados
+        contadores["rejected_count"] = len(rejeitados)
+        if retomados:
+            notify(f"Retomando: {retomados} alunos já concluídos foram pulados.")
+        workers = min(workers, max(1, fila.qsize()))
+        sessoes_ativas = []
+        falhas = []
+
+        url_lock = threading.Lock()
+
+        def lembrar_url_componente(url_portal):
+            # A URL descoberta pelo navegador vira a URL do motor HTTP nas próximas execuções
+            url_conteudo = url_portal.replace("/psp/", "/psc/", 1)
+            with url_lock:
+                s = load_settings()
+                if s.get("url_componente") != url_conteudo:
+                    s["url_componente"] = url_conteudo
+                    save_settings(s)
+
+        def abrir_sessao(prefixo, n=1):
+            """
+            Cria e loga a sessão do motor escolhido. O navegador é o fallback do motor HTTP.
+            """
+            if motor == "http":
+                sessao = SessaoHttp(registro_esperas, url_base, url_componente)
+                try:
+                    notify(f"{prefixo}Realizando login (HTTP)...")
+                    with medicao.etapa("login"):
+                        sessao.login(user, password)
+                    wait_if_paused(); check_abort()
+                    notify(f"{prefixo}Acessando lista de atividades por aluno...")
+                    with medicao.etapa("lista_atividades"):
+                        sessao.abrir_lista_atividades()
+                    return sessao
+                except StopRequested:
+                    sessao.fechar()
+                    raise
+                except Exception as e:
+                    sessao.fechar()
+                    notify(f"{prefixo}Motor HTTP indisponível ({e}). Usando o navegador.")
+
+            perfil = pasta_perfil_sessao(pasta_perfil, n)
+            with medicao.etapa("navegador"):
+                sessao = None
+                if navegador_reserva is not None and n == 1:
+                    sessao = navegador_reserva.retirar(registro_esperas, url_base, headless, perfil_leve, perfil)
+                    if sessao is not None:
+                        notify(f"{prefixo}Usando o navegador já aberto.")
+                if sessao is None:
+                    sessao = SessaoSelenium(registro_esperas, url_base, headless, perfil_leve, perfil)
+            try:
+                if perfil:
+                    with medicao.etapa("login"):
+                        # A URL salva é a do conteúdo (/psc/); com os cookies do perfil o portal (/psp/) abre direto
+                        retomada = sessao.retomar_sessao((url_componente or url_base.rstrip("/") + CAMINHO_COMPONENTE).replace("/psc/", "/psp/", 1))
+                    if retomada:
+                        notify(f"{prefixo}Sessão anterior ainda válida: login dispensado.")
+                        return sessao
+                notify(f"{prefixo}Abrindo página de login...")
+                notify(f"{prefixo}Realizando login...")
+                with medicao.etapa("login"):
+                    sessao.login(user, password)
+
+                wait_if_paused(); check_abort()
+                notify(f"{prefixo}Acessando lista de atividades por aluno...")
+                with medicao.etapa("lista_atividades"):
+                    sessao.abrir_lista_atividades()
+            except BaseException:
+                sessao.fechar()
+                raise
+            if sessao.url_componente:
+                lembrar_url_componente(sessao.url_componente)
+            return sessao
+
+        REABERTURAS_POR_ALUNO = 2
+        reaberturas = {}
+
+        def devolver_aluno(registro, erro):
+            """
+            A sessão caiu no meio do aluno: ele volta para a fila (no máximo REABERTURAS_POR_ALUNO vezes)
+            """
+            current_id, periodos = registro
+            with contadores_lock:
+                terminado = current_id in finalizados
+                vezes = reaberturas[current_id] = reaberturas.get(current_id, 0) + 1
+            if terminado:
+                # Só a volta para a pesquisa falhou: o resultado do aluno já está no diário
+                if fila_compartilhada is not None:
+                    fila_compartilhada.concluir(current_id, resultado_da_visita(current_id, periodos))
+                return
+            if vezes <= REABERTURAS_POR_ALUNO:
+                log_manager.registrar_erro(current_id, f"Sessão perdida ({erro}); aluno devolvido para a fila")
+                if fila_compartilhada is not None:
+                    fila_compartilhada.liberar(current_id)
+                else:
+                    fila.put(registro)
                 return
-            self.pending_restart = True
-            self.on_stop()
+            msg = f"Aluno não processado: a sessão caiu {vezes} vezes nele ({erro})"
+            log_manager.registrar_erro(current_id, msg)
+            for ini, fim in periodos:
+                diario.registrar_aluno(DiarioExecucao.chave(current_id, ini, fim, year, selected_reason, selected_code), "erro")
+            notify(f"Aluno {current_id}: {msg}")
+            publicar(EventoProgresso.ALUNO_FALHOU, current_id, detalhe=msg)
+            if fila_compartilhada is not None:
+                fila_compartilhada.concluir(current_id, "erro")
+
+        def worker(n):
+            prefixo = f"Sessão {n}: " if workers > 1 else ""
+            sessao = None
+            try:
+                # Escalona os logins para não abrir todos os navegadores no mesmo instante
+                for _ in range(n - 1):
+                    wait_if_paused(); check_abort()
+                    sleep(1)
+                check_abort()
+                sessao = abrir_sessao(prefixo, n)
+                with contadores_lock:
+                    sessoes_ativas.append(n)
+
+                while True:
+                    wait_if_paused(); check_abort()
+                    if controle is not None:
+                        controle.aguardar_vez(n, lambda: (wait_if_paused(), check_abort()), fila.empty)
+                    try:
+                        registro = fila.get_nowait()
+                    except Empty:
+                        # Alunos ainda com outras máquinas voltam para a fila se o lease delas vencer
+                        if fila_compartilhada is not None and fila_compartilhada.com_outros():
+                            sleep(fila_compartilhada.intervalo_espera)
+                            continue
+                        break
+                    try:
+                        with medicao.etapa("aluno", registro[0]):
+                            processar_com_relogin(sessao, prefixo, *registro)
+                    except StopRequested:
+                        if fila_compartilhada is not None:
+                            fila_compartilhada.liberar(registro[0])
+                        raise
+                    except Exception as e:
+                        # Navegação, menu ou navegador: o aluno volta para a fila e a sessão é aberta de novo
+                        notify(f"{prefixo}Falha na sessão durante o aluno {registro[0]}: {e}. Abrindo a sessão de novo...")
+                        registrar_resultado(False, f"sessão {n}")
+                        devolver_aluno(registro, e)
+                        sessao.fechar()
+                        sessao = None
+                        sessao = abrir_sessao(prefixo, n)
+                        continue
+                    except BaseException:
+                        if fila_compartilhada is not None:
+                            fila_compartilhada.liberar(registro[0])
+                        raise
+                    if fila_compartilhada is not None:
+                        fila_compartilhada.concluir(registro[0], resultado_da_visita(*registro))
+            except StopRequested:
+                notify(f"{prefixo}Parada solicitada. Encerrando processamento atual...")
+            except Exception as e:
+                notify(f"{prefixo}Falha na sessão: {e}")
+                with contadores_lock:
+                    falhas.append(e)
+                registrar_resultado(False, f"sessão {n}")
+            finally:
+                if sessao is not None:
+                    sessao.fechar()
+
+        notify(f"Iniciando processamento de {len(visitas)} alunos ({len(registros)} linhas da planilha)...")
+        if fila_compartilhada is not None:
+            fila_compartilhada.iniciar_heartbeat()
+        if fila.empty() and not (fila_compartilhada is not None and fila_compartilhada.com_outros()):
+            pass
+        elif workers > 1:
+            notify(f"Usando {workers} sessões em paralelo.")
+            threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(1, workers + 1)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
         else:
-            self.on_start()
+            worker(1)
+
+        feitos_por_outros = 0
+        if fila_compartilhada is not None:
+            for id_aluno, resultado in fila_compartilhada.finalizados_por_outros():
+                if resultado in ("concluido", "parcial"):
+                    feitos_por_outros += 1
+                    publicar(EventoProgresso.ALUNO_CONCLUIDO, id_aluno, resultado=resultado, detalhe="outra máquina")
+                else:
+                    publicar(EventoProgresso.ALUNO_FALHOU, id_aluno, resultado=resultado, detalhe=f"outra máquina ({resultado})")
+            if feitos_por_outros:
+                notify(f"{feitos_por_outros} alunos foram processados por outras máquinas.")
+
+        # Todas as sessões caíram com alunos ainda na fila: a execução não terminou
+        nao_processados = []
+        if not stop_event.is_set() and sessoes_ativas:
+            if fila_compartilhada is not None:
+                nao_processados = fila_compartilhada.pendentes()
+            else:
+                while not fila.empty():
+                    nao_processados.append(fila.get_nowait()[0])
+        for id_aluno in nao_processados:
+            publicar(EventoProgresso.ALUNO_FALHOU, id_aluno, detalhe="Não processado: as sessões caíram antes de chegar a este aluno")
+            log_manager.registrar_erro(id_aluno, "Não processado: as sessões caíram antes de chegar a este aluno")
+
+        log_manager.registrar_esperas(registro_esperas.resumo())
+        log_manager.registrar_relatorio(medicao.relatorio())
+        if stop_event.is_set():
+            situacao = "interrompida"
+        elif (falhas and not sessoes_ativas) or nao_processados:
+            situacao = "falhou"
+        else:
+            situacao = "concluida"
+        if situacao != "falhou":
+            detalhe = ""
+        elif nao_processados:
+            detalhe = f"{len(nao_processados)} alunos não processados" + (f" ({falhas[-1]})" if falhas else "")
+        else:
+            detalhe = str(falhas[0])
+        publicar(EventoProgresso.EXECUCAO_FINALIZADA, resultado=situacao, segundos=perf_counter() - inicio_execucao, detalhe=detalhe)
+        if stop_event.is_set():
+            notify("Execução interrompida pelo usuário.")
+            return None
+        # Nenhuma sessão conseguiu abrir: propaga o erro para a UI
+        if falhas and not sessoes_ativas:
+            raise falhas[0]
+
+        found_count = contadores["found_count"]
+        if contadores["already_applied_count"]:
+            notify(f"{contadores['already_applied_count']} aulas já estavam lançadas e não foram regravadas.")
+        if nao_processados:
+            notify(f"⚠️ {len(nao_processados)} alunos ficaram sem processar porque as sessões caíram ({detalhe}). "
+                   "Verifique o log e execute de novo para continuar.")
+        elif found_count == 0 and not retomados and not feitos_por_outros:
+            if year:
+                notify(f"Nenhuma linha encontrada para EMÉDIO {year}.")
+            else:
+                notify("Nenhuma linha encontrada.")
+        else:
+            notify("🎉 Processamento concluído! Verifique o arquivo de log na pasta 'log'.")
+        return {"found_count": found_count, "processed_count": contadores["processed_count"], "not_found_count": contadores["not_found_count"], "already_applied_count": contadores["already_applied_count"], "resumed_count": retomados, "rejected_count": len(rejeitados), "shared_done_count": feitos_por_outros, "unprocessed_count": len(nao_processados), "year": year}
+    finally:
+        # Esvazia a fila do log e solta os arquivos mesmo se a execução cair no meio
+        if fila_compartilhada is not None:
+            fila_compartilhada.fechar()
+        log_manager.fechar()
+        if cache_alunos is not None:
+            cache_alunos.fechar()
 
-    def on_close(self):
-        if self.is_running:
-            if not messagebox.askyesno("Sair", "A automação ainda está em execução. Deseja encerrar mesmo assim?"):
-                return
-            # Solicita parada
-            self.stop_event.set()
-            self.resume_event.set()
+
+def executar_linha_de_comando(argv=None) -> int:
+    """
+    Modo sem janela: roda processar_atestados direto, mostra o progresso no stdout e termina com
+    um resumo JSON na última linha. Credenciais: AUTOATESTADO_USUARIO/AUTOATESTADO_SENHA ou as salvas.
+    Saída: 0 = concluído, 1 = concluído com alunos não encontrados/falhas, 2 = erro, 3 = interrompido.
+    """
+    salvas = load_settings()
+    parser = argparse.ArgumentParser(prog="AutoAtestado", description="Lança atestados sem abrir a janela")
+    parser.add_argument("planilha", nargs="?", default=None, help="atestados.xlsx ou .csv (padrão: o da pasta atual)")
+    parser.add_argument("--ano", default=salvas.get("search_year"), help="ano da matrícula EMÉDIO")
+    parser.add_argument("--razao", choices=RAZOES_AUSENCIA, default=salvas.get("attend_reason"))
+    parser.add_argument("--codigo-amparo", default=salvas.get("amparo_code"), help="código do motivo (Amparo Legal)")
+    parser.add_argument("--sessoes", type=int, default=salvas.get("workers", 1), help="sessões em paralelo")
+    parser.add_argument("--motor", choices=("selenium", "http"), default=salvas.get("engine", "selenium"))
+    parser.add_argument("--mostrar-navegador", action="store_true", help="abre o Chrome visível (padrão: oculto)")
+    parser.add_argument("--perfil-leve", action="store_true", default=salvas.get("lean_profile", False))
+    parser.add_argument("--perfil-chrome", default=salvas.get("chrome_profile_dir"), help="pasta de perfil do Chrome que guarda a sessão entre execuções")
+    parser.add_argument("--fic", action="store_true", help="lança amparo também em aulas FIC")
+    parser.add_argument("--diario", default="diario_atestados.jsonl", help="arquivo de retomada (um por execução simultânea)")
+    parser.add_argument("--adaptativo", action="store_true", default=salvas.get("adaptive_concurrency", False),
+                        help="--sessoes vira o teto: as sessões ativas sobem e descem conforme latência e erros")
+    parser.add_argument("--fila-compartilhada", default=salvas.get("shared_queue_path"),
+                        help="SQLite numa pasta comum: várias máquinas/processos dividem a mesma planilha")
+    parser.add_argument("--eventos-json", action="store_true", help="mostra cada evento como uma linha JSON")
+    parser.add_argument("--resumo", help="grava também o resumo JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    saida = sys.stdout
+    resumo = {"found_count": 0, "processed_count": 0, "not_found_count": 0}
+
+    def terminar(codigo: int, situacao: str, erro: str = "") -> int:
+        resumo.update({"status": situacao, "exit_code": codigo})
+        if erro:
+            resumo["error"] = erro
+        texto = json.dumps(resumo, ensure_ascii=False)
+        print(texto, file=saida, flush=True)
+        if args.resumo:
+            try:
+                with open(args.resumo, "w", encoding="utf-8") as f:
+                    f.write(texto + "\n")
+            except OSError as e:
+                print(f"❌ Erro ao gravar resumo: {e}", file=sys.stderr)
+        return codigo
+
+    if not args.ano or not args.razao or (args.razao == "Amparo Legal" and not args.codigo_amparo):
+        return terminar(2, "erro", "Informe --ano, --razao e --codigo-amparo (ou salve-os em Config)")
+    user = os.getenv("AUTOATESTADO_USUARIO")
+    password = os.getenv("AUTOATESTADO_SENHA")
+    if not (user and password):
+        user, password = load_saved_credentials()
+    if not (user and password):
+        return terminar(2, "erro", "Credenciais ausentes: defina AUTOATESTADO_USUARIO e AUTOATESTADO_SENHA ou salve-as pela janela")
+
+    canal = CanalProgresso()
+    com_falha = set()
+
+    def mostrar(evento):
+        if args.eventos_json:
+            print(json.dumps(evento.como_dict(), ensure_ascii=False), file=saida, flush=True)
+        elif evento.tipo == EventoProgresso.MENSAGEM:
+            print(evento.mensagem, file=saida, flush=True)
+        if evento.contadores:
+            resumo.update(evento.contadores)
+        if evento.tipo == EventoProgresso.ALUNO_FALHOU:
+            com_falha.add(evento.id_aluno)
+        elif evento.tipo == EventoProgresso.ALUNO_CONCLUIDO:
+            com_falha.discard(evento.id_aluno)
+        resumo["failed_count"] = len(com_falha)
+
+    canal.assinar(mostrar)
+    cfg = {
+        "attend_reason": args.razao, "amparo_code": args.codigo_amparo, "search_year": str(args.ano),
+        "workers": args.sessoes, "engine": args.motor, "headless": not args.mostrar_navegador,
+        "lean_profile": args.perfil_leve, "journal_path": args.diario, "chrome_profile_dir": args.perfil_chrome,
+        "shared_queue_path": args.fila_compartilhada, "adaptive_concurrency": args.adaptativo,
+    }
+    stop_event = threading.Event()
+    resultado = {}
+
+    def rodar():
+        # Os prints de depuração vão para o stderr; o stdout fica só com o progresso e o resumo
         try:
-            pass
-        finally:
-            self.destroy()
+            with redirect_stdout(sys.stderr):
+                resultado["valor"] = processar_atestados(
+                    user, password, stop_event=stop_event, excel_path=args.planilha or localizar_planilha(),
+                    config=cfg, process_fic=args.fic, canal=canal,
+                )
+        except Exception as e:
+            resultado["erro"] = e
+
+    execucao = threading.Thread(target=rodar, daemon=True)
+    execucao.start()
+    try:
+        while execucao.is_alive():
+            execucao.join(0.5)
+    except KeyboardInterrupt:
+        print("Parada solicitada. Encerrando processamento atual...", file=saida, flush=True)
+        stop_event.set()
+        execucao.join()
+
+    if "erro" in resultado:
+        return terminar(2, "erro", str(resultado["erro"]))
+    valor = resultado.get("valor")
+    if valor is None:
+        return terminar(3, "interrompido")
+    resumo.update({k: v for k, v in valor.items() if k != "year"})
+    if valor["unprocessed_count"]:
+        return terminar(2, "falhou", f"{valor['unprocessed_count']} alunos não foram processados: as sessões caíram")
+    if com_falha or valor["found_count"] + valor["resumed_count"] + valor["shared_done_count"] == 0:
+        return terminar(1, "concluido_com_pendencias")
+    return terminar(0, "concluido")
+
+
+META_INICIO_S = 1.0
+
+
+def medir_inicio() -> int:
+    """
+    --tempo-inicio: abre a janela, mede o tempo até ela aparecer e até a prévia da planilha carregar, e fecha.
+    Saída 0 se a janela apareceu dentro de META_INICIO_S sem ter importado o Selenium.
+    """
+    from interface import App
+    app = App(preaquecer=False)
+    app.update()
+    janela_s = perf_counter() - INICIO_PROCESSO
+    app._aguardar_planilha()
+    app.update()
+    planilha_s = perf_counter() - INICIO_PROCESSO
+    selenium_importado = "selenium" in sys.modules
+    linhas = len(app.planilha_preview)
+    app.destroy()
+    ok = janela_s <= META_INICIO_S and not selenium_importado
+    print(json.dumps({
+        "janela_s": round(janela_s, 3), "planilha_s": round(planilha_s, 3), "linhas_planilha": linhas,
+        "meta_s": META_INICIO_S, "selenium_importado": selenium_importado, "ok": ok,
+    }, ensure_ascii=False))
+    return 0 if ok else 1
 
 
 if __name__ == '__main__':
+    # interface.py importa este arquivo como `main`: sem o apelido ele seria executado uma segunda vez
+    sys.modules.setdefault("main", sys.modules[__name__])
+    if sys.argv[1:] == ["--tempo-inicio"]:
+        sys.exit(medir_inicio())
+    # Com argumentos roda sem janela (agendamentos, servidores); sem argumentos abre a interface
+    if len(sys.argv) > 1:
+        sys.exit(executar_linha_de_comando(sys.argv[1:]))
+    from interface import App
     app = App()
     app.mainloop()
@@ -0,0 +1,412 @@
+"""
+Servidor local que imita as páginas do PeopleSoft usadas pelo AutoAtestado
+(login, portal, pesquisa PTSRCHRESULTS, grade STDNT_ENRL, bloco ACE_DERIVED_AA2_
+e aba DIG_APR_EST_WRK_*). Permite testar os motores HTTP e Selenium sem acessar
+dados reais do SENAC.
+
+Uso: python servidor_teste.py --porta 8765 --alunos 20 --aulas 8 --latencia 0.05
+Depois, em settings.json: "url_base": "http://127.0.0.1:8765"
+"""
+import argparse
+import html
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from urllib.parse import parse_qs, urlsplit
+
+CAMINHO_LOGIN = '/psp/cs90pss/'
+CAMINHO_PORTAL_COMPONENTE = '/psp/cs90pss/EMPLOYEE/HRMS/c/CURRICULUM_MANAGEMENT.HC_STDNT_ATTENDANCE.GBL'
+CAMINHO_COMPONENTE = '/psc/cs90pss/EMPLOYEE/HRMS/c/CURRICULUM_MANAGEMENT.HC_STDNT_ATTENDANCE.GBL'
+CAMINHO_HOME = '/psc/cs90pss/EMPLOYEE/HRMS/h/'
+
+RAZOES = [("01", "Amparo Legal"), ("02", "Aproveitamento de Estudos"), ("03", "Matrícula Fora do Prazo")]
+
+
+def gerar_alunos(quantidade: int = 20, aulas_por_aluno: int = 8, ano: str = "2025", primeiro_id: int = 1000001, variacao: int = 0,
+                 semestral: bool = False) -> dict:
+    """
+    Massa sintética: cada aluno tem uma matrícula EMÉDIO no ano e `aulas_por_aluno` aulas
+    (± `variacao`, de forma determinística). A cada 4 aulas uma é FIC (5 dígitos, "Matric FIC")
+    e a cada 5 uma não é Matric. Com semestral=True as aulas ímpares só vão de agosto a dezembro.
+    """
+    alunos = {}
+    for n in range(quantidade):
+        emplid = str(primeiro_id + n)
+        aulas = []
+        total = max(1, aulas_por_aluno + (n % (2 * variacao + 1)) - variacao) if variacao else aulas_por_aluno
+        for k in range(total):
+            if k % 4 == 3:
+                numero, tipo = str(50000 + k), "Matric FIC"
+            elif k % 5 == 4:
+                numero, tipo = str(2000 + k), "Ouvinte"
+            else:
+                numero, tipo = str(1000 + k), "Matric"
+            if semestral and k % 2:
+                numero = str(int(numero) + 100)
+                inicio, fim = f"01/08/{ano}", f"12/12/{ano}"
+            else:
+                inicio, fim = f"03/02/{ano}", (f"30/06/{ano}" if semestral else f"12/12/{ano}")
+            aulas.append({"numero": numero, "tipo": tipo, "inicio": inicio, "fim": fim})
+        alunos[emplid] = {
+            "nome": f"Aluno Teste {n + 1}",
+            "programas": [f"TÉCNICO {int(ano) - 1}", f"EMÉDIO {ano}"],
+            "aulas": aulas,
+        }
+    return alunos
+
+
+class EstadoSessao:
+    def __init__(self):
+        self.pagina = "pesquisa"
+        self.state_num = 1
+        self.emplid = ""
+        self.aula = None
+        self.pendente = None
+        self.mensagem = ""
+        self.requisicoes = 0
+
+
+class ServidorPeopleSoftTeste:
+    def __init__(self, alunos: dict = None, porta: int = 0, latencia: float = 0.0, usuario: str = None, senha: str = None,
+                 latencia_acoes: dict = None, expirar_apos: int = 0, capacidade: int = 0):
+        """
+        porta=0 escolhe uma porta livre; veja url_base depois de iniciar()
+        latencia_acoes soma um atraso extra por ICAction (ex.: {"#ICSave": 0.8, "#ICSearch": 0.3})
+        expirar_apos derruba cada sessão depois de N requisições feitas com ela (simula o timeout do PeopleSoft)
+        capacidade limita quantas requisições são atendidas ao mesmo tempo: com mais sessões que isso a latência sobe
+        """
+        self.alunos = alunos if alunos is not None else gerar_alunos()
+        self.latencia = latencia
+        self.latencia_acoes = latencia_acoes or {}
+        self.expirar_apos = expirar_apos
+        self.expiradas = 0
+        self._vagas = threading.Semaphore(capacidade) if capacidade else None
+        self.usuario = usuario
+        self.senha = senha
+        self.sessoes = {}
+        self.lancamentos = []
+        self.requisicoes = 0
+        self._lock = threading.Lock()
+        servidor = self
+
+        class Handler(_HandlerPeopleSoft):
+            pass
+        Handler.servidor = servidor
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", porta), Handler)
+        self.httpd.daemon_threads = True
+        self.url_base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+def _pagina(titulo: str, corpo: str) -> str:
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(titulo)}</title>
+<script>
+function submitAction_win0(f, a) {{ document.getElementById('processing').style.visibility = 'visible'; f.ICAction.value = a; f.submit(); }}
+function hAction_win0(f, a) {{ submitAction_win0(f, a); }}
+</script></head>
+<body><div id="processing" style="visibility:hidden">Processando...</div>
+{corpo}
+</body></html>"""
+
+
+def _link(id_link: str, texto: str, acao: str = None) -> str:
+    acao = acao or id_link
+    return f"""<a id="{html.escape(id_link)}" href="javascript:submitAction_win0(document.win0,'{html.escape(acao)}');">{html.escape(texto)}</a>"""
+
+
+class _HandlerPeopleSoft(BaseHTTPRequestHandler):
+    servidor = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    # ---- infraestrutura -------------------------------------------------
+    def _responder(self, corpo: str, status: int = 200, cookie: str = None):
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        if cookie:
+            self.send_header("Set-Cookie", f"PS_TOKEN={cookie}; Path=/")
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _token(self) -> str:
+        for parte in (self.headers.get("Cookie") or "").split(";"):
+            nome, _, valor = parte.strip().partition("=")
+            if nome == "PS_TOKEN":
+                return valor
+        return ""
+
+    def _sessao(self):
+        sessao = self.servidor.sessoes.get(self._token())
+        if sessao is not None and self.servidor.expirar_apos:
+            sessao.requisicoes += 1
+            if sessao.requisicoes > self.servidor.expirar_apos:
+                with self.servidor._lock:
+                    self.servidor.sessoes.pop(self._token(), None)
+                    self.servidor.expiradas += 1
+                return None
+        return sessao
+
+    def _campos(self) -> dict:
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        corpo = self.rfile.read(tamanho).decode("utf-8") if tamanho else ""
+        return {k: v[0] for k, v in parse_qs(corpo, keep_blank_values=True).items()}
+
+    def _antes(self):
+        with self.servidor._lock:
+            self.servidor.requisicoes += 1
+        if self.servidor.latencia:
+            self._trabalhar(self.servidor.latencia)
+
+    def _trabalhar(self, segundos: float):
+        # O atraso simula o trabalho do servidor: com capacidade, só N requisições trabalham ao mesmo tempo
+        if self.servidor._vagas is None:
+            sleep(segundos)
+            return
+        with self.servidor._vagas:
+            sleep(segundos)
+
+    # ---- GET ------------------------------------------------------------
+    def do_GET(self):
+        self._antes()
+        partes = urlsplit(self.path)
+        consulta = parse_qs(partes.query)
+        if partes.path == CAMINHO_LOGIN and consulta.get("cmd", [""])[0] == "logout":
+            self.servidor.sessoes.pop(self._token(), None)
+            return self._responder(self._html_login())
+        if partes.path == CAMINHO_LOGIN:
+            return self._responder(self._html_login())
+        sessao = self._sessao()
+        if sessao is None:
+            return self._responder(self._html_login())
+        if partes.path == CAMINHO_PORTAL_COMPONENTE:
+            return self._responder(self._html_portal(CAMINHO_COMPONENTE))
+        if partes.path == CAMINHO_COMPONENTE:
+            sessao.pagina = "pesquisa"
+            sessao.emplid = ""
+            return self._responder(self._html_componente(sessao))
+        if partes.path.startswith(CAMINHO_HOME):
+            return self._responder(_pagina("Home", "<p>Bem-vindo</p>"))
+        return self._responder(_pagina("Não encontrado", "<p>404</p>"), status=404)
+
+    # ---- POST -----------------------------------------------------------
+    def do_POST(self):
+        self._antes()
+        partes = urlsplit(self.path)
+        campos = self._campos()
+        if partes.path == CAMINHO_LOGIN:
+            usuario = campos.get("userid", "")
+            senha = campos.get("pwd", "")
+            esperado_u, esperado_s = self.servidor.usuario, self.servidor.senha
+            if not usuario or not senha or (esperado_u and usuario != esperado_u) or (esperado_s and senha != esperado_s):
+                return self._responder(self._html_login("Usuário ou senha inválidos"))
+            token = uuid.uuid4().hex
+            self.servidor.sessoes[token] = EstadoSessao()
+            return self._responder(self._html_portal(CAMINHO_HOME), cookie=token)
+        sessao = self._sessao()
+        if sessao is None:
+            return self._responder(self._html_login())
+        if partes.path == CAMINHO_COMPONENTE:
+            self._executar_acao(sessao, campos)
+            return self._responder(self._html_componente(sessao))
+        return self._responder(_pagina("Não encontrado", "<p>404</p>"), status=404)
+
+    def _executar_acao(self, sessao: EstadoSessao, campos: dict):
+        acao = campos.get("ICAction", "")
+        if self.servidor.latencia_acoes.get(acao):
+            self._trabalhar(self.servidor.latencia_acoes[acao])
+        sessao.mensagem = ""
+        aluno = self.servidor.alunos.get(sessao.emplid)
+        if acao == "#ICSearch":
+            sessao.emplid = campos.get("OR_ATND_SRCH_EMPLID", "").strip()
+            sessao.pagina = "resultados"
+        elif acao.startswith("#ICRow") and sessao.pagina == "resultados":
+            programas = aluno["programas"] if aluno else []
+            try:
+                programa = programas[int(acao[len("#ICRow"):])]
+            except (ValueError, IndexError):
+                programa = ""
+            if "EMÉDIO" in programa.upper():
+                sessao.pagina = "grade"
+        elif acao.startswith("CLASS_NBR$") and aluno and sessao.pagina == "grade":
+            try:
+                sessao.aula = aluno["aulas"][int(acao[len("CLASS_NBR$"):])]
+                sessao.pagina = "aula"
+            except (ValueError, IndexError):
+                pass
+        elif acao in ("#ICPanel1", "ICTAB_1") and sessao.pagina in ("aula", "aba"):
+            sessao.pagina = "aba"
+        elif acao == "DIG_APR_EST_WRK_PROCESS_BTN" and sessao.pagina == "aba":
+            razao = dict(RAZOES).get(campos.get("DIG_APR_EST_WRK_ATTEND_REASON", ""), "")
+            sessao.pendente = {
+                "emplid": sessao.emplid,
+                "aula": sessao.aula["numero"],
+                "inicio": campos.get("DIG_APR_EST_WRK_START_DT", ""),
+                "fim": campos.get("DIG_APR_EST_WRK_END_DT", ""),
+                "razao": razao,
+                "codigo": campos.get("DIG_APR_EST_WRK_REASON_DESCR", ""),
+            }
+            sessao.mensagem = "Período aplicado. Salve para confirmar."
+        elif acao == "#ICSave" and sessao.pendente:
+            with self.servidor._lock:
+                self.servidor.lancamentos.append(sessao.pendente)
+            sessao.pendente = None
+            sessao.mensagem = "Salvo."
+        elif acao == "DERIVED_AA2_DERIVED_LINK10$0" and sessao.pagina in ("aula", "aba"):
+            sessao.pagina = "grade"
+            sessao.aula = None
+            sessao.pendente = None
+
+    # ---- HTML -----------------------------------------------------------
+    def _html_login(self, erro: str = "") -> str:
+        aviso = f'<p class="erro">{html.escape(erro)}</p>' if erro else ""
+        divs = "".join(f"<div>{c}</div>" for c in [
+            aviso,
+            '<label for="userid">Usuário</label>',
+            '<input type="text" id="userid" name="userid">',
+            '<label for="pwd">Senha</label>',
+            '<input type="password" id="pwd" name="pwd">',
+            '<input type="hidden" name="timezoneOffset" value="180">',
+            "",
+            '<input type="submit" name="Submit" value="Entrar">',
+        ])
+        return _pagina("Login", f"""<form id="login" name="login" method="post" action="{CAMINHO_LOGIN}?cmd=login&amp;languageCd=POR">
+<div><div>{divs}</div></div></form>""")
+
+    def _html_portal(self, conteudo: str) -> str:
+        menu = f"""<div id="pthnav">
+<a id="pthnavbca_PORTAL_ROOT_OBJECT" href="#">Menu</a>
+<a id="fldra_HCSR_CURRICULUM_MANAGEMENT" href="#">Gestão Curricular</a>
+<a id="fldra_HCSR_ATTENDANCE_ROSTER" href="#">Lista de Frequência</a>
+<ul><li id="crefli_HC_STDNT_ATTENDANCE_GBL"><a href="{CAMINHO_PORTAL_COMPONENTE}" target="_top">Atividades por Aluno</a></li></ul>
+</div>"""
+        return _pagina("Portal", f"""{menu}
+<iframe id="ptifrmtgtframe" name="TargetContent" src="{conteudo}" width="100%" height="600"></iframe>""")
+
+    def _html_componente(self, sessao: EstadoSessao) -> str:
+        sessao.state_num += 1
+        aluno = self.servidor.alunos.get(sessao.emplid)
+        if sessao.pagina == "pesquisa":
+            corpo = self._html_pesquisa(sessao)
+        elif sessao.pagina == "resultados":
+            corpo = self._html_pesquisa(sessao) + self._html_resultados(aluno)
+        elif sessao.pagina == "grade":
+            corpo = self._html_grade(aluno)
+        else:
+            corpo = self._html_aula(sessao)
+        if sessao.mensagem:
+            corpo += f'<div id="ALERTMSG">{html.escape(sessao.mensagem)}</div>'
+        return _pagina("Atividades por Aluno", f"""<form name="win0" id="win0" method="post" action="{CAMINHO_COMPONENTE}">
+<input type="hidden" name="ICType" value="Panel">
+<input type="hidden" name="ICElementNum" value="0">
+<input type="hidden" name="ICStateNum" value="{sessao.state_num}">
+<input type="hidden" name="ICAction" value="None">
+<input type="hidden" name="ICSID" value="{id(sessao)}">
+{corpo}
+</form>""")
+
+    def _html_pesquisa(self, sessao: EstadoSessao) -> str:
+        return f"""<label for="OR_ATND_SRCH_EMPLID">ID</label>
+<input type="text" id="OR_ATND_SRCH_EMPLID" name="OR_ATND_SRCH_EMPLID" value="{html.escape(sessao.emplid)}">
+<input type="button" id="#ICSearch" name="#ICSearch" value="Pesquisar" onclick="submitAction_win0(document.win0,'#ICSearch');">"""
+
+    def _html_resultados(self, aluno: dict) -> str:
+        linhas = ["<tr><th>ID</th><th>Nome</th><th>Programa</th></tr>"]
+        if aluno:
+            for i, programa in enumerate(aluno["programas"]):
+                linhas.append(
+                    f"<tr><td>{_link(f'SEARCH_RESULT{i + 1}', 'Selecionar', f'#ICRow{i}')}</td>"
+                    f"<td>{html.escape(aluno['nome'])}</td><td>{html.escape(programa)}</td></tr>"
+                )
+        return f"""<table id="PTSRCHRESULTS"><tbody>{''.join(linhas)}</tbody></table>"""
+
+    def _html_grade(self, aluno: dict) -> str:
+        linhas = ["<tr><th>Nº Aula</th><th>Descrição</th><th>Início</th><th>Fim</th></tr>"]
+        for k, aula in enumerate(aluno["aulas"] if aluno else []):
+            linhas.append(
+                f"<tr><td>{_link(f'CLASS_NBR${k}', aula['numero'])}</td><td>Aula {html.escape(aula['numero'])}</td>"
+                f"<td>{aula['inicio']}</td><td>{aula['fim']}</td></tr>"
+            )
+        return f"""<table id="STDNT_ENRL$scroll$0"><tbody>{''.join(linhas)}</tbody></table>"""
+
+    def _html_frequencias(self, sessao: EstadoSessao) -> str:
+        linhas = ["<tr><th>Razão</th><th>Início</th><th>Fim</th></tr>"]
+        with self.servidor._lock:
+            for l in self.servidor.lancamentos:
+                if l["emplid"] == sessao.emplid and l["aula"] == sessao.aula["numero"]:
+                    linhas.append(f"<tr><td>{html.escape(l['razao'])}</td><td>{l['inicio']}</td><td>{l['fim']}</td></tr>")
+        return f"""<table id="ATTEND_REASON$scroll$0">{''.join(linhas)}</table>"""
+
+    def _html_aula(self, sessao: EstadoSessao) -> str:
+        aula = sessao.aula
+        corpo = f"""<div id="ACE_DERIVED_AA2_"><table><tr><td>Aula</td><td>{aula['numero']}</td></tr>
+<tr><td>Situação</td><td>{html.escape(aula['tipo'])}</td></tr></table></div>
+{self._html_frequencias(sessao)}
+{_link('ICTAB_1', 'Lançamento', '#ICPanel1')}
+{_link('DERIVED_AA2_DERIVED_LINK10$0', 'Voltar')}"""
+        if sessao.pagina == "aba":
+            opcoes = "".join(f'<option value="{v}">{html.escape(t)}</option>' for v, t in RAZOES)
+            corpo += f"""
+<input type="text" id="DIG_APR_EST_WRK_START_DT" name="DIG_APR_EST_WRK_START_DT" value="">
+<input type="text" id="DIG_APR_EST_WRK_END_DT" name="DIG_APR_EST_WRK_END_DT" value="">
+<select id="DIG_APR_EST_WRK_ATTEND_REASON" name="DIG_APR_EST_WRK_ATTEND_REASON"><option value=""></option>{opcoes}</select>
+<input type="text" id="DIG_APR_EST_WRK_REASON_DESCR" name="DIG_APR_EST_WRK_REASON_DESCR" value="">
+<input type="button" id="DIG_APR_EST_WRK_PROCESS_BTN" name="DIG_APR_EST_WRK_PROCESS_BTN" value="Aplicar" onclick="submitAction_win0(document.win0,'DIG_APR_EST_WRK_PROCESS_BTN');">
+<input type="button" id="#ICSave" name="#ICSave" value="Salvar" onclick="submitAction_win0(document.win0,'#ICSave');">"""
+        return corpo
+
+
+def latencias_por_acao(pesquisa: float = 0.0, salvar: float = 0.0) -> dict:
+    return {acao: s for acao, s in (("#ICSearch", pesquisa), ("#ICSave", salvar)) if s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor PeopleSoft de teste para o AutoAtestado")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--alunos", type=int, default=20)
+    parser.add_argument("--aulas", type=int, default=8)
+    parser.add_argument("--ano", default="2025")
+    parser.add_argument("--variacao", type=int, default=0, help="varia o número de aulas por aluno em ± N")
+    parser.add_argument("--semestral", action="store_true", help="metade das aulas só no segundo semestre")
+    parser.add_argument("--latencia", type=float, default=0.0, help="atraso em segundos por requisição")
+    parser.add_argument("--latencia-pesquisa", type=float, default=0.0, help="atraso extra no #ICSearch")
+    parser.add_argument("--latencia-salvar", type=float, default=0.0, help="atraso extra no #ICSave")
+    parser.add_argument("--expirar-apos", type=int, default=0, help="derruba cada sessão depois de N requisições")
+    parser.add_argument("--capacidade", type=int, default=0, help="requisições atendidas ao mesmo tempo (0 = sem limite)")
+    args = parser.parse_args()
+    servidor = ServidorPeopleSoftTeste(
+        gerar_alunos(args.alunos, args.aulas, args.ano, variacao=args.variacao, semestral=args.semestral), porta=args.porta, latencia=args.latencia,
+        latencia_acoes=latencias_por_acao(args.latencia_pesquisa, args.latencia_salvar), expirar_apos=args.expirar_apos,
+        capacidade=args.capacidade,
+    )
+    print(f"Servidor de teste em {servidor.url_base} ({args.alunos} alunos, {args.aulas} aulas cada). Ctrl+C para sair.")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def _tem_tela() -> bool:
+    try:
+        import tkinter  # noqa: F401
+    except ImportError:
+        return False
+    return os.name == "nt" or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+@pytest.mark.skipif(not _tem_tela(), reason="sem tela (DISPLAY) ou sem tkinter")
+def test_janela_abre_dentro_da_meta_sem_selenium(tmp_path):
+    # Pasta e APPDATA vazios: não lê a planilha nem as configurações de quem roda o teste
+    env = dict(os.environ, APPDATA=str(tmp_path))
+    saida = subprocess.run([sys.executable, MAIN, "--tempo-inicio"], cwd=tmp_path, env=env,
+                           capture_output=True, text=True, timeout=60)
+    resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+    assert resultado["selenium_importado"] is False
+    assert resultado["ok"], resultado
+    assert saida.returncode == 0